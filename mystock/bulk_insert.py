@@ -0,0 +1,44 @@
+# bulk_insert.py
+# 🔹 Snapshot रो का Bulk Insert (Web और Worker दोनों के लिए)
+#    PostgreSQL पर `COPY ... FROM STDIN` (psycopg): रो एक Stream में जाती हैं —
+#    न हर रो के लिए INSERT Parameters, न Parameter Limit की वजह से कई Batches।
+#    बाकी Backends (SQLite Fallback) पर वही पुराना bulk_create।
+#    COPY Model Instances में pk वापस नहीं भरता — Snapshot Writes को उसकी ज़रूरत नहीं।
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# settings.DB_BULK_COPY (env DB_BULK_COPY=0) या bench_sync --no-copy से बंद
+copy_enabled = getattr(settings, "DB_BULK_COPY", True)
+
+
+def copy_supported():
+    return copy_enabled and connection.vendor == "postgresql"
+
+
+def _copy_rows(model, rows):
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    quote = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        quote(model._meta.db_table), ", ".join(quote(f.column) for f in fields)
+    )
+    with connection.cursor() as cursor:
+        # Django का CursorWrapper -> असली psycopg Cursor
+        with cursor.cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row([
+                    f.get_db_prep_save(f.pre_save(row, add=True), connection) for f in fields
+                ])
+
+
+def bulk_insert(model, rows):
+    """रो (बिना pk वाले Model Instances) एक साथ Insert: PostgreSQL पर COPY, वरना bulk_create"""
+    if not rows:
+        return
+    if copy_supported():
+        _copy_rows(model, rows)
+    else:
+        model.objects.bulk_create(rows)
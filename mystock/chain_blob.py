@@ -0,0 +1,281 @@
+# chain_blob.py
+# 🔹 Chain History का Compressed Columnar Format (Web और Worker दोनों के लिए)
+#    हर (सिंबल, Expiry, Snapshot) = ChainSnapshot की एक रो, और पूरी चेन उसके `blob` में:
+#    Strikes + हर Column एक Array (Fixed-Point Delta या Float), Byte-Shuffle करके LZMA से Compress;
+#    Reversal / Range / % जैसे Derived Columns रखे ही नहीं जाते, Decode पर दोबारा बनते हैं।
+#    ~100 स्ट्राइक्स × 30 Columns की अलग-अलग OptionChain रो की जगह कुछ KB का एक Blob;
+#    एक सिंबल की पूरे दिन की History = ChainSnapshot पर एक Indexed Query।
+import lzma
+import struct
+
+import numpy as np
+
+from mystock.models import ChainSnapshot, OptionChain
+
+MAGIC = b"OCB3"
+_HEADER = struct.Struct("<4sId")  # magic, strikes, spot
+_META = struct.Struct("<H")  # Compressed Body की शुरुआत में Column Entries की गिनती
+# फिर हर Column की Entry के 4 int8 — Column-wise रखे (सारे Ids, फिर dtype Codes, Decimals, Delta Orders)
+# ताकि एक जैसे Bytes साथ आएं: Column Id, dtype Code, Decimals (-1 = Float / Derived), Delta Order
+_ENTRY_FIELDS = 4
+
+# Blob में जाने वाले Columns (Strike_Price अलग से, Spot/Time Header में)
+BLOB_COLUMNS = (
+    "Lot_size",
+    "CE_Delta", "CE_RANGE", "CE_IV", "CE_COI_percent", "CE_COI", "CE_OI_percent", "CE_OI",
+    "CE_Volume_percent", "CE_Volume", "CE_CLTP", "CE_LTP", "Reversl_Ce",
+    "Reversl_Pe", "PE_LTP", "PE_CLTP", "PE_Volume", "PE_Volume_percent", "PE_OI", "PE_OI_percent",
+    "PE_COI", "PE_COI_percent", "PE_IV", "PE_RANGE", "PE_Delta",
+)
+
+# ज़्यादातर Columns round(x, 2/4) होकर आते हैं: उन्हें Fixed-Point Integer (x × 10^d) में,
+# स्ट्राइक्स के साथ Delta + ZigZag करके सबसे छोटी Width (1/2/4/8 Bytes) में रखते हैं —
+# Delta Order हर Column का अलग: 0 (OI जैसे उछलते Values), 1, या 2 (Strike / LTP / IV जैसे Smooth Curves)।
+# Fixed-Point Columns Decode पर NOISE (Relative) तक ही वही हैं: LTP - Close = 11.529999999999999 जैसी
+# Float Arithmetic की गड़बड़ी साफ़ होकर 11.53 लौटती है। जो Column Decimal में न बैठे (NaN वगैरह)
+# वो float64 में, बिल्कुल वही (Bit-for-Bit)।
+DECIMALS = (0, 2, 4)
+MAX_ORDER = 2
+NOISE = 1e-12  # इतनी Relative गड़बड़ी Float Arithmetic की है, Data की नहीं
+_INT_TYPES = ("<u1", "<u2", "<u4", "<u8")
+
+# compute_chain_frame के Derived Columns: Stored Columns (और Spot) से Decode पर दोबारा बनते हैं,
+# इसलिए Blob में नहीं जाते — बशर्ते Encode पर दोबारा बनाकर बिल्कुल वही निकलें, वरना Stored रहते हैं
+PERCENT_COLUMNS = ("CE_OI", "PE_OI", "CE_Volume", "PE_Volume", "CE_COI", "PE_COI")
+DERIVED = "="
+
+# Meta में Column नाम की जगह इसी Table का Index (छोटी Chains पर नामों का Text ही Blob का बड़ा हिस्सा था)
+_COLUMN_IDS = ("Strike_Price",) + BLOB_COLUMNS
+_COLUMN_INDEX = {name: i for i, name in enumerate(_COLUMN_IDS)}
+_DTYPE_CODES = {"<u1": b"b", "<u2": b"h", "<u4": b"i", "<u8": b"q", "<f8": b"d", DERIVED: b"="}
+_DTYPES = {code: dtype for dtype, code in _DTYPE_CODES.items()}
+
+# कुछ KB के Body पर zlib से ~7% छोटा; Raw Format (LZMA Header नहीं) और छोटी Dictionary —
+# Default (64 MB) Dictionary हर Encode पर दसियों ms लेती है
+_LZMA_DICT = 1 << 16
+
+
+def _lzma_filters(level):
+    return [{"id": lzma.FILTER_LZMA2, "preset": level, "dict_size": _LZMA_DICT, "lc": 4, "lp": 0, "pb": 0}]
+
+
+def derive_columns(columns, spot):
+    """Reversal / Range / % Columns, compute_chain_frame वाले Formulas से ही (जो Inputs मौजूद हों)"""
+    out = {}
+    ce_ltp, pe_ltp = columns.get("CE_LTP"), columns.get("PE_LTP")
+    if ce_ltp is not None and pe_ltp is not None and spot is not None and np.isfinite(spot):
+        rev_ce = np.zeros(len(ce_ltp))
+        rev_pe = np.zeros(len(ce_ltp))
+        pair = np.round((pe_ltp[:-1] - ce_ltp[1:]) + spot, 2)
+        rev_ce[:-1] = pair
+        rev_pe[1:] = pair
+        out["Reversl_Ce"], out["Reversl_Pe"] = rev_ce, rev_pe
+
+    ce_oi, pe_oi = columns.get("CE_OI"), columns.get("PE_OI")
+    if ce_oi is not None and pe_oi is not None:
+        both = (ce_oi != 0) & (pe_oi != 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["CE_RANGE"] = np.where(both, np.round(np.maximum(ce_oi - pe_oi, 0) / ce_oi * 100, 2), 0.0)
+            out["PE_RANGE"] = np.where(both, np.round(np.maximum(pe_oi - ce_oi, 0) / pe_oi * 100, 2), 0.0)
+
+    for col in PERCENT_COLUMNS:
+        values = columns.get(col)
+        if values is not None:
+            max_v = values.max()
+            out[f"{col}_percent"] = np.round(values / max_v * 100, 2) if max_v > 0 else np.zeros_like(values)
+    return out
+
+
+def _shuffle(matrix):
+    """
+    (Columns, Strikes) Matrix -> bytes: हर Column के पहले Bytes साथ, फिर दूसरे, ...
+    Numbers इस तरह कहीं बेहतर दबते हैं
+    """
+    count, width = matrix.shape[1], matrix.dtype.itemsize
+    raw = np.ascontiguousarray(matrix).view(np.uint8).reshape(len(matrix), count, width)
+    return raw.transpose(0, 2, 1).tobytes()
+
+
+def _unshuffle(body, offset, dtype, rows, count):
+    width = np.dtype(dtype).itemsize
+    size = rows * count * width
+    planes = np.frombuffer(body, dtype=np.uint8, count=size, offset=offset).reshape(rows, width, count)
+    return np.ascontiguousarray(planes.transpose(0, 2, 1)).view(dtype).reshape(rows, count), offset + size
+
+
+def _zigzag(values):
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def encode_columns(strikes, columns, spot=None, level=9):
+    """Strikes (Array) + {Column: Array} (+ Spot, Reversal Columns के लिए) -> bytes"""
+    matrix = np.vstack([np.asarray(strikes, dtype=np.float64)] +
+                       [np.asarray(v, dtype=np.float64) for v in columns.values()])
+    return _encode_matrix(["Strike_Price", *columns], matrix, spot, level)
+
+
+def encode_frame(df, columns=BLOB_COLUMNS, level=9):
+    """कैलकुलेटेड Chain DataFrame -> Blob (DataFrame में जो Columns हैं वही; एक ही to_numpy)"""
+    names = ["Strike_Price"] + [name for name in columns if name in df.columns]
+    spot = float(df["Spot_Price"].iloc[0]) if "Spot_Price" in df.columns and len(df) else None
+    return _encode_matrix(names, df[names].to_numpy(dtype=np.float64).T, spot, level)
+
+
+def _encode_matrix(names, matrix, spot, level):
+    """(Columns, Strikes) float64 Matrix -> bytes (सारे Columns एक साथ, Matrix Ops में)"""
+    count = matrix.shape[1]
+
+    # हर Column के लिए सबसे कम Decimals जिनसे वो बिल्कुल वापस बने (-1 = Float में)
+    finite = np.isfinite(matrix)
+    safe = np.where(finite, matrix, 0.0)
+    decimals = np.full(len(names), -1)
+    for d in reversed(DECIMALS):
+        scaled = np.round(safe * 10.0 ** d)
+        # x × 10^d बिल्कुल (या Float Noise तक, जैसे LTP - Close = 11.529999999) वापस बने
+        close = np.abs(scaled / 10.0 ** d - safe) <= NOISE * np.maximum(np.abs(safe), 1.0)
+        exact = close.all(axis=1) & (np.abs(scaled).max(axis=1, initial=0) < 2 ** 53)
+        decimals[finite.all(axis=1) & exact] = d
+
+    derived = derive_columns(dict(zip(names, matrix)), spot)
+    skip = np.array([
+        name in derived and np.array_equal(derived[name], matrix[r], equal_nan=True)
+        for r, name in enumerate(names)
+    ])
+    decimals[skip] = -2
+    fixed = np.flatnonzero(decimals >= 0)
+
+    # हर Column के लिए वो Delta Order जिसमें Values के कुल Bits (log2) सबसे कम हों
+    ints = np.round(safe[fixed] * 10.0 ** decimals[fixed, None]).astype(np.int64)
+    candidates = [_zigzag(ints)]
+    for _ in range(MAX_ORDER):
+        ints = np.diff(ints, axis=1, prepend=np.zeros((len(fixed), 1), dtype=np.int64))
+        candidates.append(_zigzag(ints))
+    candidates = np.stack(candidates)
+    orders = np.log2(candidates.astype(np.float64) + 1).sum(axis=2).argmin(axis=0)
+    zigzag = candidates[orders, np.arange(len(fixed))]
+    tops = zigzag.max(axis=1, initial=0)
+    widths = np.searchsorted([2 ** 8, 2 ** 16, 2 ** 32], tops, side="right")
+
+    metas, parts = [], []
+    for w, dtype in enumerate(_INT_TYPES):
+        rows = np.flatnonzero(widths == w)
+        if len(rows):
+            metas += [(names[fixed[r]], dtype, decimals[fixed[r]], orders[r]) for r in rows]
+            parts.append(_shuffle(zigzag[rows].astype(dtype)))
+    floats = np.flatnonzero(decimals == -1)
+    if len(floats):
+        metas += [(names[r], "<f8", -1, 0) for r in floats]
+        parts.append(_shuffle(matrix[floats]))
+
+    metas += [(names[r], DERIVED, -1, 0) for r in np.flatnonzero(skip)]
+
+    entries = np.array([(_COLUMN_INDEX[n], _DTYPE_CODES[t][0], d, o) for n, t, d, o in metas], dtype=np.int8)
+    meta = entries.T.tobytes()
+    body = lzma.compress(
+        _META.pack(len(metas)) + meta + b"".join(parts), format=lzma.FORMAT_RAW, filters=_lzma_filters(level)
+    )
+    return _HEADER.pack(MAGIC, count, np.nan if spot is None else spot) + body
+
+
+class ChainArrays:
+    """Decode हुई चेन: `strikes` (float64) और `columns` {नाम: NumPy Array}"""
+
+    __slots__ = ("strikes", "columns")
+
+    def __init__(self, strikes, columns):
+        self.strikes = strikes
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.strikes)
+
+    def __getitem__(self, name):
+        return self.strikes if name == "Strike_Price" else self.columns[name]
+
+
+def decode_chain(blob):
+    """Blob -> ChainArrays (एक ही dtype वाले Columns एक साथ Decode)"""
+    blob = bytes(blob)
+    if blob[:4] != MAGIC:
+        raise ValueError(f"Unknown chain blob format: {blob[:4]!r}")
+    _, count, spot = _HEADER.unpack_from(blob)
+    body = lzma.decompress(blob[_HEADER.size:], format=lzma.FORMAT_RAW, filters=_lzma_filters(6))
+    (meta_count,) = _META.unpack_from(body)
+    entries = np.frombuffer(body, dtype=np.int8, count=_ENTRY_FIELDS * meta_count, offset=_META.size)
+    offset = _META.size + entries.size
+    metas = [
+        (_COLUMN_IDS[i], _DTYPES[bytes([code])], dec, order)
+        for i, code, dec, order in entries.reshape(_ENTRY_FIELDS, meta_count).T.tolist()
+    ]
+    derived = [m[0] for m in metas if m[1] == DERIVED]
+    metas = [m for m in metas if m[1] != DERIVED]
+
+    columns = {}
+    start = 0
+    while start < len(metas):
+        dtype = metas[start][1]
+        end = start
+        while end < len(metas) and metas[end][1] == dtype:
+            end += 1
+        group = metas[start:end]
+        values, offset = _unshuffle(body, offset, dtype, len(group), count)
+        if dtype in _INT_TYPES:
+            zigzag = values.astype(np.uint64)
+            ints = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+            orders = np.array([m[3] for m in group])
+            for order in range(1, MAX_ORDER + 1):
+                rows = orders >= order
+                ints[rows] = np.cumsum(ints[rows], axis=1)
+            scale = 10.0 ** np.array([m[2] for m in group])
+            values = ints / scale[:, None]
+        columns.update((m[0], values[i]) for i, m in enumerate(group))
+        start = end
+    if derived:
+        rebuilt = derive_columns(columns, spot)
+        columns.update((name, rebuilt[name]) for name in derived)
+    return ChainArrays(columns.pop("Strike_Price"), columns)
+
+
+def load_history(symbol, expiry=None, start=None, end=None):
+    """
+    सिंबल (और Expiry) के सारे Blob Snapshots, पुराने से नए:
+    [(fetched_at, spot_price, ChainArrays), ...] — एक Query, हर Snapshot एक Blob।
+    """
+    queryset = ChainSnapshot.objects.filter(symbol=symbol, blob__isnull=False)
+    if expiry:
+        queryset = queryset.filter(expiry_date=expiry)
+    if start is not None:
+        queryset = queryset.filter(fetched_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(fetched_at__lt=end)
+    return [
+        (fetched_at, spot, decode_chain(blob))
+        for fetched_at, spot, blob in queryset.order_by("fetched_at").values_list("fetched_at", "spot_price", "blob")
+    ]
+
+
+def snapshot_rows(snapshot):
+    """
+    Snapshot की चेन, Strike के क्रम में, बिना Save हुए OptionChain Objects के रूप में (Templates के लिए)।
+    Blob से पहले के Snapshots की असली OptionChain रो।
+    """
+    if snapshot.blob is None:
+        return list(snapshot.rows.order_by("Strike_Price"))
+    chain = decode_chain(snapshot.blob)
+    names = list(chain.columns)
+    # NaN -> None, जैसा DB में null
+    values = [[None if v != v else v for v in chain.columns[name].tolist()] for name in names]
+    rows = []
+    for i, strike in enumerate(chain.strikes.tolist()):
+        fields = {name: values[j][i] for j, name in enumerate(names)}
+        fields["Lot_size"] = int(fields.get("Lot_size") or 1)
+        rows.append(OptionChain(
+            Time=snapshot.fetched_at,
+            snapshot=snapshot,
+            Symbol=snapshot.symbol,
+            Expiry_Date=snapshot.expiry_date,
+            Spot_Price=snapshot.spot_price,
+            Strike_Price=strike,
+            **fields,
+        ))
+    return rows
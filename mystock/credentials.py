@@ -16,11 +16,23 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # stock_market folder
 TOKEN_PATH = os.path.join(BASE_DIR, "access_token.txt")
 
-if not os.path.exists(TOKEN_PATH):
-    raise FileNotFoundError(f"Token file not found at: {TOKEN_PATH}")
-
-with open(TOKEN_PATH, "r") as file:
-    access_token = file.read().strip()
+_access_token = None
+
+def get_access_token():
+    """Token फाइल पहली ज़रूरत पर ही पढ़ी जाती है (Import पर नहीं)"""
+    global _access_token
+    if _access_token is None:
+        if not os.path.exists(TOKEN_PATH):
+            raise FileNotFoundError(f"Token file not found at: {TOKEN_PATH}")
+        with open(TOKEN_PATH, "r") as file:
+            _access_token = file.read().strip()
+    return _access_token
+
+def __getattr__(name):
+    # पुराना `from mystock.credentials import access_token` चलता रहे
+    if name == "access_token":
+        return get_access_token()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 #print(access_token)
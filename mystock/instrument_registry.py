@@ -0,0 +1,80 @@
+# instrument_registry.py
+# 🔹 Instrument Key / Lot Size की साझा Registry (Instrument Model)
+#    Web और Worker दोनों Processes यहीं से पढ़ते हैं — pandas या Master Contract CSV नहीं।
+#    हर Process में एक छोटा, Bounded LRU ताकि बार-बार वही सिंबल DB से न पढ़ना पड़े।
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from .models import Instrument
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_CACHE_SIZE = 2048
+# Worker रोज़ Registry दोबारा भरता है; Web Processes का LRU इतने सेकंड बाद खाली, ताकि Lot Size बदलाव पहुंचें
+REGISTRY_MAX_AGE = 3600
+
+
+class InstrumentRegistry:
+    """
+    symbol -> (instrument_key, name, lot_size)।
+    सिर्फ मिले हुए सिंबल Cache होते हैं; Miss Cache नहीं होता ताकि
+    sync_instruments के बाद नया सिंबल तुरंत दिखे; मिले हुए भी `max_age` सेकंड तक ही।
+    """
+
+    def __init__(self, maxsize=REGISTRY_CACHE_SIZE, max_age=REGISTRY_MAX_AGE):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._cache = OrderedDict()
+        self._expires = time.monotonic() + max_age
+        self._lock = threading.Lock()
+
+    def lookup(self, symbol):
+        with self._lock:
+            if time.monotonic() >= self._expires:
+                self._cache.clear()
+                self._expires = time.monotonic() + self.max_age
+            entry = self._cache.get(symbol)
+            if entry is not None:
+                self._cache.move_to_end(symbol)
+                return entry
+
+        try:
+            entry = (
+                Instrument.objects.filter(symbol=symbol)
+                .values_list("instrument_key", "name", "lot_size")
+                .first()
+            )
+        except Exception as e:
+            logger.error(f"❌ Instrument Registry Error for {symbol}: {e}")
+            return None
+
+        if entry is None:
+            logger.warning(f"⚠️ {symbol} Registry में नहीं है (python manage.py sync_instruments चलाएं)")
+            return None
+
+        with self._lock:
+            self._cache[symbol] = entry
+            self._cache.move_to_end(symbol)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return entry
+
+    def instrument_key(self, symbol):
+        entry = self.lookup(symbol)
+        return entry[0] if entry else None
+
+    def name_lot_size(self, symbol):
+        entry = self.lookup(symbol)
+        if not entry:
+            return symbol, 1
+        return entry[1] or symbol, entry[2] or 1
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# पूरी प्रोसेस के लिए एक Registry
+registry = InstrumentRegistry()
@@ -0,0 +1,254 @@
+# api_capture.py
+# 🔹 Upstox API Responses का Record-and-Replay Harness
+#    Capture: /v2/option/chain और /v2/option/contract के Raw Responses को
+#             समय (timing metadata) के साथ gzip JSONL फाइलों में लिखता है।
+#    Replay : वही फाइलें aiohttp Session की जगह वापस परोसता है —
+#             रिकॉर्डेड स्पीड (speed गुना) पर या जितना तेज़ हो सके (speed=0)।
+import asyncio
+import bisect
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Endpoint -> फाइल का prefix
+FILE_PREFIXES = {
+    "/v2/option/chain": "option_chain",
+    "/v2/option/contract": "option_contract",
+}
+
+
+def request_key(endpoint, params):
+    """एक जैसी Requests को पहचानने की Key (Endpoint + instrument_key + expiry)"""
+    params = params or {}
+    return (endpoint, params.get("instrument_key", ""), str(params.get("expiry_date", "")))
+
+
+class ResponseRecorder:
+    """
+    हर Response को एक JSON लाइन में लिखता है:
+    {"t": शुरुआत से सेकंड्स, "wall": ISO समय, "endpoint", "params", "status", "elapsed", "body"}
+    """
+
+    FLUSH_EVERY = 50
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.started = time.monotonic()
+        self.count = 0
+        self._files = {}
+        self._lock = threading.Lock()  # sync (requests) कॉलर्स threads से भी आते हैं
+
+    def _file_for(self, endpoint):
+        f = self._files.get(endpoint)
+        if f is None:
+            prefix = FILE_PREFIXES.get(endpoint, endpoint.strip("/").replace("/", "_"))
+            name = f"{prefix}-{datetime.now():%Y-%m-%d}.jsonl.gz"
+            # 'a' मोड: दोबारा चलाने पर नया gzip member जुड़ता है, पुराना डेटा नहीं मिटता
+            f = gzip.open(os.path.join(self.directory, name), "at", encoding="utf-8")
+            self._files[endpoint] = f
+        return f
+
+    def record(self, endpoint, params, status, body, elapsed):
+        line = json.dumps({
+            "t": round(time.monotonic() - self.started, 4),
+            "wall": datetime.now().isoformat(timespec="milliseconds"),
+            "endpoint": endpoint,
+            "params": {k: str(v) for k, v in (params or {}).items()},
+            "status": status,
+            "elapsed": round(elapsed, 4),
+            "body": body,
+        }, ensure_ascii=False)
+        with self._lock:
+            f = self._file_for(endpoint)
+            f.write(line + "\n")
+            self.count += 1
+            if self.count % self.FLUSH_EVERY == 0:
+                f.flush()
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+
+class CapturedResponse:
+    """aiohttp ClientResponse जैसा छोटा ऑब्जेक्ट (status, headers, read/text/json)"""
+
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body if isinstance(body, str) else (body or b"").decode("utf-8", "replace")
+
+    async def read(self):
+        return self._body.encode("utf-8")
+
+    async def text(self):
+        return self._body
+
+    async def json(self, **kwargs):
+        return json.loads(self._body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class RecordingSession:
+    """असली aiohttp Session को लपेटता है और हर GET Response को Recorder में लिखता है"""
+
+    def __init__(self, session, recorder):
+        self.session = session
+        self.recorder = recorder
+
+    def get(self, url, params=None, **kwargs):
+        return _RecordingRequest(self, url, params, kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    async def __aenter__(self):
+        await self.session.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.recorder.close()
+        return await self.session.__aexit__(*exc)
+
+
+class _RecordingRequest:
+    def __init__(self, owner, url, params, kwargs):
+        self.owner, self.url, self.params, self.kwargs = owner, url, params, kwargs
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        async with self.owner.session.get(self.url, params=self.params, **self.kwargs) as res:
+            body = await res.read()
+            status, headers = res.status, dict(res.headers)
+        elapsed = time.perf_counter() - started
+        response = CapturedResponse(status, body, headers)
+        self.owner.recorder.record(urlsplit(self.url).path, self.params, status, response._body, elapsed)
+        return response
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class ReplayStore:
+    """
+    Capture डायरेक्टरी की सारी फाइलें पढ़कर Request Key के हिसाब से Responses रखता है।
+    speed > 0 : Virtual Clock (= बीता समय × speed) तक का सबसे ताज़ा Response,
+                और रिकॉर्डेड Latency / speed जितना इंतज़ार।
+    speed = 0 : हर Key के Responses क्रम से, बिना किसी इंतज़ार के (Max Speed)।
+    """
+
+    def __init__(self, directory, speed=1.0):
+        self.speed = speed
+        self.records = {}
+        for path in sorted(glob.glob(os.path.join(directory, "*.jsonl.gz"))):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    key = request_key(rec["endpoint"], rec.get("params"))
+                    self.records.setdefault(key, []).append(rec)
+        for recs in self.records.values():
+            recs.sort(key=lambda r: r["t"])
+        self._times = {k: [r["t"] for r in v] for k, v in self.records.items()}
+        self._cursors = {}
+        self.last_t = max((v[-1]["t"] for v in self.records.values()), default=0.0)
+        self.served = 0
+        self.misses = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        logger.info(f"📼 Replay loaded {sum(len(v) for v in self.records.values())} responses "
+                    f"for {len(self.records)} requests from {directory}")
+
+    def virtual_now(self):
+        return (time.monotonic() - self.started) * self.speed
+
+    @property
+    def finished(self):
+        if self.speed:
+            return self.virtual_now() > self.last_t
+        # Max Speed: जब हर Option Chain Request के सारे Responses परोसे जा चुके हों
+        chain_keys = [k for k in self.records if k[0] == "/v2/option/chain"] or list(self.records)
+        return all(self._cursors.get(k, 0) >= len(self.records[k]) for k in chain_keys)
+
+    def lookup(self, endpoint, params):
+        """Request के लिए Recorded Response (या None अगर कभी रिकॉर्ड ही नहीं हुआ)"""
+        key = request_key(endpoint, params)
+        recs = self.records.get(key)
+        with self._lock:
+            if not recs:
+                self.misses += 1
+                return None
+            if self.speed:
+                idx = max(0, bisect.bisect_right(self._times[key], self.virtual_now()) - 1)
+            else:
+                idx = min(self._cursors.get(key, 0), len(recs) - 1)
+                self._cursors[key] = idx + 1
+            self.served += 1
+            return recs[idx]
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "served": self.served,
+            "misses": self.misses,
+            "elapsed": round(elapsed, 2),
+            "responses_per_sec": round(self.served / elapsed, 1) if elapsed else 0.0,
+            "recorded_span": round(self.last_t, 1),
+        }
+
+
+class ReplaySession:
+    """aiohttp.ClientSession की जगह इस्तेमाल होने वाला Replay Transport"""
+
+    def __init__(self, store):
+        self.store = store
+        self.closed = False
+
+    def get(self, url, params=None, **kwargs):
+        return _ReplayRequest(self.store, url, params)
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+
+class _ReplayRequest:
+    def __init__(self, store, url, params):
+        self.store, self.url, self.params = store, url, params
+
+    async def __aenter__(self):
+        rec = self.store.lookup(urlsplit(self.url).path, self.params)
+        if rec is None:
+            return CapturedResponse(404, '{"status": "error", "errors": ["not recorded"]}')
+        if self.store.speed:
+            await asyncio.sleep(rec.get("elapsed", 0) / self.store.speed)
+        return CapturedResponse(rec["status"], rec["body"])
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# Sync (requests) कॉलर्स के लिए प्रोसेस-लेवल Capture/Replay (run_sync_async सेट करता है)
+active_recorder = None
+active_replay = None
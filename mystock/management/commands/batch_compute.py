@@ -0,0 +1,439 @@
+# batch_compute.py
+# 🔹 Cross-Symbol Batch Compute
+#    कई सिंबल्स की चेन एक Ragged Batch (Flat Columns + Offsets) में पैक होकर एक ही
+#    NumPy Pass में कैलकुलेट होती हैं: Reversal, Range, %-of-max (Segmented Max),
+#    Top-2 OI, Stop Loss और Risk Counts। हर चेन का अलग DataFrame/pandas Overhead नहीं,
+#    पूरे Batch का एक DataFrame बनता है और हर सिंबल को उसका Slice (View) मिलता है।
+#    नतीजे compute_chain_frame + compute_support_resistance जैसे ही रहते हैं।
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .chain_compute import SnapshotResult, compute_pool
+from .chain_diff import chain_fingerprint
+from .chain_parser import RAW_COLUMNS, PERCENT_COLUMNS, parse_chain
+
+logger = logging.getLogger(__name__)
+
+# Spot के नीचे/ऊपर Risk गिनने के लिए कितनी स्ट्राइक्स
+RISK_WINDOW = 10
+
+
+class ChainBatch:
+    """Ragged Batch: हर Column एक Flat Array, सिंबल i की रो offsets[i]:offsets[i+1]"""
+
+    __slots__ = ("columns", "offsets", "spot", "times", "symbols", "expiries", "lot_sizes")
+
+    def __init__(self, chains, symbols, expiries, lot_sizes):
+        sizes = np.fromiter((len(chain) for chain in chains), dtype=np.int64, count=len(chains))
+        self.offsets = np.zeros(len(chains) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self.offsets[1:])
+        self.columns = {name: np.concatenate([chain.columns[name] for chain in chains]) for name in RAW_COLUMNS}
+        self.spot = np.array([chain.spot for chain in chains], dtype=np.float64)
+        self.times = [chain.time for chain in chains]
+        self.symbols = list(symbols)
+        self.expiries = list(expiries)
+        self.lot_sizes = np.asarray(lot_sizes)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def starts(self):
+        return self.offsets[:-1]
+
+    @property
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    def segment_ids(self):
+        """हर Flat रो का सिंबल (Segment) नंबर"""
+        return np.repeat(np.arange(len(self)), self.sizes)
+
+    def spread(self, per_symbol):
+        """हर सिंबल की एक वैल्यू -> उसकी सारी रो पर"""
+        return np.repeat(per_symbol, self.sizes)
+
+
+def _spread_times(batch):
+    # असली Snapshots में Time datetime है (DataFrame में datetime64 Column, जैसे Scalar Broadcast से)
+    if any(t is None for t in batch.times):
+        return batch.spread(np.array(batch.times, dtype=object))
+    return pd.DatetimeIndex(batch.times).repeat(batch.sizes)
+
+
+def _segment_percent_of_max(values, batch):
+    seg_max = batch.spread(np.maximum.reduceat(values, batch.starts))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(seg_max > 0, np.round(values / seg_max * 100, 2), 0.0)
+
+
+def compute_batch_frame(batch):
+    """
+    पूरे Batch का कैलकुलेटेड DataFrame (Columns, Rounding और 0-Handling compute_chain_frame जैसे)।
+    सिंबल i की रो offsets[i]:offsets[i+1] पर हैं।
+    """
+    c = batch.columns
+    starts = batch.starts
+    spot = batch.spread(batch.spot)
+    lot = batch.spread(batch.lot_sizes.astype(np.float64))
+
+    ce_ltp, pe_ltp = c["CE_LTP"], c["PE_LTP"]
+    ce_oi, pe_oi = c["CE_OI"] / lot, c["PE_OI"] / lot
+
+    out = {
+        "Time": _spread_times(batch),
+        "Symbol": batch.spread(np.array(batch.symbols, dtype=object)),
+        "expiry": batch.spread(np.array(batch.expiries, dtype=object)),
+        "Lot_size": batch.spread(batch.lot_sizes),
+        "Strike_Price": c["Strike_Price"],
+        "Spot_Price": spot,
+        "CE_Delta": c["CE_Delta"],
+        "PE_Delta": c["PE_Delta"],
+        "CE_OI": ce_oi,
+        "PE_OI": pe_oi,
+        "CE_CLTP": ce_ltp - c["CE_Close"],
+        "PE_CLTP": pe_ltp - c["PE_Close"],
+        "CE_LTP": ce_ltp,
+        "PE_LTP": pe_ltp,
+        "CE_Volume": c["CE_Volume"] / lot,
+        "PE_Volume": c["PE_Volume"] / lot,
+        "CE_COI": (c["CE_OI"] - c["CE_Prev_OI"]) / lot,
+        "PE_COI": (c["PE_OI"] - c["PE_Prev_OI"]) / lot,
+        "CE_IV": c["CE_IV"],
+        "PE_IV": c["PE_IV"],
+    }
+
+    # Reversal: अगली/पिछली स्ट्राइक की LTP; हर Segment की आखिरी (CE) / पहली (PE) रो पर 0
+    n = len(ce_ltp)
+    pair = np.zeros(n)
+    pair[:-1] = np.round((pe_ltp[:-1] - ce_ltp[1:]) + spot[:-1], 2)
+    rev_ce = pair.copy()
+    rev_ce[batch.offsets[1:] - 1] = 0.0
+    rev_pe = np.zeros(n)
+    rev_pe[1:] = pair[:-1]
+    rev_pe[starts] = 0.0
+    out["Reversl_Ce"] = rev_ce
+    out["Reversl_Pe"] = rev_pe
+
+    # Range: किसी भी तरफ OI = 0 हो तो 0
+    both = (ce_oi != 0) & (pe_oi != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["CE_RANGE"] = np.where(both, np.round(np.maximum(ce_oi - pe_oi, 0) / ce_oi * 100, 2), 0.0)
+        out["PE_RANGE"] = np.where(both, np.round(np.maximum(pe_oi - ce_oi, 0) / pe_oi * 100, 2), 0.0)
+
+    for col in PERCENT_COLUMNS:
+        out[f"{col}_percent"] = _segment_percent_of_max(out[col], batch)
+
+    return pd.DataFrame(out)
+
+
+def _segment_top2(values, seg, batch):
+    """
+    हर Segment की सबसे बड़ी 2 वैल्यूज़ की Flat रो (NaN छोड़कर, बराबरी पर पहली रो)।
+    (first, second, valid) — valid=False वाले Segment में 2 वैलिड वैल्यूज़ नहीं हैं।
+    """
+    missing = np.isnan(values)
+    key = np.where(missing, -np.inf, values)
+    # lexsort Stable है: Segment, फिर वैल्यू घटते क्रम में, बराबरी पर पहले वाली रो
+    order = np.lexsort((-key, seg))
+    starts = batch.starts
+    first = order[starts]
+    second = order[np.minimum(starts + 1, len(order) - 1)]
+    valid = np.add.reduceat((~missing).astype(np.int64), starts) >= 2
+    return first, second, valid
+
+
+class _SortedStrikes:
+    """सारे Segments की स्ट्राइक्स एक Sorted Composite Key पर (Segment, Strike) — एक ही searchsorted"""
+
+    def __init__(self, strike, seg):
+        self.seg = seg
+        self.order = np.lexsort((strike, seg))
+        span = float(np.abs(strike).max()) + 1.0 if len(strike) else 1.0
+        self.composite = seg * span + strike
+        self.sorted = self.composite[self.order]
+
+    def next_higher(self, rows, values):
+        """हर दी गई रो से उसी Segment की अगली बड़ी स्ट्राइक पर `values` (न हो तो 0)"""
+        i = np.searchsorted(self.sorted, self.composite[rows], side="right")
+        return self._pick(rows, i, values)
+
+    def next_lower(self, rows, values):
+        """हर दी गई रो से उसी Segment की पिछली छोटी स्ट्राइक पर `values` (न हो तो 0)"""
+        i = np.searchsorted(self.sorted, self.composite[rows], side="left") - 1
+        return self._pick(rows, i, values)
+
+    def _pick(self, rows, i, values):
+        inside = (i >= 0) & (i < len(self.order))
+        target = self.order[np.clip(i, 0, len(self.order) - 1)]
+        inside &= self.seg[target] == self.seg[rows]
+        return np.where(inside, values[target], 0.0)
+
+
+def _segment_risk(mask, hits, batch, from_end):
+    """हर Segment में mask वाली पहली (या आखिरी) RISK_WINDOW रो में से कितनी पर hits"""
+    starts = batch.starts
+    counts = mask.astype(np.int64)
+    running = np.cumsum(counts)
+    rank = running - batch.spread(running[starts] - counts[starts])  # Segment के अंदर 1, 2, 3...
+    if from_end:
+        total = batch.spread(np.add.reduceat(counts, starts))
+        window = mask & (rank > total - RISK_WINDOW)
+    else:
+        window = mask & (rank <= RISK_WINDOW)
+    return np.add.reduceat((window & hits).astype(np.int64), starts)
+
+
+def _dist(spot, level):
+    if spot > 0 and level > 0:
+        return round((abs(level - spot) / spot) * 100, 2)
+    return 0.0
+
+
+def compute_batch_sr(batch, frame):
+    """
+    हर सिंबल के SupportResistance Fields (compute_support_resistance जैसे) एक ही Pass में।
+    लौटाता है [(fields या None, error या None)], Batch के क्रम में।
+    """
+    seg = batch.segment_ids()
+    strike = frame["Strike_Price"].to_numpy(dtype=float)
+    spot = batch.spot
+    spot_rows = batch.spread(spot)
+    rev_ce = frame["Reversl_Ce"].to_numpy(dtype=float)
+    rev_pe = frame["Reversl_Pe"].to_numpy(dtype=float)
+    pe_pct = frame["PE_OI_percent"].to_numpy(dtype=float)
+    ce_pct = frame["CE_OI_percent"].to_numpy(dtype=float)
+    sizes = batch.sizes
+
+    # WTB/WTT/Strong: OI % की टॉप-2 स्ट्राइक्स
+    stb = {}
+    for side, pct in (("PE", pe_pct), ("CE", ce_pct)):
+        s1, s2, _ = _segment_top2(pct, seg, batch)
+        label = np.where(pct[s2] < 75, "Strong", np.where(strike[s2] < strike[s1], "WTB", "WTT"))
+        stb[side] = np.where(sizes >= 2, label, "")
+
+    # Risk: Spot के नीचे की आखिरी 10 रो पर CE_LTP = 0, ऊपर की पहली 10 पर PE_LTP = 0
+    bearish = _segment_risk(strike < spot_rows, frame["CE_LTP"].to_numpy(dtype=float) == 0, batch, from_end=True)
+    bullish = _segment_risk(strike > spot_rows, frame["PE_LTP"].to_numpy(dtype=float) == 0, batch, from_end=False)
+    bullish = bullish + (stb["CE"] == "WTT")
+    bearish = bearish + (stb["PE"] == "WTB")
+
+    # Top-2 OI + Stop Loss (सारे Segments की स्ट्राइक्स एक बार Sort)
+    pe1, pe2, pe_valid = _segment_top2(frame["PE_OI"].to_numpy(dtype=float), seg, batch)
+    ce1, ce2, ce_valid = _segment_top2(frame["CE_OI"].to_numpy(dtype=float), seg, batch)
+    strikes = _SortedStrikes(strike, seg)
+    sl_pe1, sl_pe2 = strikes.next_lower(pe1, rev_pe), strikes.next_lower(pe2, rev_pe)
+    sl_ce1, sl_ce2 = strikes.next_higher(ce1, rev_ce), strikes.next_higher(ce2, rev_ce)
+
+    results = []
+    for i, symbol in enumerate(batch.symbols):
+        if not (pe_valid[i] and ce_valid[i]):
+            results.append((None, "single positional indexer is out-of-bounds"))
+            continue
+
+        spot_i = float(spot[i])
+        rev_pe1, rev_pe2 = float(rev_pe[pe1[i]]), float(rev_pe[pe2[i]])
+        rev_ce1, rev_ce2 = float(rev_ce[ce1[i]]), float(rev_ce[ce2[i]])
+
+        expiry_val = batch.expiries[i]
+        if not expiry_val or expiry_val == 0:
+            print(f"⚠️ Expiry value for {symbol} is invalid ({expiry_val}). Setting to None.")
+            expiry_val = None
+        else:
+            expiry_val = str(expiry_val)
+
+        results.append((dict(
+            Symbol=symbol,
+            Spot_Price=spot_i,
+            Expiry_Date=expiry_val,
+
+            dist_ce_1=_dist(spot_i, rev_ce1),
+            dist_ce_2=_dist(spot_i, rev_ce2),
+            dist_pe_1=_dist(spot_i, rev_pe1),
+            dist_pe_2=_dist(spot_i, rev_pe2),
+
+            Strike_Price_Pe1=float(strike[pe1[i]]),
+            Reversl_Pe=rev_pe1,
+            Stop_Loss_Pe1=float(sl_pe1[i]),
+            week_Pe_1=float(pe_pct[pe1[i]]),
+
+            Strike_Price_Pe2=float(strike[pe2[i]]),
+            Reversl_Pe_2=rev_pe2,
+            Stop_Loss_Pe2=float(sl_pe2[i]),
+            week_Pe_2=float(pe_pct[pe2[i]]),
+
+            s_t_b_pe=str(stb["PE"][i]),
+
+            Strike_Price_Ce1=float(strike[ce1[i]]),
+            Reversl_Ce=rev_ce1,
+            Stop_Loss_Ce1=float(sl_ce1[i]),
+            week_Ce_1=float(ce_pct[ce1[i]]),
+
+            Strike_Price_Ce2=float(strike[ce2[i]]),
+            Reversl_Ce_2=rev_ce2,
+            Stop_Loss_Ce2=float(sl_ce2[i]),
+            week_Ce_2=float(ce_pct[ce2[i]]),
+
+            s_t_b_ce=str(stb["CE"][i]),
+
+            Bearish_Risk=int(bearish[i]),
+            Bullish_Risk=int(bullish[i]),
+        ), None))
+    return results
+
+
+class BatchResult:
+    """
+    Worker Process से लौटने वाला पूरा Batch: एक DataFrame + हर Item का नतीजा।
+    outcomes[k]: None (खाली चेन), Exception (Parse Error), str (चेन नहीं बदली, उसका Fingerprint)
+    या (start, end, sr, sr_error, fingerprint)।
+    """
+
+    __slots__ = ("frame", "outcomes")
+
+    def __init__(self, frame, outcomes):
+        self.frame = frame
+        self.outcomes = outcomes
+
+    def snapshot(self, k):
+        """Item k का SnapshotResult (df = Batch Frame का Slice); Parse Error हो तो वही Raise"""
+        outcome = self.outcomes[k]
+        if outcome is None:
+            return None
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, str):
+            return SnapshotResult(None, fingerprint=outcome, unchanged=True)
+        start, end, sr, sr_error, fingerprint = outcome
+        return SnapshotResult(self.frame.iloc[start:end], sr, sr_error, fingerprint)
+
+
+def compute_batch_snapshots(items):
+    """
+    [(raw, symbol, expiry, lot_size, now, with_sr, previous)] -> BatchResult (Worker Process में चलता है)।
+    Parse और Fingerprint हर चेन का अलग; जो चेन `previous` Fingerprint जैसी है वह Batch में नहीं जाती,
+    बाकी सारी कैलकुलेशन पूरे Batch पर एक साथ।
+    """
+    outcomes = [None] * len(items)
+    chains, slots, fingerprints = [], [], []
+    for k, (raw, _, _, lot_size, now, _, previous) in enumerate(items):
+        try:
+            chain = parse_chain(raw, now)
+        except ValueError as e:
+            outcomes[k] = e
+            continue
+        if chain is None or not len(chain):
+            continue
+        fingerprint = chain_fingerprint(chain, lot_size)
+        if previous is not None and fingerprint == previous:
+            outcomes[k] = fingerprint
+            continue
+        chains.append(chain)
+        slots.append(k)
+        fingerprints.append(fingerprint)
+
+    if not chains:
+        return BatchResult(None, outcomes)
+
+    batch = ChainBatch(
+        chains,
+        [items[k][1] for k in slots],
+        [items[k][2] for k in slots],
+        [items[k][3] for k in slots],
+    )
+    frame = compute_batch_frame(batch)
+
+    srs = [(None, None)] * len(slots)
+    if any(items[k][5] for k in slots):
+        try:
+            srs = compute_batch_sr(batch, frame)
+        except Exception as e:
+            srs = [(None, str(e))] * len(slots)
+
+    offsets = batch.offsets
+    for pos, k in enumerate(slots):
+        sr, sr_error = srs[pos] if items[k][5] else (None, None)
+        outcomes[k] = (int(offsets[pos]), int(offsets[pos + 1]), sr, sr_error, fingerprints[pos])
+    return BatchResult(frame, outcomes)
+
+
+class ChainBatcher:
+    """
+    Event Loop पर Micro-Batcher: फेच हुई Raw चेन यहाँ जमा होती हैं और `max_batch` पूरे होने
+    या `max_delay` सेकंड बीतने पर पूरा Batch एक ही Compute Pool Job में जाता है।
+    कई Batches एक साथ अलग-अलग Workers पर चल सकते हैं। max_batch <= 1 पर बंद।
+    """
+
+    def __init__(self, max_batch=64, max_delay=0.05):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+
+    def configure(self, max_batch=None, max_delay=None):
+        if max_batch is not None:
+            self.max_batch = max_batch
+        if max_delay is not None:
+            self.max_delay = max_delay
+
+    @property
+    def enabled(self):
+        return self.max_batch > 1
+
+    async def submit(self, raw, symbol, expiry_Date, lot_size, now, with_sr=True, previous=None):
+        """एक चेन Batch में डालें; उसका SnapshotResult (या None) लौटाता है"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((raw, symbol, expiry_Date, lot_size, now, with_sr, previous), future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        self.batches += 1
+        self.items += len(pending)
+        try:
+            result = await compute_pool.run(compute_batch_snapshots, [item for item, _ in pending])
+        except Exception as e:
+            logger.error(f"❌ Batch Compute Error ({len(pending)} chains): {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for k, (_, future) in enumerate(pending):
+            if future.done():  # Caller Cancel हो चुका
+                continue
+            try:
+                future.set_result(result.snapshot(k))
+            except Exception as e:
+                future.set_exception(e)
+
+    def snapshot(self):
+        """Window Stats: कितने Batches, औसत साइज़ (और Counters Reset)"""
+        batches, items = self.batches, self.items
+        self.batches = self.items = 0
+        avg = items / batches if batches else 0.0
+        return f"batches={batches} chains={items} avg_batch={avg:.1f}"
+
+
+# पूरी प्रोसेस के लिए एक Batcher (run_sync_async --batch-size / --batch-delay-ms से बदलता है)
+chain_batcher = ChainBatcher()
@@ -0,0 +1,145 @@
+# bench_blob.py
+# 🔹 Chain History Storage: OptionChain रो बनाम Compressed Columnar Blob
+#    Synthetic Chains (bench_sr वाली) को दोनों तरह एक In-Memory SQLite में लिखकर
+#    असली Page Size मापता है, Round-Trip जांचता है (Fixed-Point Columns NOISE तक, Float Columns बिल्कुल),
+#    और Encode / Decode का per-chain समय दिखाता है।
+#    Synthetic Chains के OI/LTP Random Noise हैं (Strike दर Strike कोई Pattern नहीं) — Compression का
+#    निचला अंदाज़ा; `--recorded` उसी DB की असली OptionChain रो (Snapshot दर Snapshot) पर वही माप करता है।
+#
+#    Usage:
+#      python manage.py bench_blob
+#      python manage.py bench_blob --chains 200 --strikes 40 120 --snapshots 20
+#      python manage.py bench_blob --recorded
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from mystock.chain_blob import BLOB_COLUMNS, NOISE, decode_chain, encode_frame
+from mystock.models import OptionChain
+from .bench_sr import bench_frames, bench_raws
+from .loop_lag import percentile
+
+
+def sqlite_bytes(create_sql, insert_sql, rows):
+    """In-Memory SQLite में रो लिखकर कुल Pages × Page Size (Indexes समेत)"""
+    db = sqlite3.connect(":memory:")
+    try:
+        for statement in create_sql:
+            db.execute(statement)
+        db.executemany(insert_sql, rows)
+        db.commit()
+        return db.execute("PRAGMA page_count").fetchone()[0] * db.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        db.close()
+
+
+def row_store_schema():
+    """OptionChain जैसी टेबल (वही Columns और वही db_index Indexes)"""
+    fields = [f for f in OptionChain._meta.concrete_fields if not f.primary_key]
+    text_types = ("CharField", "DateField", "DateTimeField")
+    columns = ", ".join(
+        f'"{f.column}" {"TEXT" if f.get_internal_type() in text_types else "REAL"}' for f in fields
+    )
+    names = ", ".join(f'"{f.column}"' for f in fields)
+    create = [f"CREATE TABLE chain (id INTEGER PRIMARY KEY, {columns})"]
+    create += [f'CREATE INDEX chain_{f.column} ON chain ("{f.column}")' for f in fields if f.db_index or f.is_relation]
+    insert = f"INSERT INTO chain ({names}) VALUES ({', '.join('?' for _ in fields)})"
+    return fields, create, insert
+
+
+BLOB_SCHEMA = [
+    "CREATE TABLE snap (id INTEGER PRIMARY KEY, symbol TEXT, expiry_date TEXT, spot_price REAL, "
+    "fetched_at TEXT, resolution INTEGER, blob BLOB)",
+    "CREATE INDEX snap_symbol ON snap (symbol, fetched_at DESC)",
+    "CREATE INDEX snap_fetched ON snap (fetched_at)",
+]
+BLOB_INSERT = "INSERT INTO snap (symbol, expiry_date, spot_price, fetched_at, resolution, blob) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def synthetic_chains(chains, strikes, snapshots):
+    """bench_sr की Synthetic Chains -> (सिंबल, DataFrame, समय)"""
+    for seed in range(snapshots):
+        fetched = f"2026-01-20 10:{seed:02d}:00"
+        for sym, df in bench_frames(bench_raws(chains, strikes, seed=seed)):
+            yield sym, df, fetched
+
+
+def recorded_chains():
+    """DB की OptionChain रो -> (सिंबल, DataFrame, समय) — हर Snapshot एक Chain"""
+    names = ["Time", "snapshot_id", "Symbol", "Strike_Price", "Spot_Price"] + list(BLOB_COLUMNS)
+    df = pd.DataFrame.from_records(OptionChain.objects.order_by("id").values_list(*names), columns=names)
+    if df.empty:
+        raise CommandError("❌ DB में कोई OptionChain रो नहीं")
+    # पुरानी रो में snapshot नहीं: Symbol बदलने या Strike के दोबारा शुरू होने पर नई Chain
+    snapshot_ids = df["snapshot_id"].fillna(-1)
+    starts = (
+        (df["Symbol"] != df["Symbol"].shift())
+        | (snapshot_ids != snapshot_ids.shift())
+        | (df["Strike_Price"].diff() <= 0)
+    )
+    for _, chain in df.groupby(starts.cumsum()):
+        chain = chain.reset_index(drop=True)
+        yield chain["Symbol"].iloc[0], chain, str(chain["Time"].iloc[0])
+
+
+def check_round_trip(sym, df, blob):
+    chain = decode_chain(blob)
+    if not np.array_equal(chain.strikes, df["Strike_Price"].to_numpy(dtype=float)):
+        raise CommandError(f"❌ {sym}: Strikes अलग हैं")
+    for name in BLOB_COLUMNS:
+        if name not in df.columns:
+            continue
+        # Fixed-Point Columns NOISE (Float Arithmetic की गड़बड़ी) तक, Float Fallback (float64) बिल्कुल वही
+        if not np.allclose(chain[name], df[name].to_numpy(dtype=float), rtol=NOISE, atol=0, equal_nan=True):
+            raise CommandError(f"❌ {sym}: Column {name} अलग है")
+
+
+class Command(BaseCommand):
+    help = "Chain History: OptionChain रो बनाम Compressed Blob (SQLite Size, Round-Trip, Encode/Decode समय)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chains", type=int, default=200, help="हर साइज़ पर कितनी Chains (सिंबल्स)")
+        parser.add_argument("--strikes", type=int, nargs="+", default=[40, 120], help="हर Chain में Strikes")
+        parser.add_argument("--snapshots", type=int, default=10, help="हर सिंबल के कितने Snapshots (Seeds)")
+        parser.add_argument("--recorded", action="store_true", help="Synthetic की जगह DB की असली OptionChain रो पर मापें")
+
+    def handle(self, *args, **options):
+        if options["recorded"]:
+            self.measure("recorded", recorded_chains())
+        else:
+            for strikes in options["strikes"]:
+                self.measure(
+                    f"{strikes:>4} strikes", synthetic_chains(options["chains"], strikes, options["snapshots"])
+                )
+        self.stdout.write(self.style.SUCCESS("✅ हर Blob Decode होकर वही चेन लौटाता है"))
+
+    def measure(self, label, chains):
+        fields, create, insert = row_store_schema()
+        row_values, blob_values, encode_ms, decode_ms = [], [], [], []
+        for sym, df, fetched in chains:
+            started = time.perf_counter()
+            blob = encode_frame(df)
+            encode_ms.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            decode_chain(blob)
+            decode_ms.append((time.perf_counter() - started) * 1000)
+            check_round_trip(sym, df, blob)
+
+            spot = float(df["Spot_Price"].iloc[0])
+            blob_values.append((sym, "2026-01-29", spot, fetched, 0, blob))
+            for record in df.to_dict("records"):
+                record.update(Time=fetched, Expiry_Date="2026-01-29", snapshot=1, Symbol=sym)
+                row_values.append(tuple(record.get(f.name) for f in fields))
+
+        rows_size = sqlite_bytes(create, insert, row_values)
+        blobs_size = sqlite_bytes(BLOB_SCHEMA, BLOB_INSERT, blob_values)
+        self.stdout.write(
+            f"📦 {label} × {len(blob_values)} snapshots | "
+            f"rows {len(row_values)} → {rows_size / 1e6:.2f} MB | "
+            f"blobs {len(blob_values)} → {blobs_size / 1e6:.2f} MB | "
+            f"×{rows_size / blobs_size if blobs_size else 0:.1f} smaller | "
+            f"encode p50 {percentile(encode_ms, 50):.3f} ms | decode p50 {percentile(decode_ms, 50):.3f} ms"
+        )
@@ -0,0 +1,113 @@
+# bench_sr.py
+# 🔹 Support/Resistance Engine का Micro-Benchmark
+#    Synthetic Chains (mock_upstox) पर पुराना pandas Reference और नया NumPy Engine
+#    दोनों चलाकर पहले नतीजे मिलाता है, फिर per-chain समय (p50/p99) दिखाता है।
+#    साथ ही पूरा Sweep: हर चेन अलग (compute_snapshot) बनाम एक Batch (compute_batch_snapshots)।
+#
+#    Usage:
+#      python manage.py bench_sr
+#      python manage.py bench_sr --chains 500 --strikes 40 120 300
+import json
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from .batch_compute import compute_batch_snapshots
+from .chain_compute import compute_snapshot, compute_support_resistance, compute_support_resistance_pandas
+from .chain_parser import parse_chain, compute_chain_frame
+from .loop_lag import percentile
+from .mock_upstox import bench_instrument_key, bench_symbols, synthetic_chain
+
+
+BENCH_EXPIRY = "2026-01-29"
+BENCH_LOT = 50
+
+
+def bench_raws(count, strikes, seed=7):
+    """count सिंबल्स की Raw Chain Bodies (bytes), जैसे API से आती हैं"""
+    rng = random.Random(seed)
+    return [
+        (sym, json.dumps(synthetic_chain(bench_instrument_key(sym), strikes, rng.random(), rng)).encode())
+        for sym in bench_symbols(count)
+    ]
+
+
+def bench_frames(raws):
+    """Raw Bodies -> कैलकुलेटेड Chain DataFrames (वही Pipeline जो Live Engine चलाता है)"""
+    return [(sym, compute_chain_frame(parse_chain(raw, now=None), sym, BENCH_EXPIRY, BENCH_LOT)) for sym, raw in raws]
+
+
+def check_batch(raws, singles, batch):
+    """Batch के हर Slice की DataFrame और SR Fields, अलग-अलग कैलकुलेशन जैसे ही हों"""
+    for k, (sym, _) in enumerate(raws):
+        one, many = singles[k], batch.snapshot(k)
+        if one.sr != many.sr:
+            raise CommandError(f"❌ {sym}: Batch SR अलग है")
+        for col in one.df.columns:
+            if not np.array_equal(one.df[col].to_numpy(), many.df[col].to_numpy()):
+                raise CommandError(f"❌ {sym}: Batch Column {col} अलग है")
+
+
+def time_engine(fn, frames, rounds):
+    """हर Chain का per-call समय (ms) — rounds बार दोहराकर"""
+    samples = []
+    for _ in range(rounds):
+        for sym, df in frames:
+            started = time.perf_counter()
+            fn(df, sym)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+class Command(BaseCommand):
+    help = "Support/Resistance और Sweep Compute: pandas Reference बनाम NumPy / Batch Engine (Equality + Timing)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chains", type=int, default=200, help="हर साइज़ पर कितनी Chains")
+        parser.add_argument("--strikes", type=int, nargs="+", default=[40, 120, 300], help="हर Chain में Strikes")
+        parser.add_argument("--rounds", type=int, default=3, help="Timing के लिए कितनी बार दोहराएं")
+
+    def handle(self, *args, **options):
+        for strikes in options["strikes"]:
+            raws = bench_raws(options["chains"], strikes)
+            frames = bench_frames(raws)
+
+            # पहले पक्का करें कि दोनों एक जैसे Fields लौटाते हैं
+            for sym, df in frames:
+                expected = compute_support_resistance_pandas(df, sym)
+                actual = compute_support_resistance(df, sym)
+                if expected != actual:
+                    diff = {k: (expected[k], actual.get(k)) for k in expected if expected[k] != actual.get(k)}
+                    raise CommandError(f"❌ {sym} ({strikes} strikes): नतीजे अलग हैं {diff}")
+
+            old = time_engine(compute_support_resistance_pandas, frames, options["rounds"])
+            new = time_engine(compute_support_resistance, frames, options["rounds"])
+            old_p50, new_p50 = percentile(old, 50), percentile(new, 50)
+            self.stdout.write(
+                f"📊 {strikes:>4} strikes × {len(frames)} chains | "
+                f"pandas p50 {old_p50:.3f} ms p99 {percentile(old, 99):.3f} ms | "
+                f"numpy p50 {new_p50:.3f} ms p99 {percentile(new, 99):.3f} ms | "
+                f"speedup ×{old_p50 / new_p50 if new_p50 else 0:.1f}"
+            )
+
+            # पूरा Sweep: हर चेन का अलग Snapshot बनाम एक Batch
+            items = [(raw, sym, BENCH_EXPIRY, BENCH_LOT, None, True, None) for sym, raw in raws]
+            singles = [compute_snapshot(*item) for item in items]
+            check_batch(raws, singles, compute_batch_snapshots(items))
+            per_chain, batched = [], []
+            for _ in range(options["rounds"]):
+                started = time.perf_counter()
+                for item in items:
+                    compute_snapshot(*item)
+                per_chain.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                compute_batch_snapshots(items)
+                batched.append((time.perf_counter() - started) * 1000)
+            single_ms, batch_ms = min(per_chain), min(batched)
+            self.stdout.write(
+                f"🧮 {strikes:>4} strikes sweep of {len(items)} | per-chain {single_ms:.1f} ms | "
+                f"batch {batch_ms:.1f} ms | speedup ×{single_ms / batch_ms if batch_ms else 0:.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("✅ सारे Engines के नतीजे हर Chain पर एक जैसे"))
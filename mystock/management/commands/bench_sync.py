@@ -0,0 +1,252 @@
+# bench_sync.py
+# 🔹 Ingestion Engine का End-to-End Benchmark
+#    Local Mock Upstox (mock_upstox) के खिलाफ run_sync_async का असली others_sr_loop
+#    (Tier Scheduler + run_scheduled_pool + Rate Governor + हर Window के बाद GC / Compaction Calls)
+#    200 / 1,000 / 5,000 सिंबल्स पर तय Wall-Clock Window तक चलाकर रिपोर्ट करता है:
+#    refreshes/sec, p50/p99 per-symbol latency, DB write time, Windows और event-loop lag।
+#
+#    Usage:
+#      python manage.py bench_sync
+#      python manage.py bench_sync --sizes 200 1000 --duration 120 --strikes 120 --throttle-rate 0.02
+#      python manage.py bench_sync --time-scale 0.1   (Tier Intervals / Window 10 गुना छोटे)
+#      DATABASE_URL=postgres://... python manage.py bench_sync   (वही Benchmark PostgreSQL पर)
+#      DATABASE_URL=postgres://... python manage.py bench_sync --no-copy   (COPY की जगह bulk_create)
+import asyncio
+import time
+from collections import defaultdict
+
+import aiohttp
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from mystock import bulk_insert
+from mystock.upstox_contract import expiry_cache, get_storage_key
+
+from . import async_live
+from .batch_compute import chain_batcher
+from .chain_compute import compute_pool
+from .db_writer import DBWriter
+from .loop_lag import LoopLagMonitor, percentile
+from .mock_upstox import (
+    BENCH_PREFIX,
+    MockUpstoxServer,
+    bench_expiries,
+    bench_instrument_key,
+    bench_symbols,
+)
+from .rate_governor import RateGovernor
+
+
+def bench_instrument_df(symbols, lot_size):
+    """Synthetic Master Contract: हर सिंबल की एक NSE_EQ और एक OPTSTK रो"""
+    rows = []
+    for sym in symbols:
+        rows.append({
+            "tradingsymbol": sym, "exchange": "NSE_EQ", "instrument_key": bench_instrument_key(sym),
+            "instrument_type": "EQUITY", "lot_size": 1, "name": sym,
+        })
+        rows.append({
+            "tradingsymbol": f"{sym}FUT", "exchange": "NSE_FO", "instrument_key": f"NSE_FO|{sym}FUT",
+            "instrument_type": "FUTSTK", "lot_size": lot_size, "name": sym,
+        })
+    return pd.DataFrame(rows)
+
+
+class BenchWriter(DBWriter):
+    """
+    DBWriter जिसके Window Counters (others_sr_loop हर Window पर snapshot() से Reset करता है)
+    पूरे रन में भी जुड़ते रहें, और Writer Calls (collect_garbage / compact) गिने जाएं।
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.run_write_time = 0.0
+        self.run_flushes = 0
+        self.calls = defaultdict(int)
+        super().__init__(*args, **kwargs)
+
+    def _reset_counters(self):
+        self.run_write_time += getattr(self, "write_time", 0.0)
+        self.run_flushes += getattr(self, "flushes", 0)
+        super()._reset_counters()
+
+    async def add_call(self, fn, *args, on_done=None):
+        self.calls[getattr(fn, "__name__", str(fn))] += 1
+        await super().add_call(fn, *args, on_done=on_done)
+
+    def totals(self):
+        return self.run_write_time + self.write_time, self.run_flushes + self.flushes
+
+
+@sync_to_async
+def cleanup_bench_rows():
+    from mystock.models import (
+        ChainSnapshot, SupportResistance, SupportResistanceLatest, TempChainPointer, TempOptionChain,
+    )
+    SupportResistance.objects.filter(Symbol__startswith=BENCH_PREFIX).delete()
+    SupportResistanceLatest.objects.filter(Symbol__startswith=BENCH_PREFIX).delete()
+    TempOptionChain.objects.filter(Symbol__startswith=BENCH_PREFIX).delete()
+    TempChainPointer.objects.filter(symbol__startswith=BENCH_PREFIX).delete()
+    ChainSnapshot.objects.filter(symbol__startswith=BENCH_PREFIX).delete()
+
+
+class Command(BaseCommand):
+    help = "Mock Upstox सर्वर के खिलाफ Sync Engine का Benchmark (symbols/sec, latency, DB time, loop lag)"
+
+    LOT_SIZE = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 5000],
+                            help="कितने सिंबल्स पर Benchmark चलाना है")
+        parser.add_argument("--strikes", type=int, default=80, help="हर चेन में स्ट्राइक्स")
+        parser.add_argument("--latency-ms", type=float, default=80.0, help="Mock Latency का median (ms)")
+        parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal sigma")
+        parser.add_argument("--throttle-rate", type=float, default=0.0, help="429 लौटाने का हिस्सा (0-1)")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="503 लौटाने का हिस्सा (0-1)")
+        parser.add_argument("--duration", type=float, default=60.0,
+                            help="हर साइज़ पर others_sr_loop कितने सेकंड (Wall-Clock) चले")
+        parser.add_argument("--time-scale", type=float, default=1.0,
+                            help="Tier Intervals और Scheduler Window का गुणक (1 = Production जैसे)")
+        parser.add_argument("--workers", type=int, default=None, help="Worker Pool का आकार")
+        parser.add_argument("--rate", type=float, default=None,
+                            help="Governor की max req/s (default: Upstox limit; 0 = Governor बंद)")
+        parser.add_argument("--compute-workers", type=int, default=None,
+                            help="Compute Pool Workers (default: CPU cores, 0 = Event Loop पर ही)")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="एक Compute Batch में अधिकतम चेन (default: 64, 0/1 = हर चेन अलग)")
+        parser.add_argument("--keep-rows", action="store_true", help="BENCH डेटा DB से न हटाएं")
+        parser.add_argument("--no-copy", action="store_true",
+                            help="PostgreSQL पर भी COPY की जगह bulk_create (तुलना के लिए)")
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"]
+        server = MockUpstoxServer(
+            strikes=options["strikes"],
+            latency_ms=options["latency_ms"],
+            latency_sigma=options["latency_sigma"],
+            throttle_rate=options["throttle_rate"],
+            error_rate=options["error_rate"],
+            lot_size=self.LOT_SIZE,
+        ).start()
+        self.stdout.write(f"🧪 Mock Upstox on {server.base_url} | strikes={options['strikes']} "
+                          f"latency~{options['latency_ms']}ms σ={options['latency_sigma']} "
+                          f"429={options['throttle_rate']} 5xx={options['error_rate']}")
+
+        # Engine को Mock की तरफ मोड़ें और Synthetic Master Contract दें
+        saved = (async_live.UPSTOX_API_BASE, async_live.instrument_df, async_live.instrument_index, async_live.governor)
+        async_live.UPSTOX_API_BASE = server.base_url
+        async_live.instrument_df = bench_instrument_df(bench_symbols(max(sizes)), self.LOT_SIZE)
+        compute_pool.configure(options["compute_workers"])
+        compute_pool.warm_up()
+        chain_batcher.configure(options["batch_size"])
+        self.stdout.write(f"🧮 Compute Pool: {compute_pool.workers} worker process(es) | "
+                          f"Batch: {chain_batcher.max_batch if chain_batcher.enabled else 'off'}")
+        if options["no_copy"]:
+            bulk_insert.copy_enabled = False
+        self.stdout.write(f"🗄️ DB: {connection.vendor} | bulk insert: "
+                          f"{'COPY' if bulk_insert.copy_supported() else 'bulk_create'}")
+        try:
+            results = asyncio.run(self.run_all(sizes, options))
+        finally:
+            (async_live.UPSTOX_API_BASE, async_live.instrument_df,
+             async_live.instrument_index, async_live.governor) = saved
+            compute_pool.shutdown()
+            server.stop()
+
+        self.stdout.write("")
+        self.stdout.write(f"{'symbols':>8} {'refresh':>8} {'ref/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'ok':>6} "
+                          f"{'db s':>7} {'db ms/ref':>9} {'windows':>7} {'lag p50':>8} {'lag p99':>8} {'lag max':>8}")
+        for r in results:
+            self.stdout.write(
+                f"{r['symbols']:>8} {r['refreshes']:>8} {r['refreshes_per_sec']:>7} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+                f"{r['ok']:>6} {r['db_s']:>7} {r['db_ms_per_refresh']:>9} {r['windows']:>7} "
+                f"{r['lag']['p50_ms']:>8} {r['lag']['p99_ms']:>8} {r['lag']['max_ms']:>8}"
+            )
+
+    async def run_all(self, sizes, options):
+        from .run_sync_async import Command as SyncCommand
+
+        expiries = bench_expiries()
+        results = []
+        async with aiohttp.ClientSession() as session:
+            for size in sizes:
+                # हर रन नए Governor से, ताकि पिछले रन का AIMD rate असर न डाले
+                bench_governor = RateGovernor()
+                if options["rate"] is not None:
+                    bench_governor.enabled = options["rate"] > 0
+                    if options["rate"] > 0:
+                        bench_governor.limits = {k: options["rate"] for k in bench_governor.limits}
+                async_live.governor = bench_governor
+
+                symbols = bench_symbols(size)
+                # Expiry Calendar Memory में, ताकि हर Tier अपनी K Expiries फेच करे (Production जैसे)
+                for sym in symbols:
+                    expiry_cache.put(get_storage_key(sym), expiries)
+
+                engine = SyncCommand()
+                engine.options = {}
+                engine.time_scale = options["time_scale"]
+                engine.writer = BenchWriter()
+                engine.is_trading_hours = lambda: True
+                if options["workers"]:
+                    engine.WORKER_COUNT = options["workers"]
+
+                # असली process_symbol, बस हर कॉल का समय और नतीजा दर्ज
+                latencies, outcomes, schedulers = [], [], []
+                process_symbol = engine.process_symbol
+
+                async def timed_process_symbol(session, sym, expiry, scheduler=None, extra_expiries=()):
+                    if scheduler is not None and not schedulers:
+                        schedulers.append(scheduler)
+                    started = time.perf_counter()
+                    ok = await process_symbol(session, sym, expiry, scheduler, extra_expiries)
+                    latencies.append(time.perf_counter() - started)
+                    outcomes.append(bool(ok))
+                    return ok
+
+                engine.process_symbol = timed_process_symbol
+
+                monitor = LoopLagMonitor().start()
+                # Engine का अपना Monitor हर Window पर drain होता है; पूरे रन की नाप `monitor` से
+                engine.loop_lag = LoopLagMonitor().start()
+                started = time.perf_counter()
+                loop_task = asyncio.ensure_future(engine.others_sr_loop(session, symbols, expiries[0]))
+                await asyncio.sleep(options["duration"])
+                loop_task.cancel()
+                await asyncio.gather(loop_task, return_exceptions=True)
+                # Queue में बचे Writes (GC / Compaction Calls समेत) भी रन का हिस्सा हैं
+                await engine.writer.close()
+                elapsed = time.perf_counter() - started
+                db_s, commits = engine.writer.totals()
+                lag = await monitor.stop()
+                await engine.loop_lag.stop()
+
+                refreshes = len(latencies)
+                tiers = schedulers[0].tier_counts() if schedulers else {}
+                result = {
+                    "symbols": size,
+                    "refreshes": refreshes,
+                    "ok": sum(outcomes),
+                    "elapsed_s": round(elapsed, 2),
+                    "refreshes_per_sec": round(refreshes / elapsed, 1) if elapsed else 0.0,
+                    "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                    "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                    "db_s": round(db_s, 2),
+                    "db_ms_per_refresh": round(db_s * 1000 / max(1, refreshes), 1),
+                    "windows": engine.writer.calls["compact"],
+                    "lag": lag,
+                    "governor": bench_governor.snapshot(),
+                }
+                results.append(result)
+                self.stdout.write(
+                    f"✅ {size} symbols for {result['elapsed_s']}s | {refreshes} refreshes ({result['ok']} ok) | "
+                    f"tiers {tiers} | loop lag {lag} | 🚦 {result['governor']} | 🧮 {chain_batcher.snapshot()} | "
+                    f"💾 commits={commits} write={db_s:.2f}s calls={dict(engine.writer.calls)}"
+                )
+
+                for sym in symbols:
+                    expiry_cache.invalidate(get_storage_key(sym))
+                if not options["keep_rows"]:
+                    await cleanup_bench_rows()
+        return results
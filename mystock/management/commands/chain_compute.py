@@ -0,0 +1,401 @@
+# chain_compute.py
+# 🔹 CPU-Bound Compute Stage (Parse + Calculations + Support/Resistance)
+#    यहाँ का सारा कोड "Pure" है — Django/ORM नहीं, सिर्फ NumPy/pandas —
+#    ताकि इसे ProcessPoolExecutor में चलाया जा सके और Event Loop खाली रहे।
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .chain_diff import chain_fingerprint
+from .chain_parser import parse_chain, compute_chain_frame
+
+
+def build_pe_ce_logic(df):
+    """डेटा से रेजिस्टेंस और सपोर्ट लेवल्स निकालना (Updated for Shifted Reversal Values)"""
+    result = {
+        "Time": df["Time"].iloc[0],
+        "Symbol": df["Symbol"].iloc[0],
+        "Spot Price": float(df["Spot_Price"].iloc[0]),
+        "expiry": df["expiry"].iloc[0]  # Expiry को भी रिजल्ट में शामिल करें
+    }
+
+    for side in ["PE", "CE"]:
+        col = f"{side}_OI_percent"
+        # सबसे ज्यादा OI वाले 2 स्ट्राइक प्राइस निकालना (बराबरी पर पहली रो — nlargest जैसा, Stable Sort)
+        sorted_df = df.sort_values(col, ascending=False, kind="stable").reset_index(drop=True)
+        
+        if len(sorted_df) >= 2:
+            s1, s2 = sorted_df.iloc[0], sorted_df.iloc[1]
+            side_lower = side.lower() # 'pe' या 'ce'
+            
+            # WTB/WTT/Strong Logic
+            result[f"s_t_b_{side_lower}"] = (
+                "Strong" if s2[col] < 75 else
+                "WTB" if s2["Strike_Price"] < s1["Strike_Price"] else
+                "WTT"
+            )
+            
+            # --- NEW LOGIC START: Reversal Value Shift ---
+            reversl_col = f"Reversl_{side.capitalize()}" # Reversl_Ce or Reversl_Pe
+            
+            if side == "CE":
+                # CE के लिए: इससे बड़ी (Next Higher) स्ट्राइक ढूंढें
+                # s1 के लिए
+                next_strike_s1 = df[df["Strike_Price"] > s1["Strike_Price"]].sort_values("Strike_Price")
+                rev_val_s1 = next_strike_s1.iloc[0][reversl_col] if not next_strike_s1.empty else 0
+                
+                # s2 के लिए
+                next_strike_s2 = df[df["Strike_Price"] > s2["Strike_Price"]].sort_values("Strike_Price")
+                rev_val_s2 = next_strike_s2.iloc[0][reversl_col] if not next_strike_s2.empty else 0
+
+            else: # PE Case
+                # PE के लिए: इससे छोटी (Next Lower) स्ट्राइक ढूंढें
+                # s1 के लिए
+                prev_strike_s1 = df[df["Strike_Price"] < s1["Strike_Price"]].sort_values("Strike_Price", ascending=False)
+                rev_val_s1 = prev_strike_s1.iloc[0][reversl_col] if not prev_strike_s1.empty else 0
+                
+                # s2 के लिए
+                prev_strike_s2 = df[df["Strike_Price"] < s2["Strike_Price"]].sort_values("Strike_Price", ascending=False)
+                rev_val_s2 = prev_strike_s2.iloc[0][reversl_col] if not prev_strike_s2.empty else 0
+            
+            # --- NEW LOGIC END ---
+
+            # डेटा को रिजल्ट में सेव करना
+            
+            # 1. Strike 1 Data (Highest OI)
+            result[f"Strike Price_{side}1"] = s1["Strike_Price"]
+            result[f"Reversl {side}"] = rev_val_s1  # यहाँ अब अगली/पिछली स्ट्राइक की वैल्यू आएगी
+            
+            # 2. Strike 2 Data (2nd Highest OI)
+            result[f"Strike Price_{side}2"] = s2["Strike_Price"]
+            result[f"Reversl {side}2"] = rev_val_s2 # s2 की शिफ्टेड रिवर्सल वैल्यू
+            
+            result[f"week_{side} %"] = s2[col]
+            
+    return result
+
+
+def compute_support_resistance_pandas(df, symbol):
+    """
+    पुराना pandas वाला Reference (हर Side पर sort_values/Filter/nlargest)।
+    अब सिर्फ bench_sr में compute_support_resistance के नतीजे मिलाने के लिए।
+    """
+    top_row = build_pe_ce_logic(df)
+    spot = float(top_row["Spot Price"])
+    
+    # --- 1. Risk Logic & WTT/WTB ---
+    bearish_val = int((df[(df["Strike_Price"] < spot)].tail(10)["CE_LTP"] == 0).sum())
+    bullish_val = int((df[(df["Strike_Price"] > spot)].head(10)["PE_LTP"] == 0).sum())
+    top_row["Bearish_Risk"] = bearish_val
+    top_row["Bullish_Risk"] = bullish_val
+    
+    if top_row.get("s_t_b_ce") == "WTT": top_row["Bullish_Risk"] += 1
+    if top_row.get("s_t_b_pe") == "WTB": top_row["Bearish_Risk"] += 1
+
+    # --- 2. Stop Loss Calculation ---
+    pe_top = df.nlargest(2, "PE_OI")
+    ce_top = df.nlargest(2, "CE_OI")
+
+    def calculate_stop_loss(full_df, strike, side):
+        if side == "CE":
+            filtered = full_df[full_df["Strike_Price"] > strike].sort_values("Strike_Price")
+            col_name = "Reversl_Ce"
+        else:
+            filtered = full_df[full_df["Strike_Price"] < strike].sort_values("Strike_Price", ascending=False)
+            col_name = "Reversl_Pe"
+        return float(filtered.iloc[0][col_name]) if not filtered.empty else 0.0
+
+    # Extract Strikes & Reversals
+    pe1_strike = float(pe_top.iloc[0]["Strike_Price"])
+    pe2_strike = float(pe_top.iloc[1]["Strike_Price"])
+    rev_pe1 = float(pe_top.iloc[0]["Reversl_Pe"])
+    rev_pe2 = float(pe_top.iloc[1]["Reversl_Pe"])
+
+    ce1_strike = float(ce_top.iloc[0]["Strike_Price"])
+    ce2_strike = float(ce_top.iloc[1]["Strike_Price"])
+    rev_ce1 = float(ce_top.iloc[0]["Reversl_Ce"])
+    rev_ce2 = float(ce_top.iloc[1]["Reversl_Ce"])
+
+    # Calculate SL
+    sl_pe1 = calculate_stop_loss(df, pe1_strike, "PE")
+    sl_pe2 = calculate_stop_loss(df, pe2_strike, "PE")
+    sl_ce1 = calculate_stop_loss(df, ce1_strike, "CE")
+    sl_ce2 = calculate_stop_loss(df, ce2_strike, "CE")
+
+    # --- 3. NEW: Calculate Distance for ALL 4 Levels ---
+    def get_dist_percentage(spot_price, level_price):
+        if spot_price > 0 and level_price > 0:
+            return round((abs(level_price - spot_price) / spot_price) * 100, 2)
+        return 0.0
+
+    d_ce1 = get_dist_percentage(spot, rev_ce1)
+    d_ce2 = get_dist_percentage(spot, rev_ce2)
+    d_pe1 = get_dist_percentage(spot, rev_pe1)
+    d_pe2 = get_dist_percentage(spot, rev_pe2)
+    # ---------------------------------------------------
+    expiry_val = top_row.get("expiry")
+    
+    # अगर expiry 0 है, None है या खाली स्ट्रिंग है, तो उसे None कर दें
+    if not expiry_val or expiry_val == 0:
+        expiry_val = None
+        print(f"⚠️ Expiry value for {symbol} is invalid ({expiry_val}). Setting to None.")
+    else:
+        try:
+            # पक्का करें कि यह स्ट्रिंग फॉर्मेट (YYYY-MM-DD) में हो
+            expiry_val = str(expiry_val)
+        except:
+            expiry_val = None
+
+    # --- 4. Model Fields (Time सेव करते समय लगता है) ---
+    return dict(
+        Symbol=symbol,
+        Spot_Price=spot,
+        Expiry_Date=expiry_val,
+        
+        # --- New 4 Distance Fields ---
+        dist_ce_1=d_ce1,
+        dist_ce_2=d_ce2,
+        dist_pe_1=d_pe1,
+        dist_pe_2=d_pe2,
+
+        # PE Data इसे हटाना है
+        Strike_Price_Pe1=pe1_strike,
+        Reversl_Pe=rev_pe1,
+        Stop_Loss_Pe1=sl_pe1,
+        week_Pe_1=float(pe_top.iloc[0]["PE_OI_percent"]),
+        
+        
+        Strike_Price_Pe2=pe2_strike,
+        Reversl_Pe_2=rev_pe2,
+        Stop_Loss_Pe2=sl_pe2,
+        week_Pe_2=float(pe_top.iloc[1]["PE_OI_percent"]),
+        
+        s_t_b_pe=top_row.get("s_t_b_pe", ""),
+        
+        # CE Data इसे हटाना है
+        Strike_Price_Ce1=ce1_strike,
+        Reversl_Ce=rev_ce1,
+        Stop_Loss_Ce1=sl_ce1,
+        week_Ce_1=float(ce_top.iloc[0]["CE_OI_percent"]),
+        
+        Strike_Price_Ce2=ce2_strike,
+        Reversl_Ce_2=rev_ce2,
+        Stop_Loss_Ce2=sl_ce2,
+        week_Ce_2=float(ce_top.iloc[1]["CE_OI_percent"]),
+        
+        s_t_b_ce=top_row.get("s_t_b_ce", ""),
+        
+        # Risks
+        Bearish_Risk=top_row["Bearish_Risk"],
+        Bullish_Risk=top_row["Bullish_Risk"]
+    )
+
+
+def _top2(values):
+    """
+    सबसे बड़ी 2 वैल्यूज़ के Index (NaN छोड़कर, बराबरी पर पहली रो — nlargest(keep='first') जैसा)।
+    2 वैलिड वैल्यूज़ न हों तो IndexError (पुराने .iloc[1] जैसा)।
+    """
+    v = np.where(np.isnan(values), -np.inf, values)
+    if np.count_nonzero(~np.isnan(values)) < 2:
+        raise IndexError("single positional indexer is out-of-bounds")
+    # O(n) Selection: argpartition से टॉप-2 वैल्यूज़, फिर बराबरी में सबसे पहली रो
+    top_vals = np.sort(v[np.argpartition(v, len(v) - 2)[-2:]])[::-1]
+    first = int(np.flatnonzero(v == top_vals[0])[0])
+    rest = np.flatnonzero(v == top_vals[1])
+    second = int(rest[rest != first][0])
+    return first, second
+
+
+def compute_support_resistance(df, symbol):
+    """
+    save_top2_support_resistance का Compute हिस्सा (बिना DB के):
+    SupportResistance Model के Fields का dict लौटाता है।
+    Strikes एक बार Sort होती हैं; Top-2 OI argpartition से और अगली/पिछली स्ट्राइक
+    searchsorted से — सब NumPy Arrays पर एक ही Pass में (नतीजे pandas Reference जैसे ही)।
+    """
+    strike = df["Strike_Price"].to_numpy(dtype=float)
+    order = np.argsort(strike, kind="stable")
+    sorted_strike = strike[order]
+    rev_ce = df["Reversl_Ce"].to_numpy(dtype=float)
+    rev_pe = df["Reversl_Pe"].to_numpy(dtype=float)
+
+    def next_higher(value, arr):
+        i = np.searchsorted(sorted_strike, value, side="right")
+        return float(arr[order[i]]) if i < len(order) else 0.0
+
+    def next_lower(value, arr):
+        i = np.searchsorted(sorted_strike, value, side="left") - 1
+        return float(arr[order[i]]) if i >= 0 else 0.0
+
+    spot = float(df["Spot_Price"].iloc[0])
+
+    # --- WTB/WTT/Strong: OI % की टॉप-2 स्ट्राइक्स ---
+    stb = {}
+    for side in ("PE", "CE"):
+        pct = df[f"{side}_OI_percent"].to_numpy(dtype=float)
+        if len(pct) >= 2:
+            s1, s2 = _top2(pct)
+            stb[side] = (
+                "Strong" if pct[s2] < 75 else
+                "WTB" if strike[s2] < strike[s1] else
+                "WTT"
+            )
+
+    # --- 1. Risk Logic: Spot के नीचे की आखिरी 10 / ऊपर की पहली 10 रो (DataFrame क्रम में) ---
+    below = np.flatnonzero(strike < spot)[-10:]
+    above = np.flatnonzero(strike > spot)[:10]
+    bearish = int((df["CE_LTP"].to_numpy(dtype=float)[below] == 0).sum())
+    bullish = int((df["PE_LTP"].to_numpy(dtype=float)[above] == 0).sum())
+    if stb.get("CE") == "WTT": bullish += 1
+    if stb.get("PE") == "WTB": bearish += 1
+
+    # --- 2. Top-2 OI + Stop Loss ---
+    pe1, pe2 = _top2(df["PE_OI"].to_numpy(dtype=float))
+    ce1, ce2 = _top2(df["CE_OI"].to_numpy(dtype=float))
+    pe_pct = df["PE_OI_percent"].to_numpy(dtype=float)
+    ce_pct = df["CE_OI_percent"].to_numpy(dtype=float)
+
+    def dist(level):
+        if spot > 0 and level > 0:
+            return round((abs(level - spot) / spot) * 100, 2)
+        return 0.0
+
+    rev_pe1, rev_pe2 = float(rev_pe[pe1]), float(rev_pe[pe2])
+    rev_ce1, rev_ce2 = float(rev_ce[ce1]), float(rev_ce[ce2])
+
+    expiry_val = df["expiry"].iloc[0]
+    if not expiry_val or expiry_val == 0:
+        print(f"⚠️ Expiry value for {symbol} is invalid ({expiry_val}). Setting to None.")
+        expiry_val = None
+    else:
+        expiry_val = str(expiry_val)
+
+    return dict(
+        Symbol=symbol,
+        Spot_Price=spot,
+        Expiry_Date=expiry_val,
+
+        dist_ce_1=dist(rev_ce1),
+        dist_ce_2=dist(rev_ce2),
+        dist_pe_1=dist(rev_pe1),
+        dist_pe_2=dist(rev_pe2),
+
+        Strike_Price_Pe1=float(strike[pe1]),
+        Reversl_Pe=rev_pe1,
+        Stop_Loss_Pe1=next_lower(strike[pe1], rev_pe),
+        week_Pe_1=float(pe_pct[pe1]),
+
+        Strike_Price_Pe2=float(strike[pe2]),
+        Reversl_Pe_2=rev_pe2,
+        Stop_Loss_Pe2=next_lower(strike[pe2], rev_pe),
+        week_Pe_2=float(pe_pct[pe2]),
+
+        s_t_b_pe=stb.get("PE", ""),
+
+        Strike_Price_Ce1=float(strike[ce1]),
+        Reversl_Ce=rev_ce1,
+        Stop_Loss_Ce1=next_higher(strike[ce1], rev_ce),
+        week_Ce_1=float(ce_pct[ce1]),
+
+        Strike_Price_Ce2=float(strike[ce2]),
+        Reversl_Ce_2=rev_ce2,
+        Stop_Loss_Ce2=next_higher(strike[ce2], rev_ce),
+        week_Ce_2=float(ce_pct[ce2]),
+
+        s_t_b_ce=stb.get("CE", ""),
+
+        Bearish_Risk=bearish,
+        Bullish_Risk=bullish,
+    )
+
+
+class SnapshotResult:
+    """
+    Worker Process से लौटने वाला नतीजा: कैलकुलेटेड DataFrame + SR Fields + चेन का Fingerprint।
+    unchanged=True पर चेन पिछले Fingerprint जैसी ही थी, इसलिए df/sr नहीं बने।
+    """
+
+    __slots__ = ("df", "sr", "sr_error", "fingerprint", "unchanged")
+
+    def __init__(self, df, sr=None, sr_error=None, fingerprint=None, unchanged=False):
+        self.df = df
+        self.sr = sr
+        self.sr_error = sr_error
+        self.fingerprint = fingerprint
+        self.unchanged = unchanged
+
+
+def compute_snapshot(raw, symbol, expiry_Date, lot_size, now, with_sr=True, previous=None):
+    """
+    Raw Response Bytes -> SnapshotResult (Worker Process में चलता है)।
+    `previous` Fingerprint से मेल खाए तो Calculation छोड़कर unchanged नतीजा।
+    खाली चेन पर None; JSON खराब हो तो ValueError।
+    """
+    chain = parse_chain(raw, now)
+    if chain is None:
+        return None
+    fingerprint = chain_fingerprint(chain, lot_size)
+    if previous is not None and fingerprint == previous:
+        return SnapshotResult(None, fingerprint=fingerprint, unchanged=True)
+    df = compute_chain_frame(chain, symbol, expiry_Date, lot_size)
+
+    result = SnapshotResult(df, fingerprint=fingerprint)
+    if with_sr:
+        try:
+            result.sr = compute_support_resistance(df, symbol)
+        except Exception as e:
+            result.sr_error = str(e)
+    return result
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+class ComputePool:
+    """
+    Compute Stage का Process Pool (डिफ़ॉल्ट: CPU Cores जितने Workers)।
+    workers=0 पर सब कुछ सीधे Event Loop पर चलता है (पुराना व्यवहार, तुलना के लिए)।
+    """
+
+    def __init__(self, workers=None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor = None
+
+    def configure(self, workers=None):
+        self.shutdown()
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            # spawn: चलते Event Loop/DB Threads वाली प्रोसेस को fork करना सुरक्षित नहीं
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def warm_up(self):
+        """सारे Workers पहले से शुरू कर दें ताकि पहली चेन पर Spawn का खर्च न लगे"""
+        executor = self._get_executor()
+        if executor is not None:
+            list(executor.map(_worker_pid, range(self.workers)))
+
+    async def run(self, fn, *args):
+        executor = self._get_executor()
+        if executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# पूरी प्रोसेस के लिए एक Pool (run_sync_async --compute-workers से बदलता है)
+compute_pool = ComputePool()
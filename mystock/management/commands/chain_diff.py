@@ -0,0 +1,115 @@
+# chain_diff.py
+# 🔹 Incremental Snapshot Diffing
+#    - Worker में: पार्स हुई चेन का Fingerprint (OI / LTP / Volume / Strikes / Spot का Hash)।
+#      पिछले Fingerprint से मेल खाए तो Calculation और DB Writes दोनों छोड़ दिए जाते हैं।
+#    - Engine में: पिछली बार लिखी गई रो से तुलना करके Changed-Strike Mask,
+#      ताकि आंशिक बदलाव पर सिर्फ बदली स्ट्राइक्स ही दोबारा लिखी जाएं।
+import hashlib
+
+import numpy as np
+
+# Fingerprint इन्हीं Raw Columns से (IV/Delta/Close की हल्की हलचल से चेन "बदली" नहीं मानी जाती)
+FINGERPRINT_COLUMNS = (
+    "Strike_Price",
+    "CE_OI", "PE_OI", "CE_LTP", "PE_LTP", "CE_Volume", "PE_Volume",
+)
+
+# TempOptionChain में लिखे जाने वाले Numeric Columns (Time हर Snapshot में नया होता है, इसलिए नहीं)
+DIFF_COLUMNS = (
+    "Lot_size", "Spot_Price",
+    "CE_Delta", "CE_RANGE", "CE_IV", "CE_COI_percent", "CE_COI", "CE_OI_percent", "CE_OI",
+    "CE_Volume_percent", "CE_Volume", "CE_CLTP", "CE_LTP", "Reversl_Ce",
+    "Reversl_Pe", "PE_LTP", "PE_CLTP", "PE_Volume", "PE_Volume_percent", "PE_OI", "PE_OI_percent",
+    "PE_COI", "PE_COI_percent", "PE_IV", "PE_RANGE", "PE_Delta",
+)
+
+
+def chain_fingerprint(chain, lot_size):
+    """ChainColumns -> छोटा Hex Hash (Worker Process में, Parse के ठीक बाद)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{chain.spot!r}|{lot_size}".encode())
+    for name in FINGERPRINT_COLUMNS:
+        h.update(np.ascontiguousarray(chain.columns[name]).data)
+    return h.hexdigest()
+
+
+class _Written:
+    __slots__ = ("fingerprint", "strikes", "values")
+
+    def __init__(self, fingerprint, strikes, values):
+        self.fingerprint = fingerprint
+        self.strikes = strikes
+        self.values = values
+
+
+class SnapshotDiffer:
+    """
+    हर (सिंबल, Expiry) की आखिरी लिखी गई चेन याद रखता है (सिर्फ इस प्रोसेस की Memory में;
+    Restart के बाद पहली Sweep पूरी लिखती है)। Window Counters snapshot() पर Reset होते हैं।
+    """
+
+    def __init__(self):
+        self._written = {}
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.symbols_skipped = 0
+        self.symbols_partial = 0
+        self.symbols_full = 0
+        self.rows_skipped = 0
+        self.rows_written = 0
+
+    def previous(self, symbol, expiry):
+        """पिछला Fingerprint (Worker को भेजने के लिए), न हो तो None"""
+        written = self._written.get((symbol, str(expiry)))
+        return written.fingerprint if written is not None else None
+
+    def skip(self, symbol, expiry):
+        """Fingerprint वही: न Calculation, न कोई DB Write"""
+        written = self._written.get((symbol, str(expiry)))
+        self.symbols_skipped += 1
+        if written is not None:
+            self.rows_skipped += len(written.strikes)
+
+    def changed_rows(self, symbol, expiry, df):
+        """
+        पिछली लिखी चेन से बदली रो का Boolean Mask।
+        पहली बार, या स्ट्राइक्स ही बदल गईं हों, तो None (पूरी चेन दोबारा लिखें)।
+        """
+        written = self._written.get((symbol, str(expiry)))
+        if written is None:
+            return None
+        strikes = df["Strike_Price"].to_numpy(dtype=float)
+        if not np.array_equal(strikes, written.strikes):
+            return None
+        values = df[list(DIFF_COLUMNS)].to_numpy(dtype=float)
+        return (values != written.values).any(axis=1)
+
+    def commit(self, symbol, expiry, fingerprint, df, mask=None):
+        """DB Write सफल होने के बाद: यही चेन अब "लिखी हुई" है"""
+        if mask is None:
+            self.symbols_full += 1
+            self.rows_written += len(df)
+        else:
+            changed = int(mask.sum())
+            self.symbols_partial += 1
+            self.rows_written += changed
+            self.rows_skipped += len(df) - changed
+        self._written[(symbol, str(expiry))] = _Written(
+            fingerprint,
+            df["Strike_Price"].to_numpy(dtype=float).copy(),
+            df[list(DIFF_COLUMNS)].to_numpy(dtype=float),
+        )
+
+    def forget(self, symbol, expiry):
+        """Write नाकाम हुआ: अगली बार पूरी चेन दोबारा लिखें"""
+        self._written.pop((symbol, str(expiry)), None)
+
+    def snapshot(self):
+        """Window Stats (और Counters Reset)"""
+        line = (
+            f"symbols skipped={self.symbols_skipped} partial={self.symbols_partial} full={self.symbols_full} | "
+            f"rows skipped={self.rows_skipped} written={self.rows_written}"
+        )
+        self._reset_counters()
+        return line
@@ -0,0 +1,217 @@
+# chain_parser.py
+# 🔹 Option Chain Response -> NumPy Columns (सीधा, बिना per-row dict/DataFrame के)
+#    msgspec (Typed Schema) उपलब्ध हो तो Raw Bytes सीधे Structs में decode होते हैं,
+#    वरना orjson / json से dict बनाकर वही Columns भरे जाते हैं।
+#    हर Snapshot का एक ही Timestamp होता है (पहले हर रो पर timezone.now() लगता था)।
+import json
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import msgspec
+except ImportError:  # msgspec न हो तो dict वाला रास्ता
+    msgspec = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# Response से आने वाले Raw Columns (क्रम: API का स्ट्राइक क्रम)
+RAW_COLUMNS = (
+    "Strike_Price",
+    "CE_LTP", "CE_Close", "CE_Volume", "CE_OI", "CE_Prev_OI", "CE_Delta", "CE_IV",
+    "PE_LTP", "PE_Close", "PE_Volume", "PE_OI", "PE_Prev_OI", "PE_Delta", "PE_IV",
+)
+
+# जिन Columns का "% of max" भी बनता है
+PERCENT_COLUMNS = ("CE_OI", "PE_OI", "CE_Volume", "PE_Volume", "CE_COI", "PE_COI")
+
+
+if msgspec is not None:
+    class _MarketData(msgspec.Struct):
+        ltp: Optional[float] = 0.0
+        close_price: Optional[float] = 0.0
+        volume: Optional[float] = 0.0
+        oi: Optional[float] = 0.0
+        prev_oi: Optional[float] = 0.0
+
+    class _Greeks(msgspec.Struct):
+        delta: Optional[float] = 0.0
+        iv: Optional[float] = 0.0
+
+    class _Leg(msgspec.Struct):
+        market_data: Optional[_MarketData] = None
+        option_greeks: Optional[_Greeks] = None
+
+    class _Strike(msgspec.Struct):
+        strike_price: Optional[float] = 0.0
+        underlying_spot_price: Optional[float] = 0.0
+        call_options: Optional[_Leg] = None
+        put_options: Optional[_Leg] = None
+
+    class _ChainResponse(msgspec.Struct):
+        data: Optional[List[_Strike]] = None
+        underlying_spot_price: Optional[float] = None
+
+    _decoder = msgspec.json.Decoder(_ChainResponse)
+
+
+class ChainColumns:
+    """एक Option Chain Snapshot: Raw NumPy Columns + Spot + एक Timestamp"""
+
+    __slots__ = ("columns", "spot", "time")
+
+    def __init__(self, size):
+        self.columns = {name: np.zeros(size, dtype=np.float64) for name in RAW_COLUMNS}
+        self.spot = 0.0
+        self.time = None
+
+    def __len__(self):
+        return len(self.columns["Strike_Price"])
+
+
+def _num(value):
+    return float(value) if value else 0.0
+
+
+def _fill_leg_from_struct(cols, prefix, i, leg):
+    if leg is None:
+        return
+    md, g = leg.market_data, leg.option_greeks
+    if md is not None:
+        cols[prefix + "_LTP"][i] = md.ltp or 0.0
+        cols[prefix + "_Close"][i] = md.close_price or 0.0
+        cols[prefix + "_Volume"][i] = md.volume or 0.0
+        cols[prefix + "_OI"][i] = md.oi or 0.0
+        cols[prefix + "_Prev_OI"][i] = md.prev_oi or 0.0
+    if g is not None:
+        cols[prefix + "_Delta"][i] = g.delta or 0.0
+        cols[prefix + "_IV"][i] = g.iv or 0.0
+
+
+def _fill_leg_from_dict(cols, prefix, i, leg):
+    if not leg:
+        return
+    md = leg.get("market_data") or {}
+    g = leg.get("option_greeks") or {}
+    cols[prefix + "_LTP"][i] = _num(md.get("ltp"))
+    cols[prefix + "_Close"][i] = _num(md.get("close_price"))
+    cols[prefix + "_Volume"][i] = _num(md.get("volume"))
+    cols[prefix + "_OI"][i] = _num(md.get("oi"))
+    cols[prefix + "_Prev_OI"][i] = _num(md.get("prev_oi"))
+    cols[prefix + "_Delta"][i] = _num(g.get("delta"))
+    cols[prefix + "_IV"][i] = _num(g.get("iv"))
+
+
+def columns_from_response(response_data, now=None):
+    """पहले से decode हुए dict (Stream / पुराने कॉलर्स) से Columns; खाली चेन पर None"""
+    data_list = (response_data or {}).get("data") or []
+    if not data_list:
+        return None
+    chain = ChainColumns(len(data_list))
+    cols = chain.columns
+    strikes = cols["Strike_Price"]
+    for i, entry in enumerate(data_list):
+        strikes[i] = _num(entry.get("strike_price"))
+        _fill_leg_from_dict(cols, "CE", i, entry.get("call_options"))
+        _fill_leg_from_dict(cols, "PE", i, entry.get("put_options"))
+    chain.spot = _num(response_data.get("underlying_spot_price") or data_list[0].get("underlying_spot_price"))
+    chain.time = now
+    return chain
+
+
+def parse_chain(raw, now=None):
+    """
+    /v2/option/chain की Raw Body (bytes/str) को सीधे Columns में पार्स करता है।
+    खाली चेन पर None; JSON खराब हो तो ValueError।
+    """
+    if msgspec is None:
+        return columns_from_response(_loads(raw), now)
+
+    try:
+        response = _decoder.decode(raw)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e
+
+    data_list = response.data
+    if not data_list:
+        return None
+    chain = ChainColumns(len(data_list))
+    cols = chain.columns
+    strikes = cols["Strike_Price"]
+    for i, entry in enumerate(data_list):
+        strikes[i] = entry.strike_price or 0.0
+        _fill_leg_from_struct(cols, "CE", i, entry.call_options)
+        _fill_leg_from_struct(cols, "PE", i, entry.put_options)
+    chain.spot = response.underlying_spot_price or data_list[0].underlying_spot_price or 0.0
+    chain.time = now
+    return chain
+
+
+def _percent_of_max(values):
+    max_v = values.max()
+    if max_v > 0:
+        return np.round(values / max_v * 100, 2)
+    return np.zeros_like(values)
+
+
+def compute_chain_frame(chain, symbol, expiry_Date, lot_size):
+    """
+    Raw Columns से वही कैलकुलेटेड DataFrame जो पहले build_chain_df बनाता था
+    (Column नाम, Rounding और 0-Handling बिल्कुल वही)।
+    """
+    c = chain.columns
+    spot = chain.spot
+    lot = float(lot_size)
+
+    ce_ltp, pe_ltp = c["CE_LTP"], c["PE_LTP"]
+    ce_oi, pe_oi = c["CE_OI"] / lot, c["PE_OI"] / lot
+
+    # Scalar Columns: पूरे Snapshot का एक Time / Symbol / Expiry / Lot
+    out = {
+        "Time": chain.time,
+        "Symbol": symbol,
+        "expiry": expiry_Date,
+        "Lot_size": lot_size,
+        "Strike_Price": c["Strike_Price"],
+        "Spot_Price": np.full(len(chain), spot),
+        "CE_Delta": c["CE_Delta"],
+        "PE_Delta": c["PE_Delta"],
+        "CE_OI": ce_oi,
+        "PE_OI": pe_oi,
+        "CE_CLTP": ce_ltp - c["CE_Close"],
+        "PE_CLTP": pe_ltp - c["PE_Close"],
+        "CE_LTP": ce_ltp,
+        "PE_LTP": pe_ltp,
+        "CE_Volume": c["CE_Volume"] / lot,
+        "PE_Volume": c["PE_Volume"] / lot,
+        "CE_COI": (c["CE_OI"] - c["CE_Prev_OI"]) / lot,
+        "PE_COI": (c["PE_OI"] - c["PE_Prev_OI"]) / lot,
+        "CE_IV": c["CE_IV"],
+        "PE_IV": c["PE_IV"],
+    }
+
+    # Reversal: अगली/पिछली स्ट्राइक की LTP (किनारे की रो पर 0, जैसे पहले fillna(0) से होता था)
+    rev_ce = np.zeros(len(chain))
+    rev_pe = np.zeros(len(chain))
+    pair = np.round((pe_ltp[:-1] - ce_ltp[1:]) + spot, 2)
+    rev_ce[:-1] = pair
+    rev_pe[1:] = pair
+    out["Reversl_Ce"] = rev_ce
+    out["Reversl_Pe"] = rev_pe
+
+    # Range: किसी भी तरफ OI = 0 हो तो 0
+    both = (ce_oi != 0) & (pe_oi != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["CE_RANGE"] = np.where(both, np.round(np.maximum(ce_oi - pe_oi, 0) / ce_oi * 100, 2), 0.0)
+        out["PE_RANGE"] = np.where(both, np.round(np.maximum(pe_oi - ce_oi, 0) / pe_oi * 100, 2), 0.0)
+
+    for col in PERCENT_COLUMNS:
+        out[f"{col}_percent"] = _percent_of_max(out[col])
+
+    return pd.DataFrame(out)
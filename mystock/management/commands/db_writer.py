@@ -0,0 +1,190 @@
+# db_writer.py
+# 🔹 Ingestion Engine का एक ही DB Writer Stage
+#    Workers अपने DB Writes (SupportResistance रो, चेन Snapshots) एक Bounded Queue में डालते हैं;
+#    Writer उन्हें जमा करके हर `max_items` या `max_delay` पर एक ही Transaction में लिखता है।
+#    Queue भर जाए तो put() रुकता है — यही Fetchers के लिए Backpressure है।
+#    SQLite पर अब एक ही Writer है, इसलिए Lock Contention नहीं और Commits सैकड़ों से घटकर कुछ ही।
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, transaction
+
+from mystock.bulk_insert import bulk_insert
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ("row", "unique_fields", "fn", "args", "on_done")
+
+    def __init__(self, row=None, unique_fields=None, fn=None, args=(), on_done=None):
+        self.row = row
+        self.unique_fields = unique_fields
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+
+
+def _bulk_write(model, rows, unique_fields):
+    """Plain Insert (PostgreSQL पर COPY), या unique_fields हों तो Upsert (Batch में एक Key की आखिरी रो ही)"""
+    if not unique_fields:
+        bulk_insert(model, rows)
+        return
+    latest = {tuple(getattr(row, name) for name in unique_fields): row for row in rows}
+    update_fields = [
+        f.name for f in model._meta.concrete_fields
+        if not f.primary_key and f.name not in unique_fields
+    ]
+    model.objects.bulk_create(
+        list(latest.values()),
+        update_conflicts=True,
+        unique_fields=list(unique_fields),
+        update_fields=update_fields,
+    )
+
+
+def write_batch(jobs):
+    """
+    एक Transaction में पूरा Batch (DB Thread में चलता है):
+    पहले हर Model की सारी रो एक Bulk Insert (या Upsert) में, फिर Calls क्रम से।
+    हर हिस्सा अपने Savepoint में, ताकि एक की गलती बाकी Batch न गिराए।
+    हर Job का True/False लौटाता है।
+    """
+    results = [False] * len(jobs)
+    # Long-running Worker: टूटा / CONN_MAX_AGE से पुराना Connection यहीं बदल जाए
+    close_old_connections()
+    with transaction.atomic():
+        rows_by_model = defaultdict(list)
+        for i, job in enumerate(jobs):
+            if job.row is not None:
+                rows_by_model[(type(job.row), job.unique_fields)].append(i)
+        for (model, unique_fields), indexes in rows_by_model.items():
+            try:
+                with transaction.atomic():
+                    _bulk_write(model, [jobs[i].row for i in indexes], unique_fields)
+                for i in indexes:
+                    results[i] = True
+            except Exception as e:
+                logger.error(f"❌ DB Writer: {model.__name__} bulk insert failed ({len(indexes)} rows): {e}")
+
+        for i, job in enumerate(jobs):
+            if job.fn is None:
+                continue
+            try:
+                with transaction.atomic():
+                    results[i] = bool(job.fn(*job.args))
+            except Exception as e:
+                logger.error(f"❌ DB Writer: {getattr(job.fn, '__name__', job.fn)} failed: {e}")
+    return results
+
+
+class DBWriter:
+    """
+    add_row(obj): Model Instance, Flush पर उसी Model की बाकी रो के साथ Bulk Insert (PostgreSQL पर COPY);
+    unique_fields दें तो उसी Batch में Upsert (हर Key की एक "Latest" रो वाली टेबल्स के लिए)।
+    add_call(fn, *args, on_done=cb): Sync DB फ़ंक्शन, Flush के Transaction में चलता है;
+    on_done(ok) Event Loop पर नतीजे के साथ बुलाया जाता है।
+    """
+
+    def __init__(self, max_items=100, max_delay=0.25, queue_size=400):
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+        self._queue = None
+        self._task = None
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.flushes = 0
+        self.items = 0
+        self.failed = 0
+        self.write_time = 0.0
+        self.wait_time = 0.0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _put(self, job):
+        self._ensure_started()
+        started = time.perf_counter()
+        await self._queue.put(job)  # Queue भरी हो तो यहीं रुकते हैं (Backpressure)
+        self.wait_time += time.perf_counter() - started
+
+    async def add_row(self, row, unique_fields=None):
+        await self._put(_Job(row=row, unique_fields=tuple(unique_fields) if unique_fields else None))
+
+    async def add_call(self, fn, *args, on_done=None):
+        await self._put(_Job(fn=fn, args=args, on_done=on_done))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_items:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            results = await sync_to_async(write_batch)(batch)
+        except Exception as e:
+            # Transaction ही Commit नहीं हुआ: पूरा Batch नाकाम
+            logger.error(f"❌ DB Writer: batch of {len(batch)} failed: {e}")
+            results = [False] * len(batch)
+        self.write_time += time.perf_counter() - started
+        self.flushes += 1
+        self.items += len(batch)
+        self.failed += results.count(False)
+
+        for job, ok in zip(batch, results):
+            if job.on_done is not None:
+                try:
+                    job.on_done(ok)
+                except Exception as e:
+                    logger.error(f"❌ DB Writer callback failed: {e}")
+
+    async def drain(self):
+        """अब तक डाले गए सारे Writes लिखे जाने तक रुकें"""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    async def close(self):
+        await self.drain()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def backlog(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def snapshot(self):
+        """Window Stats (और Counters Reset)"""
+        flushes, items = self.flushes, self.items
+        avg = items / flushes if flushes else 0.0
+        line = (
+            f"commits={flushes} items={items} avg_batch={avg:.1f} failed={self.failed} "
+            f"write={self.write_time:.2f}s backpressure={self.wait_time:.2f}s queue={self.backlog()}"
+        )
+        self._reset_counters()
+        return line
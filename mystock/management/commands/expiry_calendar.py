@@ -0,0 +1,142 @@
+# expiry_calendar.py
+# 🔹 पूरे Universe की Expiry Calendar (हर Underlying की Expiries + Lot Size)
+#    Market खुलने से पहले एक बार: /v2/option/contract सारे सिंबल्स के लिए एक साथ
+#    (Worker Pool + साझा Rate Governor), फिर एक ही Bulk Upsert और In-Process Cache।
+import asyncio
+import logging
+import time
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from mystock import upstox_contract
+from mystock.credentials import get_access_token
+from mystock.models import ExpiryCache
+from mystock.symbol import symbols as WEB_SYMBOLS
+
+from .rate_governor import governor, parse_retry_after, OPTION_CONTRACT_ENDPOINT
+from .symbol import symbols as ENGINE_SYMBOLS
+from .worker_pool import run_worker_pool
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_CONCURRENCY = 20
+
+
+def calendar_universe():
+    """Engine और Dashboard Dropdown दोनों के सारे सिंबल्स"""
+    return sorted(set(ENGINE_SYMBOLS) | set(WEB_SYMBOLS))
+
+
+def parse_contracts(data):
+    """Contract API की data लिस्ट -> (सॉर्टेड Expiries, Lot Size)"""
+    expiries = sorted({item["expiry"] for item in data if item.get("expiry")})
+    lot_size = next((item.get("lot_size") for item in data if item.get("lot_size")), None)
+    return expiries, lot_size
+
+
+async def fetch_contracts_async(session, symbol, key, retries=2):
+    """एक Underlying की Contracts (Governor के साथ); नाकाम हो तो None"""
+    url = f"{upstox_contract.UPSTOX_API_BASE}{OPTION_CONTRACT_ENDPOINT}"
+    params = {"instrument_key": key}
+    headers = {"Accept": "application/json", "Authorization": f"Bearer {get_access_token()}"}
+    timeout = aiohttp.ClientTimeout(total=15)
+
+    for attempt in range(retries + 1):
+        await governor.acquire(OPTION_CONTRACT_ENDPOINT)
+        try:
+            async with session.get(url, params=params, headers=headers, timeout=timeout) as res:
+                if res.status == 200:
+                    governor.on_success(OPTION_CONTRACT_ENDPOINT)
+                    body = await res.json()
+                    data = body.get("data") if body else None
+                    return parse_contracts(data) if data else None
+                if res.status == 429:
+                    governor.on_rate_limited(OPTION_CONTRACT_ENDPOINT, parse_retry_after(res.headers))
+                    continue
+                if 400 <= res.status < 500:
+                    logger.error(f"❌ {symbol}: Contract API Error {res.status}")
+                    return None
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            logger.warning(f"⏳ {symbol}: Contract fetch failed (Attempt {attempt + 1}): {e}")
+        if attempt < retries:
+            await asyncio.sleep(1)
+    return None
+
+
+def load_fresh_calendar(symbols):
+    """DB में आज की Calendar: {symbol: expiries} (बीती हुई या पुरानी Rows शामिल नहीं)"""
+    today_str = str(timezone.now().date())
+    fresh = {}
+    for row in ExpiryCache.objects.filter(symbol__in=symbols):
+        if row.is_data_fresh() and row.expiries and row.expiries[0] >= today_str:
+            fresh[row.symbol] = row.expiries
+    return fresh
+
+
+def resolve_keys(symbols):
+    """सिंबल -> Instrument Key (Event Loop से पहले, क्योंकि Registry DB पढ़ सकती है)"""
+    return {sym: upstox_contract.get_instrument_key(sym) for sym in symbols}
+
+
+def save_calendar(calendar):
+    """सारी Rows एक ही Bulk Upsert में (symbol unique है)"""
+    now = timezone.now()
+    rows = [
+        ExpiryCache(symbol=sym, expiries=expiries, lot_size=lot_size, last_updated=now)
+        for sym, (expiries, lot_size) in calendar.items()
+    ]
+    ExpiryCache.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["symbol"],
+        update_fields=["expiries", "lot_size", "last_updated"],
+    )
+
+
+async def refresh_calendar(session, symbols=None, force=False, concurrency=CALENDAR_CONCURRENCY):
+    """
+    आज की Calendar पहले से DB में हो तो वही (Restart पर दोबारा फेच नहीं), बाकी सिंबल्स
+    एक साथ फेच करके एक Bulk Upsert। दोनों ही हालात में इस Process का Cache भर जाता है।
+    लौटाता है {symbol: expiries}।
+    """
+    symbols = list(symbols or calendar_universe())
+    started = time.perf_counter()
+
+    fresh = {} if force else await sync_to_async(load_fresh_calendar)(symbols)
+    missing = [s for s in symbols if s not in fresh]
+    keys = await sync_to_async(resolve_keys)(missing) if missing else {}
+
+    async def fetch_one(sym):
+        key = keys.get(sym)
+        if not key:
+            return None
+        return await fetch_contracts_async(session, sym, key)
+
+    fetched = {}
+    if missing:
+        stats = await run_worker_pool(missing, fetch_one, concurrency=concurrency)
+        fetched = {sym: res for sym, res in stats.results.items() if res and res[0]}
+        if fetched:
+            await sync_to_async(save_calendar)(fetched)
+        logger.info(f"📅 Expiry Calendar fetch: {stats.summary()}")
+
+    calendar = dict(fresh)
+    calendar.update({sym: expiries for sym, (expiries, _) in fetched.items()})
+    for sym, expiries in calendar.items():
+        upstox_contract.expiry_cache.put(upstox_contract.get_storage_key(sym), expiries)
+
+    logger.info(
+        f"✅ Expiry Calendar: {len(calendar)}/{len(symbols)} underlyings "
+        f"({len(fresh)} from DB, {len(fetched)} fetched) in {time.perf_counter() - started:.2f}s"
+    )
+    return calendar
+
+
+def build_calendar_blocking(symbols=None, force=False):
+    """Sync कॉलर्स (Management Command / Web Trigger Thread) के लिए"""
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await refresh_calendar(session, symbols, force=force)
+    return asyncio.run(run())
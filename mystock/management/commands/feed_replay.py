@@ -0,0 +1,82 @@
+# feed_replay.py
+# 🔹 Local Stand-in Upstox सर्वर जो Recorded WebSocket Frames को Replay करता है
+#    Usage:
+#      python manage.py feed_replay --frames nifty_frames.bin.gz --chain nifty_chain.json
+#      UPSTOX_API_BASE=http://127.0.0.1:8765 python manage.py run_sync_async --stream
+import asyncio
+import json
+import logging
+
+from aiohttp import web, WSMsgType
+from django.core.management.base import BaseCommand
+
+from .nifty_stream import FEED_AUTHORIZE_ENDPOINT, read_frames
+
+logger = logging.getLogger(__name__)
+
+
+def build_replay_app(frames_path, chain_path=None, speed=1.0):
+    """
+    /v3/feed/market-data-feed/authorize : Upstox जैसा authorizedRedirectUri (इसी सर्वर का Feed)।
+    /v3/feed/market-data-feed           : पहला Subscribe मैसेज आने के बाद Frames को रिकॉर्डेड
+                                          समय (speed गुना तेज़) पर भेजता है।
+    /v2/option/chain                    : (optional) Recorded REST Seed वापस देता है।
+    """
+    app = web.Application()
+
+    async def feed(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        # Client के Subscribe का इंतज़ार करें
+        msg = await ws.receive()
+        if msg.type not in (WSMsgType.BINARY, WSMsgType.TEXT):
+            return ws
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = 0
+        for offset, payload in read_frames(frames_path):
+            delay = started + offset / speed - loop.time() if speed else 0
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if ws.closed:
+                break
+            await ws.send_bytes(payload)
+            sent += 1
+        logger.info(f"📼 Replayed {sent} frames.")
+        await ws.close()
+        return ws
+
+    async def authorize(request):
+        feed_url = request.url.with_scheme("ws").with_path("/v3/feed/market-data-feed").with_query(code="replay")
+        return web.json_response({"status": "success", "data": {"authorizedRedirectUri": str(feed_url)}})
+
+    app.router.add_get("/v3/feed/market-data-feed", feed)
+    app.router.add_get(FEED_AUTHORIZE_ENDPOINT, authorize)
+
+    if chain_path:
+        with open(chain_path, "r", encoding="utf-8") as f:
+            chain = json.load(f)
+
+        async def option_chain(request):
+            return web.json_response(chain)
+
+        app.router.add_get("/v2/option/chain", option_chain)
+
+    return app
+
+
+class Command(BaseCommand):
+    help = "Recorded Upstox Feed Frames को Replay करने वाला Local WebSocket सर्वर"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", required=True, help="nifty_stream.FrameRecorder से बनी फाइल")
+        parser.add_argument("--chain", help="REST Seed के लिए /v2/option/chain का JSON Response")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--speed", type=float, default=1.0, help="0 = जितना तेज़ हो सके")
+
+    def handle(self, *args, **options):
+        app = build_replay_app(options["frames"], options.get("chain"), options["speed"])
+        web.run_app(app, host=options["host"], port=options["port"])
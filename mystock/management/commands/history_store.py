@@ -0,0 +1,148 @@
+# history_store.py
+# 🔹 Intraday History के Tiers (पहले हर Loop पर "5 मिनट से पुराना सब Delete" होता था)
+#    - Raw:      आखिरी `raw_window` मिनट पूरी Resolution में (हर Fetch)
+#    - 1-minute: आज के Session का बाकी हिस्सा — हर मिनट में हर सिंबल का आखिरी Snapshot
+#    - 5-minute: पिछले Sessions — हर 5 मिनट में हर सिंबल का आखिरी Snapshot
+#    - `keep_days` से पुराने दिन पूरे हटते हैं (हर दिन एक DELETE)
+#    Compaction हर बार सिर्फ उन्हीं Buckets पर चलता है जो अभी-अभी पुराने हुए (Cursor के आगे),
+#    हर Bucket पर कुछ Indexed Queries — पूरी टेबल का Scan नहीं।
+import logging
+from datetime import datetime, time as dt_time, timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from mystock.models import ChainSnapshot, OptionChain, SupportResistance
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+FIVE_MINUTES = 300
+
+RAW_WINDOW_MINUTES = 15
+KEEP_DAYS = 7
+
+
+def floor_time(moment, seconds):
+    """Epoch के हिसाब से `seconds` की Bucket की शुरुआत"""
+    moment = moment.replace(microsecond=0)
+    return moment - timedelta(seconds=int(moment.timestamp()) % seconds)
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, dt_time.min))
+
+
+class HistorySeries:
+    """एक History टेबल: हर रो का समय `time_field`, सिंबल (और Expiry) `group_fields`, Tier `resolution`"""
+
+    def __init__(self, model, time_field, group_fields):
+        self.model = model
+        self.time_field = time_field
+        self.group_fields = tuple(group_fields)
+        self.name = model.__name__
+
+    def _range(self, start=None, end=None, below=None):
+        lookups = {}
+        if start is not None:
+            lookups[f"{self.time_field}__gte"] = start
+        if end is not None:
+            lookups[f"{self.time_field}__lt"] = end
+        if below is not None:
+            lookups["resolution__lt"] = below
+        return self.model.objects.filter(**lookups)
+
+    def first_time(self, start=None, end=None, below=None):
+        """Range की सबसे पुरानी रो का समय (Time Index से), न हो तो None"""
+        return (
+            self._range(start, end, below)
+            .order_by(self.time_field)
+            .values_list(self.time_field, flat=True)
+            .first()
+        )
+
+    def compact_bucket(self, start, end, resolution):
+        """
+        Bucket में हर Group (सिंबल/Expiry) की आखिरी रो रखें (उसे `resolution` Tier में मार्क करें), बाकी हटाएं।
+        हटाई गई रो की संख्या लौटाता है।
+        """
+        rows = self._range(start, end, below=resolution)
+        keep = list(
+            rows.order_by().values(*self.group_fields).annotate(last=Max("id")).values_list("last", flat=True)
+        )
+        deleted = rows.exclude(id__in=keep).delete()[0]
+        self.model.objects.filter(id__in=keep).update(resolution=resolution)
+        return deleted
+
+    def drop_day(self, day_start):
+        return self._range(day_start, day_start + timedelta(days=1)).delete()[0]
+
+
+class HistoryStore:
+    def __init__(self, series=None, raw_window_minutes=RAW_WINDOW_MINUTES, keep_days=KEEP_DAYS, max_buckets=60):
+        self.series = series or [
+            HistorySeries(ChainSnapshot, "fetched_at", ("symbol", "expiry_date")),
+            HistorySeries(SupportResistance, "Time", ("Symbol",)),
+        ]
+        self.raw_window = timedelta(minutes=raw_window_minutes)
+        self.keep_days = keep_days
+        # एक Run में हर Tier के अधिकतम कितने Buckets (Writer Transaction छोटा रहे; बाकी अगली बार)
+        self.max_buckets = max_buckets
+        self._cursor = {}  # (series, resolution) -> इससे पहले के Buckets हो चुके
+        self._legacy_done = False
+
+    def compact(self, now=None):
+        """
+        एक Compaction Run (DB Writer के Transaction में चलता है)।
+        {series: {"minute": n, "five_minute": n, "dropped": n}} (हटाई गई रो) लौटाता है।
+        """
+        now = now or timezone.now()
+        today_start = local_midnight(timezone.localdate(now))
+        summary = {}
+        for series in self.series:
+            summary[series.name] = {
+                # आज: Raw Window से पुराना -> 1-minute
+                "minute": self._compact_range(series, MINUTE, today_start, floor_time(now - self.raw_window, MINUTE)),
+                # पिछले Sessions -> 5-minute
+                "five_minute": self._compact_range(series, FIVE_MINUTES, None, today_start),
+                "dropped": self._drop_old_days(series, today_start - timedelta(days=self.keep_days)),
+            }
+
+        if not self._legacy_done:
+            # ChainSnapshot से पहले की NIFTY रो (बिना Header) — एक ही बार
+            summary["legacy"] = OptionChain.objects.filter(snapshot__isnull=True, Time__lt=now - self.raw_window).delete()[0]
+            self._legacy_done = True
+
+        if any(v for counts in summary.values() for v in (counts.values() if isinstance(counts, dict) else [counts])):
+            logger.info(f"🗜️ History compaction: {summary}")
+        return summary
+
+    def _compact_range(self, series, resolution, start, end):
+        key = (series.name, resolution)
+        cursor = self._cursor.get(key)
+        if cursor is not None and start is not None:
+            cursor = max(cursor, start)
+        elif cursor is None:
+            cursor = start
+
+        deleted = 0
+        for _ in range(self.max_buckets):
+            # अगली पुरानी (अभी compact न हुई) रो तक सीधे कूदें — खाली Buckets पर Query नहीं
+            first = series.first_time(cursor, end, below=resolution)
+            if first is None:
+                cursor = end
+                break
+            bucket = floor_time(first, resolution)
+            deleted += series.compact_bucket(bucket, bucket + timedelta(seconds=resolution), resolution)
+            cursor = bucket + timedelta(seconds=resolution)
+        self._cursor[key] = cursor
+        return deleted
+
+    def _drop_old_days(self, series, cutoff):
+        dropped = 0
+        for _ in range(self.keep_days + 1):
+            first = series.first_time(None, cutoff)
+            if first is None:
+                break
+            dropped += series.drop_day(local_midnight(timezone.localdate(first)))
+        return dropped
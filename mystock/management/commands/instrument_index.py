@@ -0,0 +1,213 @@
+# instrument_index.py
+# 🔹 Master Contract का O(1) Lookup Index
+#    load_master_contract के समय एक बार बनता है; उसके बाद हर Lookup सिर्फ dict hit है,
+#    ~2 लाख रो पर Boolean Mask या str.startswith नहीं चलता।
+#    Master Contract Cache में यही Index Sorted Byte Arrays के रूप में भी लिखा जाता है
+#    (MappedInstrumentIndex): Worker Start पर mmap, Lookup पर searchsorted — हर Start पर Index नहीं बनता।
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DERIVATIVE_TYPES = ("OPTSTK", "FUTSTK", "OPTIDX", "FUTIDX")
+OPTION_TYPES = ("OPTSTK", "OPTIDX")
+
+# F&O Trading Symbol: <UNDERLYING><YY><MON या M+DD><STRIKE?><CE|PE|FUT>
+# जैसे BANKNIFTY24FEB45000CE, RELIANCE24FEBFUT, NIFTY2421522000PE
+_FO_SYMBOL = re.compile(r"^(.+?)\d{2}(?:[A-Z]{3}|[1-9OND]\d{2})(?:\d+(?:\.\d+)?)?(?:CE|PE|FUT)$")
+
+
+def underlying_of(tradingsymbol, name=None):
+    """
+    डेरिवेटिव रो का Underlying सिंबल।
+    Master Contract का `name` Trading Symbol का Prefix हो तो वही, वरना Symbol से Parse।
+    """
+    if isinstance(name, str) and name and tradingsymbol.startswith(name):
+        return name
+    match = _FO_SYMBOL.match(tradingsymbol)
+    return match.group(1) if match else tradingsymbol
+
+
+def _valid_lot(value):
+    return value is not None and pd.notna(value) and value > 0
+
+
+# Cache में Index की फाइलें: हर `*_symbols` Byte-Order में Sorted, बाकी उसी क्रम में
+INDEX_FILES = (
+    "key_symbols", "key_values",
+    "lot_symbols", "lot_names", "lot_sizes",
+    "option_underlyings", "option_offsets", "option_keys",
+)
+
+
+def _encode(values):
+    return np.array([("" if v is None else str(v)).encode("utf-8") for v in values], dtype=bytes)
+
+
+def _sorted(symbols):
+    """Symbols -> (Sorted bytes Array, वो क्रम) — searchsorted के लिए"""
+    encoded = _encode(symbols)
+    order = np.argsort(encoded, kind="stable")
+    return encoded[order], order
+
+
+def _index_path(directory, name):
+    return os.path.join(directory, f"index_{name}.npy")
+
+
+class InstrumentIndex:
+    """
+    - tradingsymbol -> instrument_key (NSE_EQ को प्राथमिकता, फिर कोई भी Exchange)
+    - underlying -> (name, F&O lot size)
+    - underlying -> Option instrument keys की लिस्ट
+    - tradingsymbol -> (name, lot size) (Cash/Index रो, F&O न हो तो Fallback)
+    """
+
+    def __init__(self, df):
+        # किस DataFrame से बना है (Benchmark Master Contract बदले तो दोबारा बनाने के लिए)
+        self.source = df
+        self.eq_keys = {}
+        self.any_keys = {}
+        self.fo_lots = {}
+        self.option_keys = {}
+        self.cash_lots = {}
+
+        if df is None or df.empty:
+            return
+
+        symbols = df["tradingsymbol"].astype(str).str.strip().tolist()
+        exchanges = df["exchange"].astype(str).str.strip().tolist() if "exchange" in df else [""] * len(df)
+        keys = df["instrument_key"].tolist()
+        names = df["name"].tolist() if "name" in df else [None] * len(df)
+        lots = df["lot_size"].tolist() if "lot_size" in df else [None] * len(df)
+        types = df["instrument_type"].tolist() if "instrument_type" in df else [None] * len(df)
+
+        # पहली मिलने वाली रो जीतती है (पुराने .iloc[0] वाले व्यवहार जैसा)
+        for sym, exch, key, name, lot, itype in zip(symbols, exchanges, keys, names, lots, types):
+            self.any_keys.setdefault(sym, key)
+            if exch == "NSE_EQ":
+                self.eq_keys.setdefault(sym, key)
+            if itype not in DERIVATIVE_TYPES:
+                if sym not in self.cash_lots:
+                    cash_name = name if isinstance(name, str) and name else sym
+                    self.cash_lots[sym] = (cash_name, int(lot) if _valid_lot(lot) else 1)
+            else:
+                underlying = underlying_of(sym, name)
+                if underlying not in self.fo_lots and _valid_lot(lot):
+                    self.fo_lots[underlying] = (name if isinstance(name, str) and name else underlying, int(lot))
+                if itype in OPTION_TYPES:
+                    self.option_keys.setdefault(underlying, []).append(key)
+
+    def __len__(self):
+        return len(self.any_keys)
+
+    def instrument_key(self, symbol):
+        key = self.eq_keys.get(symbol)
+        return key if key is not None else self.any_keys.get(symbol)
+
+    def name_lot_size(self, symbol):
+        """(name, lot_size): F&O लॉट साइज को प्राथमिकता, फिर Cash, वरना (symbol, 1)"""
+        info = self.fo_lots.get(symbol) or self.cash_lots.get(symbol)
+        return info if info is not None else (symbol, 1)
+
+    def options_for(self, underlying):
+        return self.option_keys.get(underlying, [])
+
+    def registry_rows(self):
+        """
+        Underlying/Cash सिंबल्स की (symbol, instrument_key, name, lot_size) Rows —
+        DB Registry (Instrument Model) के लिए; अलग-अलग Option Contracts शामिल नहीं।
+        """
+        for sym in sorted(set(self.cash_lots) | set(self.fo_lots)):
+            name, lot_size = self.name_lot_size(sym)
+            yield sym, self.instrument_key(sym), name, lot_size
+
+    def save(self, directory):
+        """Lookups के नतीजे Sorted Byte Arrays में (.npy) — MappedInstrumentIndex इन्हें mmap से पढ़ता है"""
+        key_symbols, order = _sorted(list(self.any_keys))
+        keys = [self.instrument_key(sym) for sym in self.any_keys]
+
+        lot_list = sorted(set(self.cash_lots) | set(self.fo_lots))
+        lot_symbols, lot_order = _sorted(lot_list)
+        lots = [self.name_lot_size(sym) for sym in lot_list]
+
+        underlyings, option_order = _sorted(list(self.option_keys))
+        groups = [self.option_keys[u] for u in self.option_keys]
+        groups = [groups[i] for i in option_order]
+
+        arrays = {
+            "key_symbols": key_symbols,
+            "key_values": _encode(keys)[order],
+            "lot_symbols": lot_symbols,
+            "lot_names": _encode(name for name, _ in lots)[lot_order],
+            "lot_sizes": np.array([lot for _, lot in lots], dtype=np.int64)[lot_order],
+            "option_underlyings": underlyings,
+            "option_offsets": np.cumsum([0] + [len(keys) for keys in groups], dtype=np.int64),
+            "option_keys": _encode(key for keys in groups for key in keys),
+        }
+        for name, values in arrays.items():
+            # Temp फाइल से Swap: पढ़ने वाले को आधी लिखी फाइल न मिले
+            path = _index_path(directory, name)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, values)
+            os.replace(path + ".tmp", path)
+
+
+class MappedInstrumentIndex:
+    """
+    InstrumentIndex वाले ही Lookups, Cache की Sorted Byte Arrays (mmap) पर:
+    Start पर न String Columns Decode होते हैं, न हर रो पर Python Loop —
+    हर Lookup एक searchsorted, और सिर्फ मिली हुई Value Decode होती है।
+    """
+
+    def __init__(self, arrays):
+        self.source = self
+        self.key_symbols = arrays["key_symbols"]
+        self.key_values = arrays["key_values"]
+        self.lot_symbols = arrays["lot_symbols"]
+        self.lot_names = arrays["lot_names"]
+        self.lot_sizes = arrays["lot_sizes"]
+        self.option_underlyings = arrays["option_underlyings"]
+        self.option_offsets = arrays["option_offsets"]
+        self.option_keys = arrays["option_keys"]
+
+    @classmethod
+    def load(cls, directory):
+        """Cache की Index फाइलें mmap से खोलता है (कोई फाइल न हो तो None)"""
+        paths = {name: _index_path(directory, name) for name in INDEX_FILES}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        return cls({name: np.load(path, mmap_mode="r") for name, path in paths.items()})
+
+    @staticmethod
+    def _find(symbols, symbol):
+        needle = symbol.encode("utf-8")
+        i = int(np.searchsorted(symbols, needle))
+        return i if i < len(symbols) and symbols[i] == needle else None
+
+    def __len__(self):
+        return len(self.key_symbols)
+
+    def instrument_key(self, symbol):
+        i = self._find(self.key_symbols, symbol)
+        return None if i is None else self.key_values[i].decode("utf-8")
+
+    def name_lot_size(self, symbol):
+        """(name, lot_size): F&O लॉट साइज को प्राथमिकता, फिर Cash, वरना (symbol, 1)"""
+        i = self._find(self.lot_symbols, symbol)
+        if i is None:
+            return symbol, 1
+        return self.lot_names[i].decode("utf-8"), int(self.lot_sizes[i])
+
+    def options_for(self, underlying):
+        i = self._find(self.option_underlyings, underlying)
+        if i is None:
+            return []
+        start, end = self.option_offsets[i], self.option_offsets[i + 1]
+        return [key.decode("utf-8") for key in self.option_keys[start:end]]
+
+    def registry_rows(self):
+        for i, sym in enumerate(self.lot_symbols):
+            sym = sym.decode("utf-8")
+            yield sym, self.instrument_key(sym), self.lot_names[i].decode("utf-8"), int(self.lot_sizes[i])
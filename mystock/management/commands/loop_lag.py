@@ -0,0 +1,58 @@
+# loop_lag.py
+# 🔹 Event-Loop Lag Monitor
+#    एक छोटा Task हर `interval` सेकंड सोता है और नापता है कि वह कितनी देर से जागा।
+#    यह देरी = Event Loop पर चल रहा Blocking (CPU/pandas/ORM) काम।
+import asyncio
+import math
+import time
+
+
+def percentile(values, pct):
+    """Nearest-Rank Percentile, खाली लिस्ट पर 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return self.summary()
+
+    def summary(self):
+        """Lag मिलीसेकंड्स में (p50 / p99 / max)"""
+        return {
+            "p50_ms": round(percentile(self.samples, 50) * 1000, 1),
+            "p99_ms": round(percentile(self.samples, 99) * 1000, 1),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 1),
+        }
+
+    def drain(self):
+        """अब तक का summary लौटाकर samples साफ़ करता है (हर Window की अलग नाप के लिए)"""
+        summary = self.summary()
+        self.samples = []
+        return summary
@@ -0,0 +1,189 @@
+# master_contract.py
+# 🔹 Upstox Master Contract का Compact, Memory-Mappable Cache
+#    रोज़ एक बार Conditional Request (ETag / Last-Modified) से complete.csv.gz चेक होता है;
+#    बदला हो तो gzip को Stream करके सिर्फ काम के Columns .npy फाइलों में लिखे जाते हैं।
+#    साथ में Lookup Index भी (Sorted Byte Arrays, instrument_index.py) — Start पर वही mmap से खुलता है,
+#    न पूरी CSV object dtype में पढ़नी पड़ती है, न हर Start पर ~2 लाख रो से Index बनाना।
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import requests
+
+from .instrument_index import InstrumentIndex, MappedInstrumentIndex
+
+logger = logging.getLogger(__name__)
+
+MASTER_URL = "https://assets.upstox.com/feed/instruments/complete.csv.gz"
+CACHE_DIR = os.environ.get("MASTER_CONTRACT_CACHE", "master_contract_cache")
+LEGACY_CSV = "complete.csv"
+META_FILE = "meta.json"
+
+# सिर्फ यही Columns इस्तेमाल होते हैं (InstrumentIndex और Lookups)
+STRING_COLUMNS = ("tradingsymbol", "instrument_key", "name")
+CATEGORY_COLUMNS = ("exchange", "instrument_type")
+USE_COLUMNS = STRING_COLUMNS + CATEGORY_COLUMNS + ("lot_size",)
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    path = os.path.join(cache_dir, META_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def write_cache(df, cache_dir, meta):
+    """
+    DataFrame -> एक Column प्रति .npy फाइल:
+    Strings fixed-width UTF-8 bytes, Exchange/Type int8 codes + categories, lot_size int32 (0 = नहीं),
+    और उन्हीं (साफ किए) Values से बना Lookup Index।
+    पहले Temp डायरेक्टरी में लिखकर फिर Swap, ताकि आधा लिखा Cache कभी न पढ़ा जाए।
+    """
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".master_contract_", dir=parent)
+
+    categories = {}
+    clean = {}
+    for col in STRING_COLUMNS:
+        clean[col] = df[col].fillna("").astype(str).str.strip()
+        np.save(os.path.join(tmp_dir, f"{col}.npy"), np.array(clean[col].str.encode("utf-8").tolist(), dtype=bytes))
+    for col in CATEGORY_COLUMNS:
+        cat = pd.Categorical(df[col].fillna("").astype(str).str.strip())
+        categories[col] = [str(c) for c in cat.categories]
+        clean[col] = cat
+        np.save(os.path.join(tmp_dir, f"{col}.npy"), cat.codes.astype(np.int8))
+    lots = pd.to_numeric(df["lot_size"], errors="coerce").fillna(0).astype(np.int32)
+    np.save(os.path.join(tmp_dir, "lot_size.npy"), lots.to_numpy())
+    clean["lot_size"] = lots.where(lots > 0).to_numpy()
+    InstrumentIndex(pd.DataFrame(clean)).save(tmp_dir)
+
+    _write_meta(tmp_dir, dict(meta, rows=len(df), categories=categories))
+
+    old_dir = None
+    if os.path.isdir(cache_dir):
+        old_dir = tmp_dir + ".old"
+        os.replace(cache_dir, old_dir)
+    os.replace(tmp_dir, cache_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_cache(cache_dir=CACHE_DIR):
+    """
+    Cache के Columns का पूरा DataFrame (Cache न हो तो None)। Strings पूरे Decode होते हैं —
+    Lookups के लिए read_index, यह सिर्फ Index के बिना वाले पुराने Cache से Index बनाने के लिए।
+    """
+    meta = _read_meta(cache_dir)
+    if not meta or "categories" not in meta:
+        return None
+
+    data = {}
+    for col in STRING_COLUMNS:
+        arr = np.load(os.path.join(cache_dir, f"{col}.npy"), mmap_mode="r")
+        data[col] = np.char.decode(arr, "utf-8")
+    for col in CATEGORY_COLUMNS:
+        codes = np.load(os.path.join(cache_dir, f"{col}.npy"), mmap_mode="r")
+        data[col] = pd.Categorical.from_codes(codes, meta["categories"][col])
+    lots = np.load(os.path.join(cache_dir, "lot_size.npy"), mmap_mode="r")
+    # 0 = लॉट साइज नहीं था (पुराने NaN जैसा व्यवहार)
+    data["lot_size"] = np.where(lots > 0, lots, np.nan)
+    return pd.DataFrame(data)
+
+
+def read_index(cache_dir=CACHE_DIR):
+    """
+    Cache का Lookup Index (mmap, MappedInstrumentIndex); Cache न हो तो None।
+    Index फाइलों से पहले लिखा Cache हो तो एक बार Columns से Index बनाकर उसी में जोड़ देता है।
+    """
+    meta = _read_meta(cache_dir)
+    if not meta or "categories" not in meta:
+        return None
+    index = MappedInstrumentIndex.load(cache_dir)
+    if index is None:
+        logger.info("🔧 Master Contract Cache में Index नहीं, एक बार बनाकर जोड़ रहे हैं")
+        InstrumentIndex(read_cache(cache_dir)).save(cache_dir)
+        index = MappedInstrumentIndex.load(cache_dir)
+    return index
+
+
+def refresh_cache(cache_dir=CACHE_DIR, url=MASTER_URL, force=False, timeout=60):
+    """
+    दिन में एक बार Conditional GET। 304 पर सिर्फ तारीख अपडेट,
+    200 पर gzip Stream -> Compact Cache। True = Cache अब ताज़ा है।
+    """
+    meta = _read_meta(cache_dir) or {}
+    today = date.today().isoformat()
+    if not force and meta.get("checked") == today and "categories" in meta:
+        return True
+
+    headers = {}
+    if not force and "categories" in meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as res:
+            if res.status_code == 304:
+                meta["checked"] = today
+                _write_meta(cache_dir, meta)
+                logger.info("✅ Master Contract अपरिवर्तित (304), Cache ही इस्तेमाल होगा")
+                return True
+            res.raise_for_status()
+
+            print("📥 Downloading latest master contract...")
+            # Response को डिस्क/मेमोरी में पूरा रखे बिना सीधे gzip -> CSV Parser
+            # (Wire के Bytes ही .gz फाइल हैं, urllib3 से Decode नहीं करवाना)
+            res.raw.decode_content = False
+            with gzip.GzipFile(fileobj=res.raw) as stream:
+                df = pd.read_csv(stream, usecols=lambda c: c in USE_COLUMNS, dtype={
+                    "tradingsymbol": str, "instrument_key": str, "name": str,
+                    "exchange": "category", "instrument_type": "category",
+                })
+            write_cache(df, cache_dir, {
+                "checked": today,
+                "etag": res.headers.get("ETag"),
+                "last_modified": res.headers.get("Last-Modified"),
+            })
+            print(f"✅ Download Complete! Cache में {len(df)} Instruments")
+            return True
+    except Exception as e:
+        logger.error(f"❌ Master Contract Refresh Error: {e}")
+        return "categories" in meta
+
+
+def cache_checked_on(cache_dir=CACHE_DIR):
+    """Cache आखिरी बार किस दिन Upstox से मिलाया गया (ISO Date), Cache न हो तो None"""
+    return (_read_meta(cache_dir) or {}).get("checked")
+
+
+def load_instrument_index(cache_dir=CACHE_DIR):
+    """
+    ताज़ा Cache का Lookup Index। Download न हो पाए तो पुराना Cache,
+    और Cache भी न हो तो पुरानी complete.csv (अगर मौजूद है) से बना Index; कुछ न हो तो None।
+    """
+    refresh_cache(cache_dir)
+    index = read_index(cache_dir)
+    if index is None and os.path.exists(LEGACY_CSV):
+        logger.warning(f"⚠️ Compact Cache नहीं मिला, {LEGACY_CSV} से लोड हो रहा है")
+        df = pd.read_csv(LEGACY_CSV, usecols=lambda c: c in USE_COLUMNS)
+        df["tradingsymbol"] = df["tradingsymbol"].astype(str).str.strip()
+        df["exchange"] = df["exchange"].astype(str).str.strip()
+        index = InstrumentIndex(df)
+    return index
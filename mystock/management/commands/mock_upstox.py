@@ -0,0 +1,182 @@
+# mock_upstox.py
+# 🔹 Local Mock Upstox सर्वर (bench_sync के लिए)
+#    /v2/option/chain और /v2/option/contract के Synthetic Responses देता है —
+#    Strikes की गिनती, Latency Distribution और 429/5xx Injection कॉन्फ़िगर किए जा सकते हैं।
+#    अलग Process में चलता है ताकि Engine के Event Loop की नाप पर असर न पड़े।
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+from datetime import date, timedelta
+
+from aiohttp import web
+
+BENCH_PREFIX = "BENCH"
+
+
+def bench_symbols(count):
+    return [f"{BENCH_PREFIX}{i:05d}" for i in range(count)]
+
+
+def bench_instrument_key(symbol):
+    return f"NSE_EQ|{symbol}"
+
+
+def bench_expiries(count=3, start=None):
+    """अगले महीनों के आखिरी गुरुवार जैसी Synthetic Expiries"""
+    start = start or date.today()
+    expiries = []
+    for month in range(count):
+        first = date(start.year + (start.month - 1 + month + 1) // 12,
+                     (start.month - 1 + month + 1) % 12 + 1, 1)
+        last = first - timedelta(days=1)
+        while last.weekday() != 3:
+            last -= timedelta(days=1)
+        expiries.append(last.isoformat())
+    return expiries
+
+
+def synthetic_chain(instrument_key, strikes, variant, rng):
+    """एक Upstox-जैसा Option Chain Response (dict)"""
+    seed = sum(map(ord, instrument_key))
+    spot = 200.0 + (seed % 50) * 40.0 + variant
+    step = max(1.0, round(spot * 0.01))
+    atm = round(spot / step) * step
+    data = []
+    for i in range(strikes):
+        strike = atm + (i - strikes // 2) * step
+        moneyness = (spot - strike) / spot
+        ce_ltp = max(0.05, round(max(spot - strike, 0) + spot * 0.02 * rng.random(), 2))
+        pe_ltp = max(0.05, round(max(strike - spot, 0) + spot * 0.02 * rng.random(), 2))
+        data.append({
+            "expiry": "",
+            "strike_price": strike,
+            "underlying_key": instrument_key,
+            "underlying_spot_price": spot,
+            "call_options": {
+                "instrument_key": f"NSE_FO|{seed}{i}C",
+                "market_data": {
+                    "ltp": ce_ltp, "close_price": round(ce_ltp * 0.97, 2),
+                    "volume": rng.randint(0, 50000), "oi": rng.randint(0, 900000),
+                    "prev_oi": rng.randint(0, 900000),
+                },
+                "option_greeks": {"delta": round(0.5 + moneyness * 5, 4), "iv": round(15 + 10 * rng.random(), 2)},
+            },
+            "put_options": {
+                "instrument_key": f"NSE_FO|{seed}{i}P",
+                "market_data": {
+                    "ltp": pe_ltp, "close_price": round(pe_ltp * 1.02, 2),
+                    "volume": rng.randint(0, 50000), "oi": rng.randint(0, 900000),
+                    "prev_oi": rng.randint(0, 900000),
+                },
+                "option_greeks": {"delta": round(-0.5 + moneyness * 5, 4), "iv": round(15 + 10 * rng.random(), 2)},
+            },
+        })
+    return {"status": "success", "data": data}
+
+
+def build_mock_app(strikes=80, latency_ms=80.0, latency_sigma=0.5, throttle_rate=0.0,
+                   error_rate=0.0, variants=8, lot_size=500, seed=7):
+    """
+    latency_ms / latency_sigma : Lognormal Latency (median, sigma)
+    throttle_rate / error_rate : कितने % Requests पर 429 / 503 लौटाना है
+    """
+    rng = random.Random(seed)
+    bodies = {}
+    stats = {"requests": 0, "throttled": 0, "errors": 0}
+    expiries = bench_expiries()
+
+    def chain_body(key):
+        # हर Key के लिए कुछ Variants पहले से बनाकर रखें ताकि Mock खुद CPU न खाए
+        variant = rng.randrange(variants)
+        cache_key = (key, variant)
+        body = bodies.get(cache_key)
+        if body is None:
+            body = json.dumps(synthetic_chain(key, strikes, variant, rng)).encode("utf-8")
+            bodies[cache_key] = body
+        return body
+
+    async def delay_and_faults():
+        stats["requests"] += 1
+        await asyncio.sleep(rng.lognormvariate(0, latency_sigma) * latency_ms / 1000.0)
+        roll = rng.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            return web.json_response({"status": "error", "errors": ["Too Many Requests"]},
+                                     status=429, headers={"Retry-After": "1"})
+        if roll < throttle_rate + error_rate:
+            stats["errors"] += 1
+            return web.json_response({"status": "error"}, status=503)
+        return None
+
+    async def option_chain(request):
+        fault = await delay_and_faults()
+        if fault is not None:
+            return fault
+        return web.Response(body=chain_body(request.query.get("instrument_key", "")),
+                            content_type="application/json")
+
+    async def option_contract(request):
+        fault = await delay_and_faults()
+        if fault is not None:
+            return fault
+        key = request.query.get("instrument_key", "")
+        data = [
+            {"expiry": exp, "lot_size": lot_size, "underlying_key": key,
+             "underlying_symbol": key.split("|")[-1], "instrument_type": "CE"}
+            for exp in expiries
+        ]
+        return web.json_response({"status": "success", "data": data})
+
+    async def mock_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/v2/option/chain", option_chain)
+    app.router.add_get("/v2/option/contract", option_contract)
+    app.router.add_get("/mock/stats", mock_stats)
+    return app
+
+
+def _serve(port, config):
+    web.run_app(build_mock_app(**config), host="127.0.0.1", port=port, print=None,
+                handle_signals=True)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MockUpstoxServer:
+    """Mock सर्वर को अलग Process में शुरू/बंद करता है"""
+
+    def __init__(self, port=None, **config):
+        self.port = port or free_port()
+        self.config = config
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout=10):
+        self.process = multiprocessing.Process(target=_serve, args=(self.port, self.config), daemon=True)
+        self.process.start()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                    return self
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"Mock Upstox server did not start on port {self.port}")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(timeout=5)
+            self.process = None
@@ -0,0 +1,280 @@
+# nifty_stream.py
+# 🔹 Streaming Market-Data Mode (Upstox WebSocket Feed V3)
+#    हर Connect से पहले /v3/feed/market-data-feed/authorize से एक बार का Authorized wss URI,
+#    फिर एक बार REST से पूरी चेन लेकर, Spot के आस-पास की स्ट्राइक्स की Instrument Keys को
+#    Subscribe करते हैं और हर Tick को In-Memory चेन पर लागू करते हैं।
+#    हर `snapshot_interval` सेकंड पर बदली हुई चेन का DataFrame बनाकर Callback को भेजते हैं।
+import asyncio
+import bisect
+import copy
+import gzip
+import json
+import logging
+import struct
+import time
+import uuid
+
+import aiohttp
+
+from mystock.credentials import get_access_token
+from . import async_live
+from .async_live import build_chain_df, get_instrument_key, get_option_chain_async
+
+logger = logging.getLogger(__name__)
+
+# REST वाले UPSTOX_API_BASE पर (Local Stand-in: feed_replay)
+FEED_AUTHORIZE_ENDPOINT = "/v3/feed/market-data-feed/authorize"
+
+# Recorded Frame का हेडर: (शुरुआत से सेकंड्स, payload की लंबाई)
+FRAME_HEADER = struct.Struct("<dI")
+
+
+def build_feed_request(instrument_keys, method, mode=None):
+    """Feed V3 का Subscribe/Unsubscribe मैसेज (Binary JSON)"""
+    request = {
+        "guid": str(uuid.uuid4()),
+        "method": method,
+        "data": {"instrumentKeys": list(instrument_keys)},
+    }
+    if mode is not None:
+        request["data"]["mode"] = mode
+    return json.dumps(request).encode("utf-8")
+
+
+async def authorize_feed(session):
+    """
+    Feed V3 का Authorized WebSocket URI (authorizedRedirectUri) — उसी में एक बार का Code होता है,
+    इसलिए हर Connect से पहले नया लें।
+    """
+    url = f"{async_live.UPSTOX_API_BASE}{FEED_AUTHORIZE_ENDPOINT}"
+    headers = {"Accept": "application/json", "Authorization": f"Bearer {get_access_token()}"}
+    async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as res:
+        if res.status != 200:
+            raise RuntimeError(f"Feed authorize failed: {res.status} {await res.text()}")
+        body = await res.json()
+    uri = (body.get("data") or {}).get("authorizedRedirectUri")
+    if not uri:
+        raise RuntimeError(f"Feed authorize: authorizedRedirectUri नहीं मिला ({body})")
+    return uri
+
+
+def decode_feed(payload):
+    """Protobuf FeedResponse डिकोड करें (upstox SDK का proto सिर्फ Stream मोड में लोड होता है)"""
+    from upstox_client.feeder.proto import MarketDataFeedV3_pb2
+
+    message = MarketDataFeedV3_pb2.FeedResponse()
+    message.ParseFromString(payload)
+    return message
+
+
+class FrameRecorder:
+    """Raw WebSocket Frames को समय के साथ gzip फाइल में लिखता है (Replay के लिए)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self._file = gzip.open(path, "wb")
+
+    def write(self, payload):
+        self._file.write(FRAME_HEADER.pack(time.monotonic() - self.started, len(payload)))
+        self._file.write(payload)
+
+    def close(self):
+        self._file.close()
+
+
+def read_frames(path):
+    """Recorded फाइल से (offset_seconds, payload) निकालता है"""
+    with gzip.open(path, "rb") as f:
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            offset, length = FRAME_HEADER.unpack(header)
+            yield offset, f.read(length)
+
+
+class LiveChain:
+    """
+    REST Seed से बनी In-Memory Option Chain।
+    Tick आने पर सिर्फ उस स्ट्राइक/साइड का market_data और option_greeks बदलता है।
+    """
+
+    def __init__(self, response_data, underlying_key, strikes_around_spot=20):
+        self.underlying_key = underlying_key
+        self.strikes_around_spot = strikes_around_spot
+        self.entries = sorted(
+            copy.deepcopy(response_data["data"]), key=lambda e: e.get("strike_price") or 0
+        )
+        self.strikes = [e.get("strike_price") or 0 for e in self.entries]
+        self.spot = response_data.get("underlying_spot_price") or (
+            self.entries[0].get("underlying_spot_price", 0) if self.entries else 0
+        )
+
+        # instrument_key -> (entry, "call_options"/"put_options")
+        self.key_map = {}
+        for entry in self.entries:
+            for side in ("call_options", "put_options"):
+                option = entry.get(side) or {}
+                key = option.get("instrument_key")
+                if key:
+                    option.setdefault("market_data", {})
+                    option.setdefault("option_greeks", {})
+                    entry[side] = option
+                    self.key_map[key] = (entry, side)
+
+        self.dirty = False
+        self.ticks = 0
+
+    def atm_index(self):
+        idx = bisect.bisect_left(self.strikes, self.spot)
+        return min(max(idx, 0), max(len(self.strikes) - 1, 0))
+
+    def keys_near_spot(self):
+        """Spot के ±strikes_around_spot स्ट्राइक्स की CE/PE Instrument Keys"""
+        atm = self.atm_index()
+        lo = max(0, atm - self.strikes_around_spot)
+        hi = min(len(self.entries), atm + self.strikes_around_spot + 1)
+        keys = []
+        for entry in self.entries[lo:hi]:
+            for side in ("call_options", "put_options"):
+                key = (entry.get(side) or {}).get("instrument_key")
+                if key:
+                    keys.append(key)
+        return keys
+
+    def apply(self, feed_response):
+        """एक FeedResponse के सारे Ticks लागू करें, लागू हुए Ticks की गिनती लौटाएं"""
+        applied = 0
+        for key, feed in feed_response.feeds.items():
+            kind = feed.WhichOneof("FeedUnion")
+            if kind == "ltpc":
+                ltpc, greeks, extra = feed.ltpc, None, None
+            elif kind == "firstLevelWithGreeks":
+                extra = feed.firstLevelWithGreeks
+                ltpc, greeks = extra.ltpc, extra.optionGreeks
+            elif kind == "fullFeed":
+                full = feed.fullFeed
+                if full.WhichOneof("FullFeedUnion") == "indexFF":
+                    ltpc, greeks, extra = full.indexFF.ltpc, None, None
+                else:
+                    extra = full.marketFF
+                    ltpc, greeks = extra.ltpc, extra.optionGreeks
+            else:
+                continue
+
+            if key == self.underlying_key:
+                if ltpc.ltp:
+                    self.spot = ltpc.ltp
+                    applied += 1
+                continue
+
+            target = self.key_map.get(key)
+            if target is None:
+                continue
+            entry, side = target
+            md = entry[side]["market_data"]
+            md["ltp"] = ltpc.ltp
+            if ltpc.cp:
+                md["close_price"] = ltpc.cp
+            if extra is not None:
+                md["oi"] = extra.oi
+                md["volume"] = extra.vtt
+                if greeks is not None:
+                    entry[side]["option_greeks"]["delta"] = greeks.delta
+                entry[side]["option_greeks"]["iv"] = extra.iv
+            applied += 1
+
+        if applied:
+            self.dirty = True
+            self.ticks += applied
+        return applied
+
+    def to_response(self):
+        """In-Memory चेन को REST Response जैसे dict में बदलें (build_chain_df के लिए)"""
+        for entry in self.entries:
+            entry["underlying_spot_price"] = self.spot
+        return {"status": "success", "underlying_spot_price": self.spot, "data": self.entries}
+
+
+async def stream_option_chain(session, symbol, expiry, on_snapshot, snapshot_interval=1.0,
+                              strikes_around_spot=20, feed_url=None, record_path=None,
+                              keep_running=None, decode=decode_feed):
+    """
+    symbol/expiry की चेन को WebSocket से लाइव रखता है।
+    on_snapshot  : async def on_snapshot(df) — हर बदली हुई Snapshot पर कॉल होता है
+    keep_running : async def keep_running() -> bool — False आते ही Stream बंद
+    feed_url     : दिया हो तो authorize की जगह सीधे यही wss URI
+    decode       : Binary Frame -> FeedResponse (default: upstox SDK का Protobuf)
+    """
+    seed = await get_option_chain_async(session, symbol, expiry)
+    if not seed:
+        logger.error(f"❌ [{symbol}] Stream Seed (REST) नहीं मिला।")
+        return
+
+    underlying_key = get_instrument_key(symbol)
+    live = LiveChain(seed, underlying_key, strikes_around_spot)
+    recorder = FrameRecorder(record_path) if record_path else None
+
+    # Seed को तुरंत Snapshot के रूप में भेजें
+    df = build_chain_df(live.to_response(), symbol, expiry)
+    if df is not None:
+        await on_snapshot(df)
+
+    # Authorized URI में ही Auth Code है, अलग Bearer Header नहीं चाहिए
+    feed_url = feed_url or await authorize_feed(session)
+    async with session.ws_connect(feed_url, headers={"Accept": "*/*"}, heartbeat=30) as ws:
+        subscribed = set(live.keys_near_spot())
+        atm = live.atm_index()
+        await ws.send_bytes(build_feed_request([underlying_key], "sub", "ltpc"))
+        await ws.send_bytes(build_feed_request(sorted(subscribed), "sub", "option_greeks"))
+        logger.info(f"📡 [{symbol}] Subscribed {len(subscribed)} option keys around spot {live.spot}")
+
+        async def emit_snapshot():
+            live.dirty = False
+            snapshot = build_chain_df(live.to_response(), symbol, expiry)
+            if snapshot is None:
+                return
+            try:
+                await on_snapshot(snapshot)
+            except Exception as e:
+                logger.error(f"❌ [{symbol}] Snapshot Save Error: {e}")
+
+        async def emit_snapshots():
+            while True:
+                await asyncio.sleep(snapshot_interval)
+                if keep_running is not None and not await keep_running():
+                    await ws.close()
+                    return
+                if live.dirty:
+                    await emit_snapshot()
+
+        emitter = asyncio.create_task(emit_snapshots())
+        try:
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.BINARY:
+                    if recorder is not None:
+                        recorder.write(msg.data)
+                    live.apply(decode(msg.data))
+
+                    # Spot दूसरी स्ट्राइक पर गया तो Subscription खिसकाएं
+                    new_atm = live.atm_index()
+                    if new_atm != atm:
+                        atm = new_atm
+                        wanted = set(live.keys_near_spot())
+                        added, removed = wanted - subscribed, subscribed - wanted
+                        if removed:
+                            await ws.send_bytes(build_feed_request(sorted(removed), "unsub"))
+                        if added:
+                            await ws.send_bytes(build_feed_request(sorted(added), "sub", "option_greeks"))
+                        subscribed = wanted
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+        finally:
+            emitter.cancel()
+            # बंद होने से पहले बचे हुए Ticks की आखिरी Snapshot
+            if live.dirty:
+                await emit_snapshot()
+            if recorder is not None:
+                recorder.close()
+            logger.info(f"📴 [{symbol}] Stream closed after {live.ticks} ticks.")
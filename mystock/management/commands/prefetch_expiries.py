@@ -0,0 +1,24 @@
+# prefetch_expiries.py
+# 🔹 Market खुलने से पहले पूरे Universe की Expiry Calendar भरें
+#    Usage:
+#      python manage.py prefetch_expiries            # आज की Calendar न हो तो ही फेच
+#      python manage.py prefetch_expiries --force    # सब दोबारा फेच
+from django.core.management.base import BaseCommand
+
+from .expiry_calendar import build_calendar_blocking, calendar_universe
+
+
+class Command(BaseCommand):
+    help = "सारे Underlyings की Expiries + Lot Size एक साथ फेच करके ExpiryCache में Bulk Upsert करता है"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="आज की Calendar हो तब भी दोबारा फेच करें")
+        parser.add_argument("--symbol", action="append", default=None, help="सिर्फ ये सिंबल्स (कई बार दे सकते हैं)")
+
+    def handle(self, *args, **options):
+        symbols = options["symbol"] or calendar_universe()
+        calendar = build_calendar_blocking(symbols, force=options["force"])
+        missing = sorted(set(symbols) - set(calendar))
+        self.stdout.write(self.style.SUCCESS(f"✅ Expiry Calendar: {len(calendar)}/{len(symbols)} underlyings"))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"⚠️ Expiries नहीं मिलीं: {', '.join(missing)}"))
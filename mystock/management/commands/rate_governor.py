@@ -0,0 +1,200 @@
+# rate_governor.py
+# 🔹 Upstox API कॉल्स के लिए साझा (Shared) Rate Governor
+#    Token Bucket + AIMD (Additive Increase / Multiplicative Decrease)
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+OPTION_CHAIN_ENDPOINT = "/v2/option/chain"
+OPTION_CONTRACT_ENDPOINT = "/v2/option/contract"
+
+# Upstox Standard APIs की documented limit: 50 requests/second
+DOCUMENTED_LIMITS = {
+    OPTION_CHAIN_ENDPOINT: 50.0,
+    OPTION_CONTRACT_ENDPOINT: 50.0,
+}
+
+
+class TokenBucket:
+    """
+    एक Endpoint का Token Bucket।
+    Token "रिज़र्व" होते हैं (tokens नेगेटिव भी जा सकते हैं), इसलिए
+    async और sync (thread) दोनों कॉलर्स एक ही बकेट शेयर कर सकते हैं।
+    `clock` (default time.monotonic) Tests में Fake Clock के लिए बदला जा सकता है।
+    """
+
+    def __init__(self, endpoint, max_rate, start_rate, min_rate,
+                 increase_step, decrease_factor, cooldown, clock=time.monotonic):
+        self.endpoint = endpoint
+        self.clock = clock
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = start_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+
+        self.tokens = 1.0
+        self.updated_at = clock()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+
+        self.success_count = 0
+        self.throttle_count = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        # Burst को 1 सेकंड के बराबर टोकन तक सीमित रखें
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self):
+        """एक टोकन रिज़र्व करता है और बताता है कि कितने सेकंड रुकना है"""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def pause_remaining(self):
+        return max(0.0, self.paused_until - self.clock())
+
+    def on_success(self):
+        """Additive Increase: हर सेकंड की सफल कॉल्स पर rate ~increase_step बढ़ता है"""
+        with self._lock:
+            self.success_count += 1
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step / self.rate)
+
+    def on_rate_limited(self, retry_after=None):
+        """Multiplicative Decrease: 429 पर rate घटाएं और पूरी पाइपलाइन को रोकें"""
+        with self._lock:
+            now = self.clock()
+            self.throttle_count += 1
+
+            # एक साथ आए कई 429 पर सिर्फ एक बार rate घटाएं
+            if now - self.last_decrease >= self.cooldown:
+                old_rate = self.rate
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self.last_decrease = now
+                logger.warning(
+                    f"🚦 429 on {self.endpoint}: rate {old_rate:.1f} -> {self.rate:.1f} req/s"
+                )
+
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            pause = retry_after if retry_after else 1.0 / self.rate
+            self.paused_until = max(self.paused_until, now + pause)
+
+
+class RateGovernor:
+    """
+    सभी Upstox कॉल्स (हर Endpoint के लिए अलग बकेट) का एक साझा नियंत्रक।
+    - acquire()          : async कॉलर्स के लिए
+    - acquire_blocking() : sync (requests) कॉलर्स के लिए
+    - on_success() / on_rate_limited() : Response के हिसाब से rate को ढालना
+    """
+
+    def __init__(self, limits=None, start_fraction=0.5, min_rate=1.0,
+                 increase_step=1.0, decrease_factor=0.5, cooldown=2.0, clock=time.monotonic):
+        self.limits = dict(limits or DOCUMENTED_LIMITS)
+        self.clock = clock
+        self.start_fraction = start_fraction
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._buckets = {}
+        self._lock = threading.Lock()
+        # Replay/Mock जैसे Offline मोड में Throttling बंद की जा सकती है
+        self.enabled = True
+
+    def bucket(self, endpoint):
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(endpoint)
+                if bucket is None:
+                    max_rate = self.limits.get(endpoint, min(self.limits.values()))
+                    bucket = TokenBucket(
+                        endpoint,
+                        max_rate=max_rate,
+                        start_rate=max(self.min_rate, max_rate * self.start_fraction),
+                        min_rate=self.min_rate,
+                        increase_step=self.increase_step,
+                        decrease_factor=self.decrease_factor,
+                        cooldown=self.cooldown,
+                        clock=self.clock,
+                    )
+                    self._buckets[endpoint] = bucket
+        return bucket
+
+    async def acquire(self, endpoint):
+        if not self.enabled:
+            return
+        bucket = self.bucket(endpoint)
+        wait = bucket.reserve()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            # सोते समय किसी और को 429 मिला हो तो पूरी पाइपलाइन रुकेगी
+            wait = bucket.pause_remaining()
+
+    def acquire_blocking(self, endpoint):
+        if not self.enabled:
+            return
+        bucket = self.bucket(endpoint)
+        wait = bucket.reserve()
+        while wait > 0:
+            time.sleep(wait)
+            wait = bucket.pause_remaining()
+
+    def on_success(self, endpoint):
+        self.bucket(endpoint).on_success()
+
+    def on_rate_limited(self, endpoint, retry_after=None):
+        self.bucket(endpoint).on_rate_limited(retry_after)
+
+    def current_rate(self, endpoint):
+        return self.bucket(endpoint).rate
+
+    def snapshot(self):
+        """हर Endpoint का मौजूदा rate और counters (Logging/Dashboard के लिए)"""
+        return {
+            endpoint: {
+                "rate": round(b.rate, 2),
+                "max_rate": b.max_rate,
+                "ok": b.success_count,
+                "throttled": b.throttle_count,
+                "paused_for": round(b.pause_remaining(), 2),
+            }
+            for endpoint, b in self._buckets.items()
+        }
+
+
+def parse_retry_after(headers, now=None):
+    """
+    Retry-After हेडर सेकंड्स में: "5" जैसी संख्या, या HTTP-date ("Wed, 21 Oct 2026 07:28:00 GMT")
+    जिसका `now` (Unix Time, default अभी) से बचा समय। न हो / पढ़ा न जाए तो None।
+    """
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+# पूरी प्रोसेस के लिए एक ही Governor (सभी सिंबल्स और लूप्स इसे शेयर करते हैं)
+governor = RateGovernor()
@@ -4,20 +4,37 @@ import time as t_time
 import aiohttp
 import os
 import sys
+from collections import defaultdict
 from datetime import datetime, time as dt_time
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from asgiref.sync import sync_to_async
-from datetime import timedelta
 from .async_live import (
-    save_sr_async_wrapper,
-    get_smart_expiry,
-    calculate_data_async_optimized,
+    compute_chain_async,
     load_master_contract,
-    save_temp_async_wrapper
+    refresh_master_contract,
+    save_changed_temp_rows,
+    save_full_temp_chain,
 )
+from mystock.chain_blob import encode_frame
+from mystock.temp_chain import collect_garbage
+from mystock.upstox_contract import expiry_cache, get_smart_expiry, get_storage_key
+from .chain_compute import compute_pool
+from .chain_diff import SnapshotDiffer
+from .db_writer import DBWriter
+from .history_store import HistoryStore, KEEP_DAYS, RAW_WINDOW_MINUTES
+from .batch_compute import chain_batcher
+from .expiry_calendar import refresh_calendar, calendar_universe
+from .loop_lag import LoopLagMonitor
+from .rate_governor import governor
+from .worker_pool import run_scheduled_pool
+from .tier_scheduler import RefreshScheduler, TIER_INTERVALS, TIER_EXPIRIES
+from . import api_capture
+from .api_capture import ReplayStore, ReplaySession, RecordingSession, ResponseRecorder
+from .nifty_stream import stream_option_chain
+from .sync_instruments import sync_registry
 from .symbol import symbols as all_symbols
-from mystock.models import OptionChain, SyncControl, SupportResistance
+from mystock.models import ChainSnapshot, SyncControl, SupportResistance, SupportResistanceLatest
 
 # Logging setup
 log_dir = os.path.join(os.getcwd(), 'logs')
@@ -34,43 +51,135 @@ logger = logging.getLogger(__name__)
 
 
 
-bulk_create_async = sync_to_async(OptionChain.objects.bulk_create)
 get_control_async = sync_to_async(SyncControl.objects.get_or_create)
 
+def build_chain_snapshot(df, symbol, expiry):
+    """
+    कैलकुलेटेड DataFrame -> ChainSnapshot (Header + पूरी चेन एक Compressed Blob में), अभी Save नहीं।
+    एक फेच = एक रो, इसलिए Writer बाकी रो के साथ एक ही Bulk Insert कर देता है।
+    """
+    return ChainSnapshot(
+        symbol=symbol,
+        expiry_date=expiry,
+        spot_price=float(df['Spot_Price'].iloc[0]),
+        fetched_at=df['Time'].iloc[0],
+        blob=encode_frame(df),
+    )
+
 class Command(BaseCommand):
     help = 'High-Speed Async Engine with Smart Expiry'
     
     # FIXED variables हटा दें, अब हम डायनामिक लाएंगे
     FIXED_SYMOL = "NIFTY" 
+    # others_sr_loop में एक साथ चलने वाले Workers (पहले batch_size = 20 था)
+    WORKER_COUNT = 20
+    # Top OI वाले कितने स्टॉक्स hot Tier (30s) में रहें
+    HOT_TIER_SIZE = 30
+    # हर Window के बाद Control/Trading Hours चेक और Stats लॉग
+    SCHEDULER_WINDOW = 30
+    # --stream / --capture / --replay जैसे CLI ऑप्शन्स (handle() में भरे जाते हैं)
+    options = {}
+    # Replay में सारे Sleeps/Intervals इस गुणक से छोटे होते हैं (1 = असली समय, 0 = Max Speed)
+    time_scale = 1.0
     # Trading hours: 9:15 AM to 3:30 PM
-    is_trading_hours = lambda self: dt_time(8, 15) <= datetime.now().time() <= dt_time(15, 30)
+    # (Replay में मार्केट टाइम की शर्त नहीं, ताकि Offline भी चल सके)
+    is_trading_hours = lambda self: api_capture.active_replay is not None or dt_time(8, 15) <= datetime.now().time() <= dt_time(15, 30)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # हर Stage में लगा कुल समय (सेकंड्स) — Logging और bench_sync के लिए
+        self.stage_times = defaultdict(float)
+        # हर (सिंबल, Expiry) की आखिरी लिखी चेन: बिना बदली चेन की Calculation/Writes छोड़ने के लिए
+        self.differ = SnapshotDiffer()
+        # सारे DB Writes एक ही Writer Stage से (Batch में, एक Transaction प्रति Flush)
+        self.writer = DBWriter()
+        # Intraday History: Raw Window + 1-minute / 5-minute Tiers (5 मिनट वाली Delete की जगह)
+        self.history = HistoryStore()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stream', action='store_true',
+                            help='NIFTY को REST Polling की जगह WebSocket Feed से स्ट्रीम करें')
+        parser.add_argument('--stream-interval', type=float, default=1.0,
+                            help='Stream मोड में Snapshot सेव करने का अंतराल (सेकंड्स)')
+        parser.add_argument('--stream-strikes', type=int, default=20,
+                            help='Spot के ऊपर/नीचे कितनी स्ट्राइक्स Subscribe करनी हैं')
+        parser.add_argument('--record-frames',
+                            help='Stream के Raw Frames इस फाइल में रिकॉर्ड करें (feed_replay के लिए)')
+        parser.add_argument('--capture',
+                            help='Option Chain/Contract के Raw Responses इस डायरेक्टरी में रिकॉर्ड करें')
+        parser.add_argument('--replay',
+                            help='असली API की जगह इस Capture डायरेक्टरी से Responses परोसें')
+        parser.add_argument('--replay-speed', type=float, default=1.0,
+                            help='Replay स्पीड (1 = रिकॉर्डेड समय, 60 = 60 गुना तेज़, 0 = Max Speed)')
+        parser.add_argument('--max-expiries', type=int, default=None,
+                            help='हर सिंबल की अधिकतम कितनी Expiries फेच हों (default: Tier Policy, TIER_EXPIRIES)')
+        parser.add_argument('--compute-workers', type=int, default=None,
+                            help='Parse/Calculation के Process Pool Workers (default: CPU cores, 0 = Event Loop पर ही)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='एक Compute Batch में अधिकतम कितनी चेन (default: 64, 0/1 = हर चेन अलग)')
+        parser.add_argument('--batch-delay-ms', type=float, default=None,
+                            help='Batch भरने के लिए अधिकतम इंतज़ार (ms, default: 50)')
+        parser.add_argument('--history-raw-minutes', type=int, default=RAW_WINDOW_MINUTES,
+                            help='कितने मिनट की History पूरी Resolution में रहे (उसके बाद 1-minute Tier)')
+        parser.add_argument('--history-days', type=int, default=KEEP_DAYS,
+                            help='पिछले Sessions की 5-minute History कितने दिन रखें')
 
     def handle(self, *args, **options):
+        self.options = options
         logger.info('🚀 Starting High-Speed Async Engine...') 
+        # 0 भी वैलिड है (--history-days 0 = सिर्फ आज), इसलिए `or` नहीं
+        raw_minutes, keep_days = options.get('history_raw_minutes'), options.get('history_days')
+        self.history = HistoryStore(
+            raw_window_minutes=RAW_WINDOW_MINUTES if raw_minutes is None else raw_minutes,
+            keep_days=KEEP_DAYS if keep_days is None else keep_days,
+        )
+        compute_pool.configure(options.get('compute_workers'))
+        compute_pool.warm_up()
+        delay_ms = options.get('batch_delay_ms')
+        chain_batcher.configure(options.get('batch_size'), delay_ms / 1000 if delay_ms is not None else None)
+        logger.info(f"🧮 Compute Pool: {compute_pool.workers} worker process(es) | "
+                    f"Batch: {chain_batcher.max_batch if chain_batcher.enabled else 'off'}")
         try:
             asyncio.run(self.main_loop())
         except KeyboardInterrupt:
             logger.warning('Stopped by user.')
+        finally:
+            compute_pool.shutdown()
 
-    # 1. शुरुआत में एक बार लोड करें
-    load_master_contract()
     async def main_loop(self):
+        # 1. शुरुआत में एक बार लोड करें (Import पर नहीं, ताकि Import सस्ता रहे)
+        await sync_to_async(load_master_contract)()
+
         other_symbols = [s for s in all_symbols if s != "NIFTY"]
-        
-        logger.info('⏳ Fetching Smart Expiries...')
-        
-        # --- NIFTY Expiry Fetch ---
-        # get_smart_expiry लिस्ट देता है, हमें पहली डेट [0] चाहिए (Current Week)
-        nifty_list = await sync_to_async(get_smart_expiry)("NIFTY")
+
+        # Event Loop कितना Block हो रहा है, हर Window के साथ लॉग होता है
+        self.loop_lag = LoopLagMonitor().start()
+
+        try:
+            async with self.open_session() as session:
+                await self.run_session(session, other_symbols)
+        finally:
+            # Replay खत्म / Ctrl-C / Expiry न मिलने पर भी Queue में बचे Writes (GC / Compaction Calls समेत)
+            # Loop बंद होने से पहले लिखे जाएं — वरना asyncio.run Writer Task को बीच में ही Cancel कर देता है
+            await self.writer.close()
+
+    async def run_session(self, session, other_symbols):
+        """Calendar, Expiries और NIFTY / Others Loops (एक खुले Session पर)"""
+        # --- पूरे Universe की Expiry Calendar (आज की DB में हो तो वही, वरना एक साथ फेच) ---
+        logger.info('⏳ Building Expiry Calendar...')
+        await refresh_calendar(session, calendar_universe())
+
+        # get_smart_expiry अब Memory से (Calendar ने Cache भर दिया है)
+        # NIFTY: पहली डेट [0] = Current Week
+        nifty_list = await sync_to_async(get_smart_expiry)("NIFTY", wait=True)
         if nifty_list:
             nifty_expiry = nifty_list[0] # Current Expiry
         else:
             logger.error("❌ NIFTY Expiry not found!")
             return
 
-        # --- STOCKS Expiry Fetch ---
-        # किसी भी एक स्टॉक का नाम भेजें, यह DB में 'STOCK_MONTHLY' चेक करेगा
-        stock_list = await sync_to_async(get_smart_expiry)(other_symbols[0])
+        # --- STOCKS Expiry (पहले की तरह RELIANCE की Current Monthly) ---
+        stock_list = await sync_to_async(get_smart_expiry)("RELIANCE", wait=True)
         if stock_list:
             common_expiry = stock_list[0] # Current Monthly Expiry
         else:
@@ -79,13 +188,47 @@ class Command(BaseCommand):
 
         logger.info(f"✅ NIFTY Expiry: {nifty_expiry} | Stocks Expiry: {common_expiry}")
 
-        async with aiohttp.ClientSession() as session:
-            await asyncio.gather(
-                # NIFTY loop में डायनामिक expiry भेजें
-                self.nifty_loop(session, nifty_expiry, self.FIXED_SYMOL),
-                # Others loop में डायनामिक common_expiry भेजें
-                self.others_sr_loop(session, other_symbols, common_expiry)
-            )
+        loops = asyncio.gather(
+            # NIFTY loop में डायनामिक expiry भेजें (--stream हो तो WebSocket मोड)
+            self.nifty_stream_loop(session, nifty_expiry, self.FIXED_SYMOL)
+            if self.options.get('stream') else
+            self.nifty_loop(session, nifty_expiry, self.FIXED_SYMOL),
+            # Others loop में डायनामिक common_expiry भेजें
+            self.others_sr_loop(session, other_symbols, common_expiry)
+        )
+        if api_capture.active_replay is None:
+            await loops
+            return
+
+        # Replay: रिकॉर्डिंग खत्म होते ही लूप्स रोककर Throughput रिपोर्ट करें
+        store = api_capture.active_replay
+        while not store.finished and not loops.done():
+            await asyncio.sleep(0.5)
+        loops.cancel()
+        await asyncio.gather(loops, return_exceptions=True)
+        # Report में वही Writes गिनें जो सच में DB तक पहुंचे
+        await self.writer.drain()
+        logger.info(f"📼 Replay Finished: {store.stats()}")
+
+    def open_session(self):
+        """असली aiohttp Session, या --capture/--replay के हिसाब से लपेटा हुआ Session"""
+        opts = self.options
+        if opts.get('replay'):
+            if opts.get('stream'):
+                raise CommandError("--stream और --replay एक साथ नहीं चल सकते (Feed Replay के लिए feed_replay देखें)।")
+            store = ReplayStore(opts['replay'], speed=opts.get('replay_speed') or 0.0)
+            api_capture.active_replay = store
+            self.time_scale = (1.0 / store.speed) if store.speed else 0.0
+            # Replay में असली Upstox कॉल नहीं होती, इसलिए Rate Limit का कोई मतलब नहीं
+            governor.enabled = False
+            return ReplaySession(store)
+
+        session = aiohttp.ClientSession()
+        if opts.get('capture'):
+            api_capture.active_recorder = ResponseRecorder(opts['capture'])
+            logger.info(f"🎙️ Capturing API responses to {opts['capture']}")
+            return RecordingSession(session, api_capture.active_recorder)
+        return session
     
 
     async def nifty_loop(self, session, expiry, fixes_sym):
@@ -98,87 +241,176 @@ class Command(BaseCommand):
 
             if self.is_trading_hours():
                 try:
-                    # =========================================================
-                    # 🧹 CLEANUP: Delete data older than 30 MINUTES for NIFTY
-                                       
-                    #  30 मिनट सेट किया
-                    cutoff_time = timezone.now() - timedelta(minutes=5)
-                    
-                    # print(f"♻️ Cleaning NIFTY data older than 30 mins...")
-
-                    # DB Query को sync_to_async में डाला ताकि लूप फास्ट रहे
-                    await sync_to_async(OptionChain.objects.filter(Symbol="NIFTY", Time__lt=cutoff_time).delete)()
-
-                    df = await calculate_data_async_optimized(session, fixes_sym, expiry)
+                    # पुराने Snapshots अब यहाँ Delete नहीं होते: History Compaction (others_sr_loop Window)
+                    result = await compute_chain_async(session, fixes_sym, expiry, with_sr=False)
+                    df = result.df if result is not None else None
                     if df is not None and not df.empty:
-                        entries = [OptionChain(
-                            Time=row.get('Time'),
-                            Symbol=row.get('Symbol'),
-                            Expiry_Date=expiry,
-                            Strike_Price=row.get('Strike_Price'),
-                            Spot_Price=row.get('Spot_Price'),
-                            # CE Data
-                            CE_Delta=row.get('CE_Delta'),
-                            CE_RANGE=row.get('CE_RANGE'),
-                            CE_IV=row.get('CE_IV'),
-                            CE_COI_percent=row.get('CE_COI_percent'),
-                            CE_COI=row.get('CE_COI'),
-                            CE_OI_percent=row.get('CE_OI_percent'),
-                            CE_OI=row.get('CE_OI'),
-                            CE_Volume_percent=row.get('CE_Volume_percent'),
-                            CE_Volume=row.get('CE_Volume'),
-                            CE_CLTP=row.get('CE_CLTP'),
-                            CE_LTP=row.get('CE_LTP'),
-                            Reversl_Ce=row.get('Reversl_Ce'),
-
-                            # PE Data
-                            Reversl_Pe=row.get('Reversl_Pe'),
-                            PE_LTP=row.get('PE_LTP'),
-                            PE_CLTP=row.get('PE_CLTP'),
-                            PE_Volume=row.get('PE_Volume'),
-                            PE_Volume_percent=row.get('PE_Volume_percent'),
-                            PE_OI=row.get('PE_OI'),
-                            PE_OI_percent=row.get('PE_OI_percent'),
-                            PE_COI=row.get('PE_COI'),
-                            PE_COI_percent=row.get('PE_COI_percent'),
-                            PE_IV=row.get('PE_IV'),
-                            PE_RANGE=row.get('PE_RANGE'),
-                            PE_Delta=row.get('PE_Delta'),
-                        ) for _, row in df.iterrows()]
-                        await bulk_create_async(entries)
-                        print(f"⚡ [NIFTY] Processed expiry {expiry} - {len(entries)} entries.")
+                        # Header + Blob एक ही रो (Dashboard Snapshot Id से पढ़ता है)
+                        await self.writer.add_row(build_chain_snapshot(df, fixes_sym, expiry))
+                        print(f"⚡ [NIFTY] Processed expiry {expiry} - {len(df)} entries.")
                 except Exception as e:
                     logger.error(f"NIFTY Loop Error: {e}")
             else:
                 print("⏸️  NIFTY Loop Outside Trading Hours.")
-            await asyncio.sleep(5)
+            await asyncio.sleep(5 * self.time_scale)
 
-    async def others_sr_loop(self, session, symbols, expiry):
-        """Modified Loop: Process 10 symbols, wait 2s, repeat."""
-        
-        # =========================================================
-        # 🧹 CLEANUP: Delete data older than 1 hour for this Symbol
-        # =========================================================
-        cutoff_time = timezone.now() - timedelta(minutes=5)
-        print(f"♻️ Cleaning Stocks data older than 30 mins...")
-        # सिंबल के हिसाब से पुराना डेटा डिलीट करें ताकि DB भारी न हो
-        await sync_to_async(SupportResistance.objects.filter(Time__lt=cutoff_time).delete)()
-        
-        # Helper function - removed semaphore since batching controls load
-        async def process_one(sym):
+    async def nifty_stream_loop(self, session, expiry, fixes_sym):
+        """NIFTY Stream Loop - WebSocket Ticks से In-Memory चेन, हर stream-interval पर Snapshot"""
+        opts = self.options
+
+        async def keep_running():
+            ctrl, _ = await get_control_async(name="nifty_loop")
+            return ctrl.is_active and self.is_trading_hours()
+
+        async def on_snapshot(df):
+            await self.writer.add_row(build_chain_snapshot(df, fixes_sym, expiry))
+
+        while True:
+            if not await keep_running():
+                print(f"⏸️  {fixes_sym} Stream Paused / Outside Trading Hours.")
+                await asyncio.sleep(10); continue
             try:
-                df = await calculate_data_async_optimized(session, sym, expiry)
-                if df is not None and not df.empty:
-                    # 1. Save Support Resistance (Existing)
-                    await save_sr_async_wrapper(df, sym)
-
-                    # 2. Save FULL DATA to TempOptionChain (New)
-                    await save_temp_async_wrapper(df, sym)
-                    return True
+                await stream_option_chain(
+                    session, fixes_sym, expiry, on_snapshot,
+                    snapshot_interval=opts.get('stream_interval') or 1.0,
+                    strikes_around_spot=opts.get('stream_strikes') or 20,
+                    record_path=opts.get('record_frames'),
+                    keep_running=keep_running,
+                )
             except Exception as e:
-                logger.error(f"Error {sym}: {e}")
+                logger.error(f"NIFTY Stream Error: {e}")
+            # Disconnect के बाद थोड़ा रुककर दोबारा Connect करें
+            await asyncio.sleep(5)
+
+    async def process_symbol(self, session, sym, expiry, scheduler=None, extra_expiries=()):
+        """
+        एक सिंबल: फेच + कैलकुलेशन + सेव (Worker Pool का handler)।
+        `expiry` मुख्य (सबसे नज़दीकी) Expiry है — Support/Resistance और Tier इसी से;
+        `extra_expiries` की चेन साथ-साथ (उसी Session + Governor से) सिर्फ TempOptionChain में जाती हैं।
+        जो चेन पिछली Sweep जैसी ही है (Fingerprint वही) उसकी Calculation और Writes दोनों छूट जाते हैं,
+        आंशिक बदलाव पर सिर्फ बदली स्ट्राइक्स लिखी जाती हैं।
+        """
+        # concurrency Worker Pool और rate Governor संभालते हैं
+        differ = self.differ
+        try:
+            started = t_time.perf_counter()
+            # फेच + Compute Pool में Parse/Calculation/SR (सारी Expiries एक साथ)
+            results = await asyncio.gather(
+                compute_chain_async(session, sym, expiry, previous=differ.previous(sym, expiry)),
+                *(compute_chain_async(session, sym, exp, with_sr=False, previous=differ.previous(sym, exp))
+                  for exp in extra_expiries),
+                return_exceptions=True,
+            )
+            self.stage_times['fetch'] += t_time.perf_counter() - started
+            result = results[0] if not isinstance(results[0], BaseException) else None
+
+            started = t_time.perf_counter()
+            for exp, extra in zip(extra_expiries, results[1:]):
+                if isinstance(extra, BaseException):
+                    logger.error(f"Error {sym} ({exp}): {extra}")
+                elif extra is not None:
+                    await self.store_chain(sym, exp, extra)
+
+            if result is not None and result.unchanged:
+                # चेन नहीं बदली: Tier में बदलाव 0, DB में कुछ नहीं लिखना
+                differ.skip(sym, expiry)
+                if scheduler is not None:
+                    scheduler.record_unchanged(sym)
+                self.stage_times['db'] += t_time.perf_counter() - started
+                return True
+
+            df = result.df if result is not None else None
+            if df is not None and not df.empty:
+                # 0. चेन कितनी बदली, उसके हिसाब से सिंबल का Tier अपडेट करें
+                if scheduler is not None:
+                    scheduler.record_chain(sym, df)
+
+                # 1. Save Support Resistance (Worker में पहले से कैलकुलेटेड) — Writer Queue में:
+                #    History रो + उसी Flush Transaction में सिंबल की Latest रो का Upsert
+                if result.sr is not None:
+                    now = timezone.localtime()
+                    await self.writer.add_row(SupportResistance(Time=now, **result.sr))
+                    await self.writer.add_row(SupportResistanceLatest(Time=now, **result.sr), unique_fields=('Symbol',))
+
+                # 2. Save FULL / बदली हुई DATA to TempOptionChain
+                await self.store_chain(sym, expiry, result)
+                self.stage_times['db'] += t_time.perf_counter() - started
+                return True
+            self.stage_times['db'] += t_time.perf_counter() - started
+        except Exception as e:
+            logger.error(f"Error {sym}: {e}")
+        return False
+
+    async def store_chain(self, sym, expiry, result):
+        """
+        एक (सिंबल, Expiry) की चेन TempOptionChain (और History Blob) के लिए Writer Queue में: पहली बार / स्ट्राइक्स
+        बदलीं तो पूरी, वरना सिर्फ बदली रो। Fingerprint वही हो तो कुछ नहीं।
+        """
+        differ = self.differ
+        if result.unchanged:
+            differ.skip(sym, expiry)
+            return True
+        df = result.df
+        if df is None or df.empty:
             return False
 
+        mask = differ.changed_rows(sym, expiry, df)
+        # Writer FIFO है, इसलिए Differ Queue में गए Write को ही "लिखा हुआ" मानता है;
+        # Write नाकाम हो तो भूल जाता है और अगली बार पूरी चेन लिखी जाती है
+        differ.commit(sym, expiry, result.fingerprint, df, mask)
+
+        def on_done(ok):
+            if not ok:
+                differ.forget(sym, expiry)
+
+        if mask is None:
+            await self.writer.add_call(save_full_temp_chain, df, sym, on_done=on_done)
+        else:
+            await self.writer.add_call(save_changed_temp_rows, df, sym, mask, on_done=on_done)
+        # History: बदली हुई हर चेन का एक Blob Snapshot (बिना बदली चेन का कोई नहीं)
+        await self.writer.add_row(build_chain_snapshot(df, sym, expiry))
+        return True
+
+    async def refresh_instruments(self):
+        """
+        नए दिन: Master Contract का Conditional Refresh (Download Event Loop और DB Thread से बाहर)
+        और Instrument Registry का Sync, बाकी Writes की तरह Writer Queue से।
+        """
+        index = await sync_to_async(refresh_master_contract, thread_sensitive=False)()
+        if index is not None:
+            await self.writer.add_call(sync_registry, index)
+
+    def expiries_for(self, sym, scheduler, fallback):
+        """
+        Tier Policy के हिसाब से सिंबल की सबसे नज़दीकी K Expiries (Expiry Calendar की Memory से)।
+        Calendar में न हो तो सिर्फ `fallback` (Common Expiry)।
+        """
+        today_str = str(timezone.localdate())
+        calendar = [e for e in (expiry_cache.peek(get_storage_key(sym)) or []) if e >= today_str]
+        if not calendar:
+            return [fallback]
+        k = TIER_EXPIRIES[scheduler.tier_of(sym)]
+        if self.options.get('max_expiries'):
+            k = min(k, self.options['max_expiries'])
+        return calendar[:max(1, k)]
+
+    async def others_sr_loop(self, session, symbols, expiry):
+        """
+        Tiered Loop: हर सिंबल अपने Tier के Interval पर रिफ्रेश होता है
+        (Indices 5s, Top OI स्टॉक्स 30s, बाकी 3 min)। Workers Deadline-Heap से सिंबल उठाते हैं।
+        """
+
+        scheduler = RefreshScheduler(
+            symbols,
+            intervals={tier: sec * self.time_scale for tier, sec in TIER_INTERVALS.items()},
+            hot_size=self.HOT_TIER_SIZE,
+        )
+        window = max(1.0, self.SCHEDULER_WINDOW * self.time_scale)
+
+        async def process_one(sym):
+            expiries = self.expiries_for(sym, scheduler, expiry)
+            return await self.process_symbol(session, sym, expiries[0], scheduler, expiries[1:])
+
         while True:
             ctrl, _ = await get_control_async(name="others_loop")
             if not ctrl.is_active:
@@ -187,47 +419,33 @@ class Command(BaseCommand):
             
             if self.is_trading_hours():
                 try:
-                    start_time = t_time.time()
-                    logger.info("--- Batched Sync Started ---")
-                    
-                    total_success = 0
-                    batch_size = 20
-                    
-                    # --- BATCHING LOGIC START ---
-                    for i in range(0, len(symbols), batch_size):
-                        batch_start_time = t_time.time() # ⏱️ सिर्फ इस बैच का टाइमर स्टार्ट
-                        # 1. Create a batch of 10
-                        batch = symbols[i : i + batch_size]
-                        
-                        # 2. Process this batch concurrently
-                        tasks = [process_one(sym) for sym in batch]
-                        results = await asyncio.gather(*tasks)
-                        
-                        # 3. Count success
-                        total_success += sum(1 for r in results if r)
-                        # टाइम कैलकुलेशन
-                        current_time = t_time.time()
-                        batch_duration = current_time - batch_start_time  # इस बैच का समय
-                        total_symbols_processed = i + len(batch)
-                        # --- YOUR PRINT STATEMENT HERE ---
-                        print(
-                            f"batch {i//batch_size + 1} completed | "
-                            f"Batch Time: {batch_duration:.2f}s | "  # यहाँ सिर्फ इस बैच का टाइम आएगा
-                            f"Success so far: {total_success}/{total_symbols_processed} symbols"
-                        )
-
-                        # 4. Wait 2 seconds before next batch (but skip sleep after last batch)
-                        if i + batch_size < len(symbols):
-                            await asyncio.sleep(0)
-                    # --- BATCHING LOGIC END ---
-                    
-                    duration = t_time.time() - start_time
-                    logger.info(f"🚀 Cycle Completed: expiry:{expiry} | {total_success}/{len(symbols)} symbols in {duration:.2f}s")
+                    # दिन की पहली Window से पहले: आज का Master Contract और Registry (Redeploy के बिना)
+                    await self.refresh_instruments()
+
+                    # --- TIERED WORKER POOL LOGIC ---
+                    # Workers SCHEDULER_WINDOW सेकंड तक Heap से due सिंबल उठाते रहते हैं,
+                    # फिर हम Control/Trading Hours दोबारा चेक करते हैं
+                    stats = await run_scheduled_pool(
+                        scheduler, process_one,
+                        concurrency=self.WORKER_COUNT, window=window,
+                    )
+
+                    if stats.total:
+                        for line in stats.worker_lines():
+                            logger.info(line)
+                        logger.info(f"🚀 Window Completed: expiry:{expiry} | {stats.summary()}")
+                        logger.info(f"📊 Tiers: {scheduler.tier_counts()} | 🚦 Rate Governor: {governor.snapshot()}")
+                        logger.info(f"⏱️ Loop Lag: {self.loop_lag.drain()}")
+                        logger.info(f"🧮 Batch Compute: {chain_batcher.snapshot()}")
+                        logger.info(f"♻️ Unchanged Chains: {self.differ.snapshot()}")
+                        logger.info(f"💾 DB Writer: {self.writer.snapshot()}")
+
+                    # TempOptionChain के पुराने Snapshot Versions हर Window के बाद एक साथ हटें (उसी Writer से)
+                    await self.writer.add_call(collect_garbage)
+                    # NIFTY चेन + SR History: जो Buckets अभी Raw Window / आज के Session से बाहर हुए, उन्हीं का Compaction
+                    await self.writer.add_call(self.history.compact)
                 except Exception as e:
                     print(f"Others Loop Error: {e}") 
-                # Full cycle sleep (can adjust this if needed)
-                await asyncio.sleep(180)
             else:
                 print("⏸️  Others Loop Outside Trading Hours.")
                 await asyncio.sleep(5) 
-            
\ No newline at end of file
@@ -0,0 +1,80 @@
+# startup_profile.py
+# 🔹 Boot Path का Import-Time Profile
+#    एक नई Python प्रोसेस में `-X importtime` के साथ Django Setup + दिए गए Modules Import करता है
+#    और हर Module का Import समय (cumulative / self) दिखाता है।
+#    Usage:
+#      python manage.py startup_profile                       # Web Boot (wsgi + urls + views)
+#      python manage.py startup_profile --target mystock.management.commands.run_sync_async
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Web Worker पहली Request तक यही लोड करता है
+WEB_TARGETS = ("myproject.wsgi", settings.ROOT_URLCONF, "mystock.views")
+
+# ये Web Boot में नहीं होने चाहिए (Ingestion Tier के भारी Dependencies)
+HEAVY_MODULES = ("pandas", "numpy", "aiohttp", "requests", "mystock.management.commands.async_live")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """`-X importtime` का आउटपुट -> {module: (self_us, cumulative_us)}"""
+    rows = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Django Boot और Modules का Import Time (per module) और Memory रिपोर्ट करता है"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", default=None,
+                            help="Import करने वाला Module (कई बार दे सकते हैं; default: Web Boot Path)")
+        parser.add_argument("--top", type=int, default=25, help="कितने सबसे धीमे Modules दिखाएं")
+
+    def handle(self, *args, **options):
+        targets = options["target"] or list(WEB_TARGETS)
+        code = (
+            "import django, importlib; django.setup(); "
+            f"[importlib.import_module(m) for m in {targets!r}]"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "myproject.settings"))
+
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              capture_output=True, text=True, env=env)
+        wall = time.perf_counter() - started
+        # Linux पर ru_maxrss KB में
+        max_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+        rows = parse_importtime(proc.stderr)
+        if proc.returncode != 0:
+            # Non-zero Exit, ताकि CI / Scripts टूटा Boot पकड़ सकें
+            errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+            raise CommandError(f"❌ Boot failed (exit {proc.returncode}):\n" + "\n".join(errors[-15:]))
+
+        self.stdout.write(f"🎯 Targets: {', '.join(targets)}")
+        self.stdout.write(f"⏱️ Process wall time: {wall * 1000:.0f} ms | Max RSS: {max_rss_mb:.0f} MB | "
+                          f"Modules imported: {len(rows)}")
+        self.stdout.write("")
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        ranked = sorted(rows.items(), key=lambda item: item[1][1], reverse=True)
+        for module, (self_us, cumulative_us) in ranked[:options["top"]]:
+            self.stdout.write(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {module}")
+
+        heavy = [m for m in HEAVY_MODULES if m in rows]
+        self.stdout.write("")
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"⚠️ Heavy modules loaded: {', '.join(heavy)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ कोई Heavy Module लोड नहीं हुआ"))
@@ -0,0 +1,54 @@
+# sync_instruments.py
+# 🔹 Master Contract -> Instrument Registry (DB) का रोज़ का Bulk Sync
+#    Deploy पर start.sh चलाता है; चलता हुआ run_sync_async हर नए दिन Master Contract ताज़ा होने पर
+#    sync_registry() अपने DB Writer से खुद चलाता है (Lot Size बदलाव / नई Listings बिना Redeploy)।
+#    Usage:
+#      python manage.py sync_instruments            # Cache ताज़ा करके Registry भरें
+#      python manage.py sync_instruments --force    # Conditional Request छोड़कर पूरा Download
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from mystock.instrument_registry import registry
+from mystock.models import Instrument
+
+from .master_contract import refresh_cache, load_instrument_index
+
+BATCH_SIZE = 2000
+
+
+def sync_registry(index):
+    """Index की सारी रो से पूरी Registry बदलें (एक Transaction में); कितने सिंबल लिखे, लौटाता है"""
+    today = timezone.localdate()
+    rows = [
+        Instrument(symbol=sym, instrument_key=key, name=(name or "")[:150], lot_size=lot_size, updated=today)
+        for sym, key, name, lot_size in index.registry_rows()
+    ]
+
+    # पूरी Registry एक Transaction में बदलें, ताकि पढ़ने वाले कभी आधी टेबल न देखें
+    with transaction.atomic():
+        Instrument.objects.all().delete()
+        Instrument.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    registry.clear()
+    return len(rows)
+
+
+class Command(BaseCommand):
+    help = "Master Contract से Instrument Registry (symbol -> key, lot size) को Bulk में भरता है"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+                            help="ETag/Last-Modified को नज़रअंदाज़ कर पूरा Master Contract डाउनलोड करें")
+
+    def handle(self, *args, **options):
+        if options["force"]:
+            refresh_cache(force=True)
+
+        index = load_instrument_index()
+        if index is None or not len(index):
+            raise CommandError("Master Contract उपलब्ध नहीं, Registry अपडेट नहीं हुई")
+
+        count = sync_registry(index)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Instrument Registry: {count} symbols ({len(index)} trading symbols से)"
+        ))
@@ -0,0 +1,154 @@
+# tier_scheduler.py
+# 🔹 Priority-Tiered Refresh Scheduler
+#    हर सिंबल एक Tier में रहता है (fast / hot / normal) और Deadline-ordered Heap
+#    तय करता है कि अगला कौन सा सिंबल फेच होगा। API का बजट वहाँ जाता है जहाँ डेटा तेज़ी से बदलता है।
+import asyncio
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+TIER_FAST = "fast"
+TIER_HOT = "hot"
+TIER_NORMAL = "normal"
+
+# Tier -> Refresh Interval (सेकंड्स)
+TIER_INTERVALS = {
+    TIER_FAST: 5,
+    TIER_HOT: 30,
+    TIER_NORMAL: 180,
+}
+TIER_ORDER = [TIER_NORMAL, TIER_HOT, TIER_FAST]  # धीमे से तेज़
+
+# Tier -> हर Refresh पर कितनी (सबसे नज़दीकी) Expiries फेच हों
+TIER_EXPIRIES = {
+    TIER_FAST: 4,
+    TIER_HOT: 3,
+    TIER_NORMAL: 2,
+}
+
+INDEX_SYMBOLS = ("NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY")
+
+
+def chain_change(prev, curr):
+    """
+    दो फेच के बीच चेन कितनी बदली (0 = कुछ नहीं, 1 = पूरी तरह नई)।
+    OI और LTP के relative बदलाव में से जो बड़ा हो वही लेते हैं।
+    """
+    if prev is None or curr is None or prev.shape != curr.shape:
+        return 1.0  # स्ट्राइक्स बदल गईं, पूरी चेन नई मानें
+    diff = np.abs(curr - prev).sum(axis=0)
+    base = np.abs(prev).sum(axis=0)
+    ratios = np.divide(diff, base, out=np.zeros_like(diff), where=base > 0)
+    return float(ratios.max()) if ratios.size else 0.0
+
+
+class RefreshScheduler:
+    """
+    - Indices हमेशा fast Tier में।
+    - Total OI के हिसाब से Top `hot_size` स्टॉक्स hot Tier में, बाकी normal।
+    - अगर किसी सिंबल की चेन पिछले फेच से बहुत बदली है, तो वह ऊपर के Tier में चला जाता है
+      और शांत होते ही वापस अपने base Tier में आ जाता है।
+    - `clock` (default time.monotonic) सारी Deadlines का समय; Tests में Fake Clock।
+    """
+
+    def __init__(self, symbols, intervals=None, hot_size=30,
+                 hot_change=0.01, fast_change=0.05, index_symbols=INDEX_SYMBOLS, clock=time.monotonic):
+        self.clock = clock
+        self.intervals = dict(intervals or TIER_INTERVALS)
+        self.hot_size = hot_size
+        self.hot_change = hot_change
+        self.fast_change = fast_change
+        self.index_symbols = set(index_symbols)
+
+        self.symbols = list(symbols)
+        self.tiers = {}
+        self.total_oi = {}
+        self.last_change = {}
+        self._fingerprints = {}
+        self._hot_set = set()
+        self._attempted = set()
+        self._seq = itertools.count()
+        self._heap = []
+
+        now = clock()
+        for sym in self.symbols:
+            self.tiers[sym] = self._base_tier(sym)
+            # पहली बार सभी सिंबल तुरंत due हैं
+            heapq.heappush(self._heap, (now, next(self._seq), sym))
+
+    def _base_tier(self, symbol):
+        if symbol in self.index_symbols:
+            return TIER_FAST
+        if symbol in self._hot_set:
+            return TIER_HOT
+        return TIER_NORMAL
+
+    def _rerank_hot(self):
+        stocks = [s for s in self.total_oi if s not in self.index_symbols]
+        stocks.sort(key=lambda s: self.total_oi[s], reverse=True)
+        self._hot_set = set(stocks[: self.hot_size])
+
+    def record_chain(self, symbol, df):
+        """फेच हुई चेन से Total OI और बदलाव निकालकर सिंबल का Tier अपडेट करें"""
+        if df is None or df.empty:
+            return
+        fingerprint = df[["CE_OI", "PE_OI", "CE_LTP", "PE_LTP"]].to_numpy(dtype=float)
+        previous = self._fingerprints.get(symbol)
+        # पहली फेच पर तुलना के लिए कुछ नहीं है, तो सिर्फ base Tier लागू होगा
+        change = chain_change(previous, fingerprint) if previous is not None else 0.0
+        self._fingerprints[symbol] = fingerprint
+        self.last_change[symbol] = change
+
+        # ~200 सिंबल्स की सॉर्टिंग बहुत सस्ती है, इसलिए हर फेच पर Rank दोबारा निकालें।
+        # पहला पूरा Sweep होने तक Rank अधूरी है, तब तक hot Tier खाली रखें।
+        self.total_oi[symbol] = float(fingerprint[:, 0].sum() + fingerprint[:, 1].sum())
+        if len(self._attempted) >= len(self.symbols):
+            self._rerank_hot()
+
+        base = self._base_tier(symbol)
+        if change >= self.fast_change:
+            by_change = TIER_FAST
+        elif change >= self.hot_change:
+            by_change = TIER_HOT
+        else:
+            by_change = TIER_NORMAL
+        self.tiers[symbol] = max(base, by_change, key=TIER_ORDER.index)
+
+    def record_unchanged(self, symbol):
+        """फेच हुई चेन पिछली जैसी ही थी (Fingerprint वही): बदलाव 0, सिंबल अपने base Tier में"""
+        if symbol not in self._fingerprints:
+            return
+        self.last_change[symbol] = 0.0
+        self.tiers[symbol] = self._base_tier(symbol)
+
+    def reschedule(self, symbol, now=None):
+        self._attempted.add(symbol)
+        now = self.clock() if now is None else now
+        deadline = now + self.intervals[self.tiers[symbol]]
+        heapq.heappush(self._heap, (deadline, next(self._seq), symbol))
+
+    async def next_due(self, until):
+        """
+        अगला due सिंबल लौटाता है (ज़रूरत हो तो उसकी Deadline तक सोता है)।
+        अगर अगली Deadline `until` (scheduler.clock) के बाद है तो None।
+        """
+        while True:
+            now = self.clock()
+            if self._heap and self._heap[0][0] <= now:
+                return heapq.heappop(self._heap)[2]
+            if now >= until or (self._heap and self._heap[0][0] > until):
+                return None
+            # Heap खाली है तो बाकी सिंबल अभी in-flight हैं; थोड़ी देर में दोबारा देखें
+            wake_at = self._heap[0][0] if self._heap else now + 0.5
+            await asyncio.sleep(min(wake_at, until) - now)
+
+    def tier_of(self, symbol):
+        return self.tiers.get(symbol, TIER_NORMAL)
+
+    def tier_counts(self):
+        counts = {tier: 0 for tier in TIER_ORDER}
+        for tier in self.tiers.values():
+            counts[tier] += 1
+        return counts
@@ -0,0 +1,136 @@
+# worker_pool.py
+# 🔹 Bounded-Concurrency Worker Pool (Fixed Batches की जगह)
+#    N लंबे चलने वाले Workers एक asyncio.Queue से काम उठाते हैं,
+#    इसलिए एक धीमा सिंबल बाकी slots को नहीं रोकता (No Head-of-Line Blocking)
+import asyncio
+import time
+
+
+class WorkerStats:
+    """एक Worker का हिसाब: कितने काम, कितने सफल, कुल कितना समय"""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.processed = 0
+        self.success = 0
+        self.busy_time = 0.0
+        self.slowest = ("", 0.0)
+
+    def record(self, item, elapsed, ok):
+        self.processed += 1
+        self.success += 1 if ok else 0
+        self.busy_time += elapsed
+        if elapsed > self.slowest[1]:
+            self.slowest = (item, elapsed)
+
+
+class PoolStats:
+    """पूरे Cycle का हिसाब (Per-Worker + Per-Item Latency)"""
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.workers = [WorkerStats(i) for i in range(concurrency)]
+        self.latencies = []
+        self.results = {}
+        self.duration = 0.0
+
+    @property
+    def total(self):
+        return len(self.latencies)
+
+    @property
+    def success(self):
+        return sum(w.success for w in self.workers)
+
+    @property
+    def mean_latency(self):
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def summary(self):
+        slowest = max((w.slowest for w in self.workers), key=lambda s: s[1], default=("", 0.0))
+        return (
+            f"{self.success}/{self.total} ok in {self.duration:.2f}s | "
+            f"workers={self.concurrency} | mean={self.mean_latency:.2f}s | "
+            f"slowest={slowest[0]} ({slowest[1]:.2f}s)"
+        )
+
+    def worker_lines(self):
+        return [
+            f"worker {w.worker_id:02d}: {w.success}/{w.processed} ok | "
+            f"busy {w.busy_time:.2f}s | slowest {w.slowest[0]} ({w.slowest[1]:.2f}s)"
+            for w in self.workers
+        ]
+
+
+async def run_worker_pool(items, handler, concurrency=20):
+    """
+    items   : सिंबल्स (या कोई भी काम) की लिस्ट
+    handler : async def handler(item) -> result (truthy मतलब सफल)
+    हर item के result को stats.results में रखता है।
+    """
+    items = list(items)
+    concurrency = max(1, min(concurrency, len(items) or 1))
+    stats = PoolStats(concurrency)
+
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def worker(ws):
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                result = await handler(item)
+            except Exception:
+                result = None  # handler (process_one) खुद एरर लॉग करता है
+            elapsed = time.perf_counter() - started
+            ws.record(item, elapsed, bool(result))
+            stats.latencies.append(elapsed)
+            stats.results[item] = result
+            queue.task_done()
+
+    cycle_start = time.perf_counter()
+    await asyncio.gather(*(worker(ws) for ws in stats.workers))
+    stats.duration = time.perf_counter() - cycle_start
+    return stats
+
+
+async def run_scheduled_pool(scheduler, handler, concurrency=20, window=30):
+    """
+    Tier Scheduler से चलने वाला Worker Pool।
+    Workers `window` सेकंड तक scheduler.next_due() से सिंबल उठाते हैं और
+    हर काम के बाद उसे अगली Deadline के लिए दोबारा Heap में डालते हैं।
+    """
+    stats = PoolStats(max(1, concurrency))
+    until = scheduler.clock() + window
+
+    async def worker(ws):
+        while True:
+            item = await scheduler.next_due(until)
+            if item is None:
+                return
+            started = time.perf_counter()
+            try:
+                result = await handler(item)
+            except Exception:
+                result = None  # handler (process_one) खुद एरर लॉग करता है
+            finally:
+                scheduler.reschedule(item)
+            elapsed = time.perf_counter() - started
+            ws.record(item, elapsed, bool(result))
+            stats.latencies.append(elapsed)
+            stats.results[item] = result
+
+    window_start = time.perf_counter()
+    await asyncio.gather(*(worker(ws) for ws in stats.workers))
+    stats.duration = time.perf_counter() - window_start
+    # अगली Deadline Window के बाद हो तो Workers पहले ही लौट आते हैं; बाकी Window यहीं रुकें,
+    # वरना Caller का Loop (हर Window के GC / Compaction Calls समेत) बिना रुके घूमता रहता है
+    remaining = until - scheduler.clock()
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+    return stats
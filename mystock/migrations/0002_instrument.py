@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Instrument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=60, unique=True)),
+                ('instrument_key', models.CharField(blank=True, max_length=60, null=True)),
+                ('name', models.CharField(blank=True, default='', max_length=150)),
+                ('lot_size', models.IntegerField(default=1)),
+                ('updated', models.DateField()),
+            ],
+        ),
+    ]
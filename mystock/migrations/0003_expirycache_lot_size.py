@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0002_instrument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expirycache',
+            name='lot_size',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
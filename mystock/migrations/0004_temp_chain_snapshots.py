@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0003_expirycache_lot_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tempoptionchain',
+            name='Snapshot',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tempoptionchain',
+            index=models.Index(fields=['Symbol', 'Expiry_Date', 'Snapshot'], name='tempchain_snapshot_idx'),
+        ),
+        migrations.CreateModel(
+            name='TempChainPointer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=50)),
+                ('expiry_date', models.DateField()),
+                ('snapshot', models.IntegerField(default=0)),
+                ('updated', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('symbol', 'expiry_date')},
+            },
+        ),
+    ]
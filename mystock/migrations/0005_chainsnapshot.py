@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0004_temp_chain_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=50)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('spot_price', models.FloatField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['symbol', '-fetched_at'], name='chainsnap_symbol_latest_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='optionchain',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='mystock.chainsnapshot'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations, models
+
+
+SR_FIELDS = [
+    'Time', 'Spot_Price', 'Expiry_Date',
+    'Strike_Price_Ce1', 'Reversl_Ce', 'week_Ce_1', 'Stop_Loss_Ce1',
+    'Strike_Price_Ce2', 'Reversl_Ce_2', 'week_Ce_2', 'Stop_Loss_Ce2', 's_t_b_ce',
+    'Strike_Price_Pe1', 'Reversl_Pe', 'week_Pe_1', 'Stop_Loss_Pe1',
+    'Strike_Price_Pe2', 'Reversl_Pe_2', 'week_Pe_2', 'Stop_Loss_Pe2', 's_t_b_pe',
+    'Bearish_Risk', 'Bullish_Risk', 'dist_ce_1', 'dist_ce_2', 'dist_pe_1', 'dist_pe_2',
+]
+
+
+def backfill_latest(apps, schema_editor):
+    # मौजूदा History से हर सिंबल की सबसे नई रो
+    SupportResistance = apps.get_model('mystock', 'SupportResistance')
+    SupportResistanceLatest = apps.get_model('mystock', 'SupportResistanceLatest')
+    rows = []
+    for symbol in SupportResistance.objects.order_by().values_list('Symbol', flat=True).distinct():
+        newest = SupportResistance.objects.filter(Symbol=symbol).order_by('-Time').first()
+        if newest is not None:
+            rows.append(SupportResistanceLatest(
+                Symbol=symbol, **{name: getattr(newest, name) for name in SR_FIELDS}
+            ))
+    SupportResistanceLatest.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0005_chainsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupportResistanceLatest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Time', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('Spot_Price', models.FloatField(blank=True, null=True)),
+                ('Expiry_Date', models.DateField(blank=True, null=True)),
+                ('Strike_Price_Ce1', models.FloatField(blank=True, null=True)),
+                ('Reversl_Ce', models.FloatField(blank=True, null=True)),
+                ('week_Ce_1', models.FloatField(blank=True, null=True)),
+                ('Stop_Loss_Ce1', models.FloatField(blank=True, null=True)),
+                ('Strike_Price_Ce2', models.FloatField(blank=True, null=True)),
+                ('Reversl_Ce_2', models.FloatField(blank=True, null=True)),
+                ('week_Ce_2', models.FloatField(blank=True, null=True)),
+                ('Stop_Loss_Ce2', models.FloatField(blank=True, null=True)),
+                ('s_t_b_ce', models.CharField(blank=True, max_length=20, null=True)),
+                ('Strike_Price_Pe1', models.FloatField(blank=True, null=True)),
+                ('Reversl_Pe', models.FloatField(blank=True, null=True)),
+                ('week_Pe_1', models.FloatField(blank=True, null=True)),
+                ('Stop_Loss_Pe1', models.FloatField(blank=True, null=True)),
+                ('Strike_Price_Pe2', models.FloatField(blank=True, null=True)),
+                ('Reversl_Pe_2', models.FloatField(blank=True, null=True)),
+                ('week_Pe_2', models.FloatField(blank=True, null=True)),
+                ('Stop_Loss_Pe2', models.FloatField(blank=True, null=True)),
+                ('s_t_b_pe', models.CharField(blank=True, max_length=20, null=True)),
+                ('Bearish_Risk', models.IntegerField(default=0)),
+                ('Bullish_Risk', models.IntegerField(default=0)),
+                ('dist_ce_1', models.FloatField(default=0.0, verbose_name='Dist CE1 %')),
+                ('dist_ce_2', models.FloatField(default=0.0, verbose_name='Dist CE2 %')),
+                ('dist_pe_1', models.FloatField(default=0.0, verbose_name='Dist PE1 %')),
+                ('dist_pe_2', models.FloatField(default=0.0, verbose_name='Dist PE2 %')),
+                ('Symbol', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'db_table': 'Support_Resistance_Latest',
+            },
+        ),
+        migrations.RunPython(backfill_latest, migrations.RunPython.noop),
+    ]
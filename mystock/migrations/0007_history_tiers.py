@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0006_supportresistancelatest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chainsnapshot',
+            name='fetched_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddField(
+            model_name='chainsnapshot',
+            name='resolution',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='supportresistance',
+            name='resolution',
+            field=models.IntegerField(default=0),
+        ),
+    ]
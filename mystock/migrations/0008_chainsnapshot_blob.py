@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mystock', '0007_history_tiers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chainsnapshot',
+            name='blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
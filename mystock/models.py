@@ -1,9 +1,32 @@
 from django.db import models
 from django.utils import timezone
 
+class ChainSnapshot(models.Model):
+    # हर फेच (एक पूरी चेन) का Header + उसकी चेन का Blob,
+    # ताकि Dashboard Time-Window की जगह सीधे "सिंबल का लेटेस्ट Snapshot" पढ़ सके
+    symbol = models.CharField(max_length=50)
+    expiry_date = models.DateField(null=True, blank=True)
+    spot_price = models.FloatField(null=True, blank=True)
+    fetched_at = models.DateTimeField(db_index=True)
+    # History Tier (सेकंड): 0 = Raw, 60 / 300 = Compaction में उस Bucket का आखिरी बचा Snapshot
+    resolution = models.IntegerField(default=0)
+    # पूरी चेन एक Compressed Columnar Blob में (mystock/chain_blob.py); पुराने Snapshots में null
+    # और उनकी रो OptionChain में
+    blob = models.BinaryField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['symbol', '-fetched_at'], name='chainsnap_symbol_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} | {self.expiry_date} | {self.fetched_at}"
+
+
 class OptionChain(models.Model):
     # In par Index zaroori hai kyunki hum inpar Filter lagayenge
     Time = models.DateTimeField(db_index=True)
+    snapshot = models.ForeignKey(ChainSnapshot, null=True, blank=True, on_delete=models.CASCADE, related_name='rows')
     Expiry_Date = models.DateField(db_index=True, null=True, blank=True)
     Symbol = models.CharField(max_length=50, db_index=True)
     Lot_size = models.IntegerField(default=1)
@@ -45,11 +68,11 @@ class OptionChain(models.Model):
         return f"{self.Symbol} | {self.Strike_Price} | {self.Time}"
 
 
-class SupportResistance(models.Model):
+class SupportResistanceFields(models.Model):
+    # SupportResistance (History) और SupportResistanceLatest (हर सिंबल की एक रो) के साझा Fields
     # auto_now_add=True की जगह इसे सामान्य DateTimeField रखना बेहतर है 
     # ताकि आप मैन्युअल रूप से मार्केट का टाइम डाल सकें जैसा आपने async_live.py में किया है।
     Time = models.DateTimeField(null=True, blank=True, db_index=True) 
-    Symbol = models.CharField(max_length=50, db_index=True)
     Spot_Price = models.FloatField(null=True, blank=True)
     Expiry_Date = models.DateField(null=True, blank=True)
 
@@ -87,6 +110,17 @@ class SupportResistance(models.Model):
     dist_pe_1 = models.FloatField(default=0.0, verbose_name="Dist PE1 %")
     dist_pe_2 = models.FloatField(default=0.0, verbose_name="Dist PE2 %")
 
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.Symbol} | {self.Time}"
+
+
+class SupportResistance(SupportResistanceFields):
+    Symbol = models.CharField(max_length=50, db_index=True)
+    # History Tier (सेकंड), ChainSnapshot.resolution जैसा
+    resolution = models.IntegerField(default=0)
 
     class Meta:
         db_table = "Support_Resistance"
@@ -94,8 +128,14 @@ class SupportResistance(models.Model):
             models.Index(fields=['Symbol', '-Time']),
         ]
 
-    def __str__(self):
-        return f"{self.Symbol} | {self.Time}"
+
+class SupportResistanceLatest(SupportResistanceFields):
+    # हर सिंबल की सिर्फ लेटेस्ट रो: Engine History Insert के साथ उसी Transaction में Upsert करता है,
+    # ताकि Dashboard History कितनी भी हो, सीधे यही छोटी टेबल पढ़े
+    Symbol = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        db_table = "Support_Resistance_Latest"
     
 class SyncControl(models.Model):
     name = models.CharField(max_length=50, unique=True) # "nifty_loop" या "others_loop"
@@ -111,6 +151,9 @@ class ExpiryCache(models.Model):
     # Expiries: पूरी लिस्ट यहाँ सेव होगी (जैसे ['2024-02-15', '2024-02-22'])
     # Django का JSONField लिस्ट को अपने आप हैंडल कर लेता है
     expiries = models.JSONField(default=list)
+
+    # F&O लॉट साइज (Expiry Calendar इसे Contract API से साथ में भरता है)
+    lot_size = models.IntegerField(null=True, blank=True)
     
     # Last Updated: कब डेटा अपडेट हुआ (ताकि हम पुराना डेटा चेक कर सकें)
     last_updated = models.DateTimeField(auto_now=True)
@@ -132,6 +175,8 @@ class TempOptionChain(models.Model):
     Symbol = models.CharField(max_length=50, db_index=True)
     Lot_size = models.IntegerField(default=1)
     Strike_Price = models.FloatField(db_index=True)
+    # Snapshot Version: Readers सिर्फ TempChainPointer वाला (Current) Version पढ़ते हैं
+    Snapshot = models.IntegerField(default=0)
 
     # बाकी सारे कॉलम्स OptionChain जैसे ही रहेंगे
     CE_Delta = models.FloatField(null=True, blank=True)
@@ -163,4 +208,34 @@ class TempOptionChain(models.Model):
     Spot_Price = models.FloatField(null=True, blank=True)
 
     class Meta:
-        ordering = ['Strike_Price'] # स्ट्राइक प्राइस के हिसाब से सॉर्टेड
\ No newline at end of file
+        ordering = ['Strike_Price'] # स्ट्राइक प्राइस के हिसाब से सॉर्टेड
+        indexes = [
+            models.Index(fields=['Symbol', 'Expiry_Date', 'Snapshot'], name='tempchain_snapshot_idx'),
+        ]
+
+
+class TempChainPointer(models.Model):
+    # हर (सिंबल, Expiry) का Current Snapshot: Engine नया Version लिखकर इसी Transaction में
+    # Pointer बदलता है, पुराने Versions बाद में एक साथ (Bulk) हटते हैं
+    symbol = models.CharField(max_length=50)
+    expiry_date = models.DateField()
+    snapshot = models.IntegerField(default=0)
+    updated = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('symbol', 'expiry_date')
+
+    def __str__(self):
+        return f"{self.symbol} | {self.expiry_date} | v{self.snapshot}"
+
+class Instrument(models.Model):
+    # Master Contract से निकली साझा Registry (sync_instruments रोज़ भरता है),
+    # ताकि Web Processes को पूरी CSV/pandas लोड न करनी पड़े
+    symbol = models.CharField(max_length=60, unique=True)
+    instrument_key = models.CharField(max_length=60, null=True, blank=True)
+    name = models.CharField(max_length=150, blank=True, default="")
+    lot_size = models.IntegerField(default=1)  # F&O लॉट साइज, न हो तो Cash वाला
+    updated = models.DateField()
+
+    def __str__(self):
+        return f"{self.symbol} | {self.instrument_key} | {self.lot_size}"
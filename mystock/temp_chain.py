@@ -0,0 +1,106 @@
+# temp_chain.py
+# 🔹 TempOptionChain के Versioned Snapshots (Web और Worker दोनों के लिए, सिर्फ Django ORM)
+#    - Writer: नई चेन नए Snapshot नंबर के साथ लिखी जाती है और उसी Transaction में
+#      TempChainPointer (Current Version) बदलता है — Readers को कभी आधी/खाली चेन नहीं दिखती।
+#    - Reader: सिर्फ Pointer वाला Version पढ़ते हैं (एक Query, Subquery के साथ)।
+#    - पुराने Versions और बीती Expiries collect_garbage() में एक साथ (Bulk) हटते हैं।
+import logging
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from mystock.bulk_insert import bulk_insert
+from mystock.models import TempChainPointer, TempOptionChain
+
+logger = logging.getLogger(__name__)
+
+
+def _current_version():
+    """बाहरी TempOptionChain रो के (सिंबल, Expiry) का Current Snapshot (Subquery)"""
+    return Subquery(
+        TempChainPointer.objects.filter(
+            symbol=OuterRef("Symbol"), expiry_date=OuterRef("Expiry_Date")
+        ).values("snapshot")[:1]
+    )
+
+
+def current_rows(symbol, expiry=None):
+    """सिंबल (और Expiry) की Current Snapshot वाली रो"""
+    queryset = TempOptionChain.objects.filter(Symbol=symbol, Snapshot=_current_version())
+    if expiry:
+        queryset = queryset.filter(Expiry_Date=expiry)
+    return queryset
+
+
+def stored_expiries(symbol):
+    """जिन Expiries की Current Snapshot मौजूद है (Dropdown के लिए)"""
+    return [
+        str(d) for d in TempChainPointer.objects.filter(symbol=symbol)
+        .order_by("expiry_date").values_list("expiry_date", flat=True)
+    ]
+
+
+def publish_snapshot(symbol, expiry, entries):
+    """
+    पूरी चेन एक नए Version के रूप में लिखें और Pointer उसी Transaction में बदलें।
+    पुराना Version तब तक पढ़ा जा सकता है जब तक यह Commit न हो। नया Version नंबर लौटाता है।
+    """
+    with transaction.atomic():
+        pointer = (
+            TempChainPointer.objects.select_for_update()
+            .filter(symbol=symbol, expiry_date=expiry).first()
+        )
+        version = pointer.snapshot + 1 if pointer is not None else 1
+        for entry in entries:
+            entry.Snapshot = version
+        bulk_insert(TempOptionChain, entries)
+
+        now = timezone.now()
+        if pointer is None:
+            TempChainPointer.objects.create(symbol=symbol, expiry_date=expiry, snapshot=version, updated=now)
+        else:
+            pointer.snapshot = version
+            pointer.updated = now
+            pointer.save(update_fields=["snapshot", "updated"])
+    return version
+
+
+def patch_snapshot(symbol, expiry, entries, time):
+    """
+    आंशिक बदलाव: Current Version में सिर्फ `entries` वाली स्ट्राइक्स बदलें, बाकी रो का Time ताज़ा करें।
+    सब एक Transaction में, इसलिए Readers या तो पुरानी या पूरी नई चेन देखते हैं।
+    Current Version न हो तो False (Caller पूरी चेन publish करे)।
+    """
+    with transaction.atomic():
+        version = (
+            TempChainPointer.objects.select_for_update()
+            .filter(symbol=symbol, expiry_date=expiry)
+            .values_list("snapshot", flat=True).first()
+        )
+        if version is None:
+            return False
+        rows = TempOptionChain.objects.filter(Symbol=symbol, Expiry_Date=expiry, Snapshot=version)
+        if entries:
+            rows.filter(Strike_Price__in=[entry.Strike_Price for entry in entries]).delete()
+            for entry in entries:
+                entry.Snapshot = version
+            bulk_insert(TempOptionChain, entries)
+        rows.update(Time=time)
+    return True
+
+
+def collect_garbage(today=None):
+    """
+    Current से पुराने सारे Versions (Pointer के बिना की पुरानी रो भी) और बीती Expiries,
+    हर तरह की एक ही DELETE Query में। हटाई गई रो की संख्या लौटाता है।
+    """
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        stale = TempOptionChain.objects.filter(Snapshot__lt=Coalesce(_current_version(), Value(1))).delete()[0]
+        expired = TempOptionChain.objects.filter(Expiry_Date__lt=today).delete()[0]
+        TempChainPointer.objects.filter(expiry_date__lt=today).delete()
+    if stale or expired:
+        logger.info(f"🧹 TempOptionChain GC: {stale} old-version rows, {expired} expired rows")
+    return stale + expired
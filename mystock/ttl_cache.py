@@ -0,0 +1,167 @@
+# ttl_cache.py
+# 🔹 Process-Local TTL Cache + Single-Flight
+#    - Fresh Hit: सिर्फ एक dict lookup (Lock नहीं) — Hot Polling Path के लिए microseconds
+#    - Stale Hit: पुरानी वैल्यू तुरंत लौटती है, Refresh एक Background Thread में
+#    - Miss: `fallback` हो तो उसकी (पुरानी/खाली) वैल्यू तुरंत और Loader Background में;
+#            वरना (या get_or_load) एक ही Caller Loader चलाता है, बाकी उसी नतीजे का इंतज़ार करते हैं
+#    - Warm-up: `warmer` (सारी Keys एक साथ, जैसे एक Query) भी Background Thread में — Caller कभी नहीं रुकता
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_NOT_WARMED = object()
+_WARM_KEY = object()  # _inflight में Warm-up की Single-Flight Key (किसी असली Key से टकराती नहीं)
+
+
+class _Entry:
+    __slots__ = ("value", "expires")
+
+    def __init__(self, value, expires):
+        self.value = value
+        self.expires = expires
+
+
+class TTLSingleFlightCache:
+    """
+    loader(key, *args) -> value।
+    खाली (falsy) नतीजे `empty_ttl` तक ही रखे जाते हैं, ताकि API की
+    एक नाकामी ज़्यादा देर तक खाली Dropdown न दिखाए।
+    fallback(key, *args) -> (value, fresh): Miss पर सस्ता (जैसे सिर्फ DB) जवाब; fresh न हो तो
+    वो वैल्यू लौटाकर Loader Background में चलता है — Caller Upstream का इंतज़ार नहीं करता।
+    warmer() -> {key: value}: पूरा Cache एक साथ भरने वाला Bulk Load, पहली get पर Background में;
+    warm_generation() (जैसे आज की तारीख) बदले तो फिर से। खाली नतीजे पर हर `warm_retry` सेकंड दोबारा कोशिश।
+    """
+
+    def __init__(self, loader, ttl=300.0, empty_ttl=15.0, name="cache", fallback=None,
+                 warmer=None, warm_generation=None, warm_retry=30.0):
+        self.loader = loader
+        self.fallback = fallback
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.name = name
+        self.warmer = warmer
+        self.warm_generation = warm_generation or (lambda: None)
+        self.warm_retry = warm_retry
+        self._entries = {}
+        self._inflight = {}  # key -> threading.Event
+        self._lock = threading.Lock()
+        self._warmed = _NOT_WARMED  # आखिरी सफल Warm-up की Generation
+        self._warm_at = 0.0  # इससे पहले Generation दोबारा चेक नहीं होती (Hot Path पर एक Float Compare)
+
+    def get(self, key, *args):
+        self._maybe_warm()
+        entry = self._entries.get(key)
+        if entry is None and self.fallback is not None:
+            entry = self._fallback_entry(key, args)
+        if entry is not None:
+            if time.monotonic() >= entry.expires:
+                self._refresh_in_background(key, args)
+            return entry.value
+        return self._load_single_flight(key, args)
+
+    def get_or_load(self, key, *args):
+        """get जैसा, पर Miss पर fallback नहीं — Loader के नतीजे तक रुकता है"""
+        self._maybe_warm()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() >= entry.expires:
+                self._refresh_in_background(key, args)
+            return entry.value
+        return self._load_single_flight(key, args)
+
+    def put(self, key, value):
+        """बाहर से लाई गई ताज़ा वैल्यू सीधे Cache में (जैसे Bulk Prefetch)"""
+        self._store(key, value)
+
+    def peek(self, key):
+        """सिर्फ Memory: Cache में हो तो वैल्यू (पुरानी भी), वरना None — Loader कभी नहीं चलता"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _store(self, key, value):
+        ttl = self.ttl if value else self.empty_ttl
+        self._entries[key] = entry = _Entry(value, time.monotonic() + ttl)
+        return entry
+
+    def _fallback_entry(self, key, args):
+        value, fresh = self.fallback(key, *args)
+        if fresh:
+            return self._store(key, value)
+        # पहले से Expired Entry: यही वैल्यू लौटेगी और असली Load Background में
+        return self._entries.setdefault(key, _Entry(value, 0.0))
+
+    def _load_single_flight(self, key, args):
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait()
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else self._load_single_flight(key, args)
+
+        try:
+            value = self.loader(key, *args)
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _refresh_in_background(self, key, args):
+        def refresh():
+            self._store(key, self.loader(key, *args))
+
+        self._run_in_background(key, refresh, f"Background refresh failed for {key}")
+
+    def _maybe_warm(self):
+        if self.warmer is None or time.monotonic() < self._warm_at:
+            return
+        self._warm_at = time.monotonic() + self.warm_retry
+        generation = self.warm_generation()
+        if generation == self._warmed:
+            return
+
+        def warm():
+            values = self.warmer()
+            for key, value in values.items():
+                self._store(key, value)
+            if values:
+                self._warmed = generation
+            logger.info(f"🔥 {self.name}: warmed {len(values)} keys")
+
+        self._run_in_background(_WARM_KEY, warm, "Warm-up failed")
+
+    def _run_in_background(self, flight_key, work, failure):
+        with self._lock:
+            if flight_key in self._inflight:
+                return  # कोई और पहले से Refresh कर रहा है
+            event = self._inflight[flight_key] = threading.Event()
+
+        def run():
+            try:
+                work()
+            except Exception as e:
+                logger.error(f"❌ {self.name}: {failure}: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.pop(flight_key, None)
+                event.set()
+                # इस Thread का DB Connection बंद करें (Django Connections Thread-Local हैं)
+                connections.close_all()
+
+        threading.Thread(target=run, name=f"{self.name}-refresh", daemon=True).start()
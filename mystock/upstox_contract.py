@@ -0,0 +1,225 @@
+# upstox_contract.py
+# 🔹 Web और Worker दोनों के लिए हल्का Upstox Contract/Expiry Layer
+#    सिर्फ stdlib + Django ORM: pandas, numpy, aiohttp या Master Contract CSV यहाँ लोड नहीं होते,
+#    ताकि Dashboards का Boot सस्ता रहे। Ingestion का भारी कोड async_live.py में है।
+import json
+import logging
+import os
+import time as t_time
+
+from django.utils import timezone
+
+from mystock.credentials import get_access_token
+from mystock.instrument_registry import registry
+from mystock.models import ExpiryCache
+from mystock.ttl_cache import TTLSingleFlightCache
+from mystock.management.commands import api_capture
+from mystock.management.commands.rate_governor import (
+    governor,
+    parse_retry_after,
+    OPTION_CONTRACT_ENDPOINT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upstox API का Base URL (Local Stand-in/Mock सर्वर के लिए Env से बदला जा सकता है)
+UPSTOX_API_BASE = os.environ.get("UPSTOX_API_BASE", "https://api.upstox.com")
+
+# Indices के लिए हार्डकोडेड मैपिंग (यह सबसे सुरक्षित और तेज़ है)
+INDEX_KEYS = {
+    'NIFTY': 'NSE_INDEX|Nifty 50',
+    'BANKNIFTY': 'NSE_INDEX|Nifty Bank',
+    'FINNIFTY': 'NSE_INDEX|Nifty Fin Service',
+    'MIDCPNIFTY': 'NSE_INDEX|NIFTY MID SELECT',
+    'SAMMAAN': 'NSE_EQ|INE148I01020',
+    'M&M': 'NSE_EQ|INE101A01026',  
+    'L&T': 'NSE_EQ|INE018A01030',
+}
+
+# Worker Process अपना Master Contract Index यहाँ लगाता है (async_live);
+# None लौटे या लगा न हो तो साझा DB Registry
+key_lookup = None
+
+def get_instrument_key(symbol):
+    """
+    सिंबल के लिए Instrument Key निकालता है।
+    Indices के लिए फिक्स्ड मैप, Worker में Master Contract Index
+    और बाकी Processes में साझा Instrument Registry (DB) का उपयोग करता है।
+    """
+    if symbol in INDEX_KEYS:
+        return INDEX_KEYS[symbol]
+
+    if key_lookup is not None:
+        key = key_lookup(symbol)
+        if key is not None:
+            return key
+    return registry.instrument_key(symbol)
+
+def fetch_contract_json(key):
+    """
+    /v2/option/contract की Blocking कॉल — साझा Rate Governor और Capture/Replay के साथ।
+    सफल होने पर JSON dict, वरना None।
+    """
+    params = {'instrument_key': key}
+
+    # Replay मोड: रिकॉर्डेड Response परोसें, असली API कॉल नहीं
+    if api_capture.active_replay is not None:
+        rec = api_capture.active_replay.lookup(OPTION_CONTRACT_ENDPOINT, params)
+        return json.loads(rec["body"]) if rec and rec["status"] == 200 else None
+
+    url = f"{UPSTOX_API_BASE}{OPTION_CONTRACT_ENDPOINT}"
+    headers = {
+        'Accept': 'application/json',
+        'Authorization': f'Bearer {get_access_token()}'
+    }
+    import requests  # Lazy: Web Boot पर requests लोड न हो
+
+    governor.acquire_blocking(OPTION_CONTRACT_ENDPOINT)
+    started = t_time.perf_counter()
+    res = requests.get(url, headers=headers, params=params, timeout=10)
+
+    if api_capture.active_recorder is not None:
+        api_capture.active_recorder.record(
+            OPTION_CONTRACT_ENDPOINT, params, res.status_code, res.text, t_time.perf_counter() - started
+        )
+
+    if res.status_code == 429:
+        governor.on_rate_limited(OPTION_CONTRACT_ENDPOINT, parse_retry_after(res.headers))
+        logger.warning(f"⚠️ {key}: Contract API Rate Limit (429)")
+        return None
+    if res.status_code != 200:
+        return None
+    governor.on_success(OPTION_CONTRACT_ENDPOINT)
+    return res.json()
+
+def get_Name_Lot_size(symbol):
+    key = get_instrument_key(symbol)
+    if not key:
+        return None, None
+
+    try:
+        response = fetch_contract_json(key)
+
+        # Agar response None hai ya data nahi mila
+        if not response or "data" not in response or not response["data"]:
+            print(f"⚠ No contract data found for {symbol}")
+            return None, None
+
+        # Pehla instrument lein (usually index ya stock contract)
+        contract_data = response["data"][0]
+        
+        underlying = contract_data.get("underlying_symbol")
+        lot_size = contract_data.get("lot_size")
+
+        return underlying, lot_size
+
+    except Exception as e:
+        print(f"⚠ Lot size fetch failed for {symbol}: {str(e)}")
+        return None, None
+
+# ---------------------------------------------------------
+# NEW SMART EXPIRY LOGIC START
+# ---------------------------------------------------------
+
+def get_all_expiries_from_api(symbol):
+    """API से सभी Expiry Dates निकालकर सॉर्टेड लिस्ट देता है"""
+    try:
+        key = get_instrument_key(symbol)
+        if not key: return []
+
+        # API Call (साझा Rate Governor + Capture/Replay के ज़रिए)
+        res = fetch_contract_json(key)
+        
+        if res and "data" in res and res["data"]:
+            # सारी डेट्स निकालें
+            all_dates = [item["expiry"] for item in res["data"]]
+            # डुप्लिकेट हटाकर सॉर्ट करें
+            sorted_expiries = sorted(list(set(all_dates)))
+            return sorted_expiries
+            
+    except Exception as e:
+        logger.error(f"Expiry API fetch fail for {symbol}: {e}")
+    
+    return []
+
+def get_storage_key(symbol):
+    """
+    तय करता है कि DB में किस नाम से सेव करना है।
+    हर Underlying की अपनी Expiry List (Expiry Calendar) — स्टॉक्स की अलग/नॉन-स्टैंडर्ड
+    Expiries भी सही रहती हैं।
+    """
+    return symbol
+
+def get_smart_expiry(symbol, wait=False):
+    """
+    लिस्ट रिटर्न करता है (e.g., ['2026-02-05', '2026-02-12'])।
+    Process-Local TTL Cache से (Storage Key पर); पुराना होने पर Refresh Background में
+    और एक समय में एक ही Refresh Upstream जाता है। Cache में न हो तो DB की वैल्यू (पुरानी भी)
+    या [] तुरंत, और load_smart_expiry (API) Background में — Request Thread कभी Upstream पर नहीं रुकता।
+    wait=True (Worker Startup): Miss पर load_smart_expiry के नतीजे तक रुकता है।
+    """
+    key = get_storage_key(symbol)
+    return expiry_cache.get_or_load(key, symbol) if wait else expiry_cache.get(key, symbol)
+
+def stored_calendar():
+    """
+    आज की पूरी Expiry Calendar (सारे Underlyings) एक ही Query में — expiry_cache का Warmer,
+    उसकी Background Thread में चलता है (Request Path पर कभी नहीं)। {Storage Key: Expiries}।
+    """
+    today_str = str(timezone.now().date())
+    return {
+        row.symbol: row.expiries
+        for row in ExpiryCache.objects.all()
+        if row.is_data_fresh() and row.expiries and row.expiries[0] >= today_str
+    }
+
+def stored_smart_expiry(db_key, symbol):
+    """
+    सिर्फ DB (Upstream कभी नहीं): (Expiry List, आज की है?)।
+    पुरानी रो की भी आज या आगे की Expiries लौटती हैं, रो न हो तो []।
+    """
+    today_str = str(timezone.now().date())
+    try:
+        cache_entry = ExpiryCache.objects.get(symbol=db_key)
+    except ExpiryCache.DoesNotExist:
+        return [], False
+
+    expiries = cache_entry.expiries or []
+    # अगर डेटा आज का है, लिस्ट खाली नहीं है और पहली एक्सपायरी बीत नहीं गई
+    if cache_entry.is_data_fresh() and expiries and expiries[0] >= today_str:
+        return expiries, True
+    return [e for e in expiries if e >= today_str], False
+
+def load_smart_expiry(db_key, symbol):
+    """
+    1. DB चेक करता है (Smart Key के साथ)
+    2. अगर नहीं मिलता तो API कॉल करता है (Blocking — get_smart_expiry इसे Background में चलाता है)
+    3. लिस्ट रिटर्न करता है
+    """
+    # 1. DB Check
+    expiries, fresh = stored_smart_expiry(db_key, symbol)
+    if fresh:
+        return expiries
+
+    # 2. API Fetch (अगर DB में नहीं मिला)
+    logger.info(f"🔄 Fetching fresh Expiry from API for {symbol} ({db_key})...")
+    
+    fresh_list = get_all_expiries_from_api(symbol)
+
+    if fresh_list:
+        # 3. Save to DB (update_or_create सबसे बेस्ट है)
+        ExpiryCache.objects.update_or_create(
+            symbol=db_key,
+            defaults={'expiries': fresh_list} # last_updated ऑटो उपडेट हो जायेगा
+        )
+        return fresh_list
+    
+    return []
+
+
+# Storage Key -> Expiry List (DB में दूसरी Processes के बदलाव TTL के अंदर दिख जाते हैं)।
+# हर नए दिन पूरी Calendar एक Query में Background से; तब तक Miss पर सिर्फ उस सिंबल की एक DB रो
+expiry_cache = TTLSingleFlightCache(
+    load_smart_expiry, ttl=300, empty_ttl=15, name="expiry", fallback=stored_smart_expiry,
+    warmer=stored_calendar, warm_generation=lambda: str(timezone.now().date()), warm_retry=30,
+)
@@ -1,21 +1,14 @@
-import requests
+import bisect
+import threading
 import time
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from django.shortcuts import render, redirect
-from requests.exceptions import SSLError, ConnectionError, Timeout
-from .models import OptionChain, SupportResistance, SyncControl, ExpiryCache, TempOptionChain
-from .credentials import access_token
-from django.utils import timezone
-from django.db.models import OuterRef, Subquery
-from django.views.decorators.cache import never_cache
+from django.shortcuts import render
+from .models import ChainSnapshot, SupportResistanceLatest, SyncControl
 from django.http import HttpResponse, JsonResponse
-from asgiref.sync import sync_to_async
 from django.views.decorators.cache import cache_page
-import asyncio
-import aiohttp
-from .management.commands.async_live import calculate_data_async_optimized, get_smart_expiry 
+# Web Tier सिर्फ हल्की Contract/Expiry Layer इस्तेमाल करता है —
+# pandas/numpy/aiohttp वाला Ingestion कोड (async_live) यहाँ Import नहीं होता
+from .upstox_contract import get_smart_expiry
+from .temp_chain import current_rows, stored_expiries
 from .symbol import symbols as ALL_SYMBOLS
 
 
@@ -27,6 +20,9 @@ def safe_get(url, headers=None, params=None, retries=3, timeout=10):
     """
     API call karne ke liye ek surakshit function jo retries handle karta hai.
     """
+    import requests  # Lazy: सिर्फ ज़रूरत पर लोड
+    from requests.exceptions import SSLError, ConnectionError, Timeout
+
     for attempt in range(retries):
         try:
             response = requests.get(
@@ -337,25 +333,32 @@ def safe_get(url, headers=None, params=None, retries=3, timeout=10):
 # ==================================================================================
 
 # Dashboard Views Start Here
+# NIFTY Dashboard इसी सिंबल का लेटेस्ट Snapshot दिखाता है
+DASHBOARD_SYMBOL = "NIFTY"
+
+def latest_chain_snapshot(symbol=DASHBOARD_SYMBOL):
+    """
+    सिंबल का सबसे नया ChainSnapshot और उसकी सारी रो (Strike के क्रम में, Blob से Decode) —
+    एक Index Lookup, और रो हमेशा एक ही पूरे फेच की। Snapshot न हो तो (None, [])।
+    """
+    snapshot = ChainSnapshot.objects.filter(symbol=symbol).order_by('-fetched_at').first()
+    if snapshot is None:
+        return None, []
+    # Blob Decode को numpy चाहिए: Boot पर नहीं, पहली Dashboard Request पर ही लोड हो
+    from .chain_blob import snapshot_rows
+    return snapshot, snapshot_rows(snapshot)
+
 def option_chain_dashboard(request):
-    # 1. Sabse latest entry ka time nikalna
-    latest_entry = OptionChain.objects.order_by('-Time').first()
+    # 1. Sabse latest Snapshot (Header) aur uski saari strikes
+    snapshot, all_data = latest_chain_snapshot()
 
-    if not latest_entry:
+    if snapshot is None:
         return render(request, 'mystock/dashboard.html', {'data': [], 'latest_time': None})
 
     # 2. Latest Time aur Spot Price
-    latest_time = latest_entry.Time
-    spot_price = latest_entry.Spot_Price
-    expiry_date = latest_entry.Expiry_Date
-
-    # 3. Time Buffer Logic (Taaki us second ki saari strikes mil jayein)
-    all_data = list(
-        OptionChain.objects.filter(
-            Time__gte=latest_time - timedelta(seconds=1),
-            Time__lte=latest_time + timedelta(seconds=1)
-        ).order_by('Strike_Price')
-    )
+    latest_time = snapshot.fetched_at
+    spot_price = snapshot.spot_price
+    expiry_date = snapshot.expiry_date
 
     # 4. TOP 3 RANKING LOGIC
     metrics = ['CE_OI_percent', 'CE_Volume_percent', 'CE_COI_percent',
@@ -402,22 +405,15 @@ def option_chain_dashboard(request):
  # अगर डेटा न हो तो खाली स्ट्रिंग भेजने के लिए
 
 def table_update_api(request):
-    latest_entry = OptionChain.objects.order_by('-Time').first()
+    snapshot, all_data = latest_chain_snapshot()
 
     # अगर डेटाबेस खाली है, तो खाली रिस्पॉन्स भेजें ताकि JS एरर न दे
-    if not latest_entry:
+    if snapshot is None:
         return HttpResponse("") 
 
-    latest_time = latest_entry.Time
-    spot_price = latest_entry.Spot_Price
-    expiry_date = latest_entry.Expiry_Date
-
-    all_data = list(
-        OptionChain.objects.filter(
-            Time__gte=latest_time - timedelta(seconds=1),
-            Time__lte=latest_time + timedelta(seconds=1)
-        ).order_by('Strike_Price')
-    )
+    latest_time = snapshot.fetched_at
+    spot_price = snapshot.spot_price
+    expiry_date = snapshot.expiry_date
 
     # Ranking Logic (बिल्कुल सही है)
     metrics = ['CE_OI_percent', 'CE_Volume_percent', 'CE_COI_percent',
@@ -460,14 +456,19 @@ def dashboard(request):
     others_obj, _ = SyncControl.objects.get_or_create(name="others_loop")
     
     # बाकी डेटा फेच करें
-    data = OptionChain.objects.filter(Symbol="NIFTY").order_by('-Time')[:50]
+    snapshot, rows = latest_chain_snapshot()
+    # सबसे नीचे की 50 नहीं, ATM के आस-पास की 50 Strikes (रो Strike के क्रम में हैं)
+    data = rows[:50]
+    if snapshot is not None and snapshot.spot_price is not None:
+        atm = bisect.bisect_left([row.Strike_Price for row in rows], snapshot.spot_price)
+        data = rows[max(0, atm - 25):atm + 25]
     
     context = {
         'data': data,
         'nifty_active': nifty_obj.is_active,  # यहाँ से HTML को वैल्यू मिलेगी
         'others_active': others_obj.is_active,
-        'spot': data[0].Spot_Price if data else 0,
-        'latest_time': data[0].Time if data else None,
+        'spot': snapshot.spot_price if snapshot else 0,
+        'latest_time': snapshot.fetched_at if snapshot else None,
     }
     return render(request, 'dashboard.html', context)
 
@@ -484,19 +485,11 @@ def toggle_sync(request, loop_name):
         "is_active": ctrl.is_active
     })
 
-from django.db.models import Q
 @cache_page(10) 
 def all_stocks_dashboard(request):
-    # 1. सब-क्वेरी: सबसे पहले हर सिंबल की बिल्कुल लेटेस्ट ID निकालें
-    # (यहाँ अभी कोई फिल्टर न लगाएं, ताकि हमें पता चले कि अभी ताज़ा स्थिति क्या है)
-    newest = SupportResistance.objects.filter(
-        Symbol=OuterRef('Symbol')
-    ).order_by('-Time')
-    
-    # 2. मेन क्वेरी: अब यहाँ उन 'ताज़ा' एंट्रीज को हटा दें जो 0 हैं
-    latest_data = SupportResistance.objects.filter(
-        id=Subquery(newest.values('id')[:1])
-    ).exclude(
+    # हर सिंबल की लेटेस्ट रो पहले से SupportResistanceLatest में है (Engine Upsert करता है),
+    # इसलिए History कितनी भी हो, यह एक छोटी टेबल का सीधा Scan है
+    latest_data = SupportResistanceLatest.objects.exclude(
         # यह लाइन 0, 0.0, और 0.00 सभी को हटा देगी
         Reversl_Ce__lte=0.01  
     ).exclude(
@@ -529,6 +522,12 @@ def stock_search_view(request):
 
     # 2. SMART EXPIRY FETCH
     expiry_list = get_smart_expiry(symbol)
+
+    # Engine हर सिंबल की कई Expiries TempOptionChain में रखता है; Dropdown में वही
+    # दिखाएं जो Storage में हैं, ताकि हर चुनी Expiry बिना API कॉल के तुरंत मिले
+    stored = set(stored_expiries(symbol))
+    if stored:
+        expiry_list = [e for e in expiry_list if e in stored] or sorted(stored)
     
     # 3. EXPIRY SELECTION LOGIC
     if url_expiry and url_expiry in expiry_list:
@@ -540,12 +539,10 @@ def stock_search_view(request):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
     # 5. DATA FETCHING FROM DB (TempOptionChain)
-    # हम सीधे DB से डेटा निकालेंगे जो Background Loop ने सेव किया है
-    queryset = TempOptionChain.objects.filter(Symbol=symbol).order_by('Strike_Price')
-    
+    # हम सीधे DB से डेटा निकालेंगे जो Background Loop ने सेव किया है —
+    # सिर्फ Current Snapshot (Engine बीच में लिख रहा हो तब भी पूरी चेन)
     # अगर एक्सपायरी सेलेक्टेड है, तो उससे फिल्टर करें
-    if selected_expiry:
-        queryset = queryset.filter(Expiry_Date=selected_expiry)
+    queryset = current_rows(symbol, selected_expiry).order_by('Strike_Price')
 
     latest_data = list(queryset)
 
@@ -622,10 +619,37 @@ def stock_search_view(request):
     # अगर पहली बार पेज लोड हो रहा है
     return render(request, 'mystock/search_dashboard.html', context)
 
+# Expiry Calendar का Refresh एक समय में एक ही (हर Request पर नया Thread और पूरे Universe की Fetch नहीं)
+_expiry_refresh_lock = threading.Lock()
+_expiry_refresh_running = False
+
 def trigger_expiry_update(request):
-    symbols_to_update = ["NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY", "SENSEX","RELIANCE"]
-    
-    for symbol in symbols_to_update:
-        get_smart_expiry(symbol)
-        
-    return JsonResponse({"status": "success", "message": "Expiry dates updated successfully!"})
\ No newline at end of file
+    """
+    पूरे Universe की Expiry Calendar Background Thread में एक साथ दोबारा फेच करता है
+    (Request तुरंत लौटती है; भारी aiohttp कोड सिर्फ यहीं, ज़रूरत पर लोड होता है)।
+    Refresh पहले से चल रहा हो तो नया शुरू नहीं होता।
+    """
+    global _expiry_refresh_running
+    with _expiry_refresh_lock:
+        if _expiry_refresh_running:
+            return JsonResponse({"status": "running", "message": "Expiry calendar refresh already running"})
+        _expiry_refresh_running = True
+
+    def run():
+        global _expiry_refresh_running
+        from django.db import connections
+        try:
+            from .management.commands.expiry_calendar import build_calendar_blocking
+            build_calendar_blocking(force=True)
+        finally:
+            with _expiry_refresh_lock:
+                _expiry_refresh_running = False
+            connections.close_all()
+
+    try:
+        threading.Thread(target=run, name="expiry-calendar", daemon=True).start()
+    except RuntimeError:
+        with _expiry_refresh_lock:
+            _expiry_refresh_running = False
+        raise
+    return JsonResponse({"status": "success", "message": "Expiry calendar refresh started!"})
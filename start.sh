@@ -8,13 +8,19 @@ set -o errexit
 echo "Applying database migrations..."
 python manage.py migrate
 
-# 2. बैकग्राउंड वर्कर शुरू करें (Background Worker)
+# 2. Instrument Registry (symbol -> key, lot size) को Master Contract से भरें
+# Web Workers इसी टेबल से पढ़ते हैं, उन्हें CSV/pandas लोड नहीं करनी पड़ती
+# (उसके बाद run_sync_async हर Trading Day की पहली Window में Registry खुद दोबारा भरता है)
+echo "Syncing instrument registry..."
+python manage.py sync_instruments || echo "⚠️ Instrument sync failed, पुरानी Registry इस्तेमाल होगी"
+
+# 3. बैकग्राउंड वर्कर शुरू करें (Background Worker)
 # '&' का मतलब है इसे पीछे (Background) में चलाओ और तुरंत अगली लाइन पर बढ़ जाओ।
 # हम यहाँ 'run_sync_async' का उपयोग कर रहे हैं जैसा आपने बताया।
 echo "Starting Background Worker (run_sync_async)..."
 python manage.py run_sync_async &
 
-# 3. मुख्य वेब सर्वर शुरू करें (Main Web Server)
+# 4. मुख्य वेब सर्वर शुरू करें (Main Web Server)
 # यह सबसे अंत में होना चाहिए और इसके पीछे '&' नहीं लगाना है।
 # यह Foreground में चलेगा ताकि Render को पता चले कि वेबसाइट लाइव है।
 echo "Starting Gunicorn Server..."